@@ -0,0 +1,113 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from ..core import Context
+from .topologies import TOPOLOGIES
+
+
+"""
+Conformance of the event engines (`ContextConfig(engine=...)`). Every script in `examples/` is run once per engine,
+with contexts seeded so that names and random streams are reproducible, and the outputs must be identical (up to
+object addresses). The benchmark topologies are simulated shortly on every engine as well, and must end with the same
+number of requests, scheduled events and simulated time. Run it with:
+
+    python -m cna_sim.benchmarks.conformance
+
+The same checks run as part of the tests (`tests/test_engines.py`), next to the dispatch order of `Context.run` and
+`Context.alive_race` that is pinned on every engine in `tests/test_context_run.py`.
+"""
+
+# runs an example as `__main__`, with contexts that are not given a seed seeded with 0
+BOOTSTRAP = '''
+import runpy, sys
+from cna_sim.core.context import Context
+init = Context.__init__
+def seeded_init(self, *args, seed=None, **kwargs):
+    init(self, *args, seed=0 if seed is None else seed, **kwargs)
+Context.__init__ = seeded_init
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+TOPOLOGY_RUNS = [('single', 500, 5), ('chain', 200, 3), ('fanout', 200, 2), ('edge', 500, 3), ('zones', 200, 3),
+                 ('mesh', 100, 20)]
+
+
+# object addresses in reprs differ between runs
+ADDRESS = re.compile(r' at 0x[0-9a-fA-F]+')
+
+
+def run_example(path: Path, engine, timeout=600):
+    env = dict(os.environ, CNA_SIM_ENGINE=engine, PYTHONHASHSEED='0')
+    package_root = str(Path(__file__).resolve().parents[2])
+    env['PYTHONPATH'] = os.pathsep.join(x for x in [package_root, env.get('PYTHONPATH')] if x)
+    result = subprocess.run([sys.executable, '-c', BOOTSTRAP, path.name], cwd=path.parent, env=env,
+                            capture_output=True, text=True, timeout=timeout)
+    return result.returncode, ADDRESS.sub(' at 0x', result.stdout), ADDRESS.sub(' at 0x', result.stderr)
+
+
+def check_examples(folder: Path, engines):
+    failures = []
+    for path in sorted(folder.glob('*/*.py')):
+        outputs = {engine: run_example(path, engine) for engine in engines}
+        reference = outputs[engines[0]]
+        ok = reference[0] == 0 and all(x == reference for x in outputs.values())
+        print(f'{"ok  " if ok else "FAIL"} {path.relative_to(folder)}', flush=True)
+        if not ok:
+            failures.append(str(path))
+            for engine, (code, stdout, stderr) in outputs.items():
+                print(f'  {engine}: exit code {code}, {len(stdout.splitlines())} lines of output')
+                if code != 0:
+                    print('  ' + '\n  '.join(stderr.strip().splitlines()[-5:]))
+    return failures
+
+
+def topology_outcome(topology, rps, duration, engine):
+    # ended requests, scheduled events and simulated time of a short run
+    context = TOPOLOGIES[topology](rps, engine=engine)
+    context.simulate(duration)
+    context.close()
+    return context.data_collector.ended, context.scheduled_events(), context.now()
+
+
+def check_topologies(engines):
+    failures = []
+    for topology, rps, duration in TOPOLOGY_RUNS:
+        outcomes = {engine: topology_outcome(topology, rps, duration, engine) for engine in engines}
+        ok = len(set(outcomes.values())) == 1
+        print(f'{"ok  " if ok else "FAIL"} {topology}@{rps} for {duration}s: '
+              + ', '.join(f'{k} {v[0]} requests, {v[1]} events' for k, v in outcomes.items()), flush=True)
+        if not ok:
+            failures.append(f'{topology}@{rps}')
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Conformance of the event engines.')
+    parser.add_argument('--examples', type=str, default=str(Path(__file__).resolve().parents[2] / 'examples'),
+                        help='Folder with one folder per example')
+    parser.add_argument('--engines', type=str, nargs='+', default=Context.ENGINES, choices=Context.ENGINES)
+    parser.add_argument('--skip-topologies', action='store_true')
+    args = parser.parse_args(argv)
+
+    failures = []
+    examples = Path(args.examples)
+    if examples.is_dir():
+        failures += check_examples(examples, args.engines)
+    else:
+        print(f'No examples found at {examples}.')
+    if not args.skip_topologies:
+        failures += check_topologies(args.engines)
+    if failures:
+        print(f'{len(failures)} failed: {", ".join(failures)}')
+        return 1
+    print('All engines conform.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
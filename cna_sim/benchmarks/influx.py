@@ -0,0 +1,144 @@
+import argparse
+import datetime
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from ..components.data_collectors import InfluxDataCollectorConfig, InfluxLineDataCollectorConfig
+from ..core import ContextConfig
+
+
+"""
+Throughput of the InfluxDB data collectors against a local stand-in server that implements `/api/v2/write` (and the
+bucket lookup used by `InfluxDataCollector`). Run it with:
+
+    python -m cna_sim.benchmarks.influx --points 200000
+"""
+
+
+class StandInInfluxServer:
+    def __init__(self, bucket='bench'):
+        self.bucket = bucket
+        self.points = 0
+        self.requests = 0
+        self.bytes = 0
+        self.gzip_requests = 0
+        self.lines = []
+        self.keep_lines = False
+        self.status = 204  # reply to writes, an error status rejects them
+        self.delay = 0.0  # seconds every write takes, to apply backpressure
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body=b''):
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                if body:
+                    self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if urlsplit(self.path).path != '/api/v2/write':
+                    return self._reply(404)
+                if stand_in.delay:
+                    time.sleep(stand_in.delay)
+                if stand_in.status >= 300:
+                    return self._reply(stand_in.status, b'{"code": "invalid"}')
+                raw = len(body)
+                gzipped = self.headers.get('Content-Encoding') == 'gzip'
+                if gzipped:
+                    body = gzip.decompress(body)
+                lines = [x for x in body.decode('utf-8').split('\n') if x]
+                with stand_in._lock:
+                    stand_in.points += len(lines)
+                    stand_in.requests += 1
+                    stand_in.bytes += raw
+                    stand_in.gzip_requests += gzipped
+                    if stand_in.keep_lines:
+                        stand_in.lines.extend(lines)
+                self._reply(204)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == '/api/v2/buckets':
+                    name = parse_qs(url.query).get('name', [stand_in.bucket])[0]
+                    bucket = {'id': '0000000000000001', 'orgID': '0000000000000001', 'name': name,
+                              'type': 'user', 'retentionRules': []}
+                    return self._reply(200, json.dumps({'buckets': [bucket]}).encode('utf-8'))
+                self._reply(404)
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+
+def bench(config, points):
+    context = ContextConfig(data_collector_config=config).generate()
+    collector = context.data_collector
+    tags = [{'host_name': f'service_{i % 10}', 'instance_name': f'instance_{i}'} for i in range(50)]
+    start = time.perf_counter()
+    for i in range(points):
+        collector.record('response_time', tags[i % 50], {'value': i * 1e-3}, i * 1e-3)
+    record_time = time.perf_counter() - start
+    context.close()
+    total_time = time.perf_counter() - start
+    return record_time, total_time, getattr(collector, 'stats', lambda: {})()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='InfluxDB data collector throughput benchmark.')
+    parser.add_argument('--points', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    offset = datetime.datetime(2024, 1, 1)
+    variants = [
+        ('line_protocol', lambda url: InfluxLineDataCollectorConfig(url, 'token', 'org', 'bench', offset,
+                                                                    batch_size=args.batch_size)),
+        ('line_protocol_gzip', lambda url: InfluxLineDataCollectorConfig(url, 'token', 'org', 'bench', offset,
+                                                                         batch_size=args.batch_size, gzip=True)),
+    ]
+    try:
+        import influxdb_client
+        variants.insert(0, ('influxdb_client', lambda url: InfluxDataCollectorConfig(url, 'token', 'org', 'bench', offset,
+                                                                                     clear_from_start=False)))
+    except ImportError:
+        print('influxdb-client is not installed, skipping InfluxDataCollector.')
+
+    for name, config in variants:
+        with StandInInfluxServer() as server:
+            record_time, total_time, stats = bench(config(server.url), args.points)
+            print(f'{name:>20}: {args.points / record_time:>10.0f} points/s recorded, '
+                  f'{args.points / total_time:>10.0f} points/s end to end, '
+                  f'{server.points} received in {server.requests} requests ({server.bytes} bytes)')
+            if stats:
+                print(f'{"":>20}  blocked submits: {stats["blocked_submits"]}, '
+                      f'blocked time: {stats["blocked_time"]:.3f}s, write errors: {stats["write_errors"]}')
+
+
+if __name__ == '__main__':
+    main()
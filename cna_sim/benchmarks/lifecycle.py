@@ -0,0 +1,126 @@
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from ..components.endpoints import StaticEndPointConfig
+from ..components.instances import SyncServerConfig
+from ..components.load_generators import RPSLoadGenerator
+from ..components.services import ServiceConfig
+from ..core import Context
+from ..utils import Distribution
+from .topologies import _context
+
+
+"""
+Lifecycle check of scaled-in instances. A service is scaled out to `--replicas` instances and back to one, over and
+over, while it serves a constant load. Terminated instances must release their processes, components, random streams
+and sampled metrics, so the number of components, random streams, scheduled events per simulated second and the
+traced memory must stay flat from one block of cycles to the next. Memory may grow by `memory_per_cycle` bytes per
+cycle beyond some noise, a leak of one small object per instance already exceeds it. Run it with:
+
+    python -m cna_sim.benchmarks.lifecycle --cycles 500
+"""
+
+
+def scaling_context(replicas, period, rps, seed=1, engine=None):
+    context = _context(seed, engine)
+    service = ServiceConfig(
+        SyncServerConfig(StaticEndPointConfig([('/a', [], Distribution(0.01))]), cpu_quota=2, start_up_delay=1,
+                         shut_down_delay=1),
+        replicas=1,
+        name='scaled'
+    ).generate(context)
+    context.gateway.register_hosts(['scaled'])
+    RPSLoadGenerator(context, context.gateway, rps=rps, host='scaled', endpoint='/a', name='load_generator')
+
+    def cycles():
+        while True:
+            service.scale_to(replicas)
+            yield context.timeout(period / 2)
+            service.scale_to(1)
+            yield context.timeout(period / 2)
+    context.run(cycles())
+    return context
+
+
+def sample(context: Context):
+    gc.collect()
+    return {
+        'time': context.now(),
+        'events': context.scheduled_events(),
+        'components': len(context.components),
+        'rngs': len(context._rngs),
+        'memory': tracemalloc.get_traced_memory()[0],
+    }
+
+
+def check(cycles, blocks=5, replicas=10, period=10, rps=50, engine=None, tolerance=0.1, memory_per_cycle=32):
+    context = scaling_context(replicas, period, rps, engine=engine)
+    tracemalloc.start()
+    try:
+        # the first block warms up the buffers of the distributions and the metric windows
+        context.simulate(cycles // blocks * period)
+        previous = sample(context)
+        rows = []
+        for block in range(1, blocks):
+            started = time.perf_counter()
+            context.simulate(context.now() + cycles // blocks * period)
+            current = sample(context)
+            rows.append({
+                'cycles': (block + 1) * (cycles // blocks),
+                'events_per_second': (current['events'] - previous['events']) / (current['time'] - previous['time']),
+                'components': current['components'],
+                'rngs': current['rngs'],
+                'memory': current['memory'],
+                'wall': time.perf_counter() - started,
+            })
+            previous = current
+    finally:
+        tracemalloc.stop()
+        context.close()
+
+    first = rows[0]
+    failures = []
+    for key in ['components', 'rngs']:
+        if any(x[key] > first[key] for x in rows):
+            failures.append(key)
+    if any(x['events_per_second'] > first['events_per_second'] * (1 + tolerance) for x in rows):
+        failures.append('events_per_second')
+    # traced memory varies by a few kilobytes with what is in flight when it is sampled
+    if any(x['memory'] - first['memory'] > (1 << 14) + memory_per_cycle * (x['cycles'] - first['cycles'])
+           for x in rows):
+        failures.append('memory')
+    return rows, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lifecycle check of scaled-in instances.')
+    parser.add_argument('--cycles', type=int, default=500, help='Number of scale out / scale in cycles')
+    parser.add_argument('--blocks', type=int, default=5, help='Number of blocks the cycles are measured in')
+    parser.add_argument('--replicas', type=int, default=10, help='Number of instances when scaled out')
+    parser.add_argument('--engine', type=str, choices=Context.ENGINES)
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Relative growth of the event rate that is tolerated')
+    parser.add_argument('--memory-per-cycle', type=int, default=32,
+                        help='Growth of the traced memory per cycle in bytes that is tolerated')
+    args = parser.parse_args(argv)
+    if args.cycles < args.blocks * 2:
+        parser.error('--cycles must be at least twice --blocks')
+
+    rows, failures = check(args.cycles, args.blocks, args.replicas, engine=args.engine, tolerance=args.tolerance,
+                           memory_per_cycle=args.memory_per_cycle)
+    print(f'{"cycles":>8} {"events/s":>10} {"components":>11} {"rngs":>6} {"memory":>10} {"wall":>8}')
+    for x in rows:
+        print(f'{x["cycles"]:>8} {x["events_per_second"]:>10.1f} {x["components"]:>11} {x["rngs"]:>6} '
+              f'{x["memory"] / 1e6:>8.2f}MB {x["wall"]:>7.2f}s')
+    if failures:
+        print(f'Grows with the number of cycles: {", ".join(failures)}')
+        return 1
+    print('Terminated instances are released.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import argparse
+import time
+
+from ..components.data_collectors import DefaultDataCollector
+from ..components.endpoints import StaticEndPointConfig
+from ..components.instances import SyncServerConfig
+from ..components.load_generators import RPSLoadGenerator
+from ..components.services import ServiceConfig
+from ..core import ContextConfig, Config
+from ..utils import Distribution
+
+
+"""
+Microbenchmark of the request plumbing (`Client`, `Promise`, `Gateway`, `StaticEndPoint`).
+
+A load generator sends requests through the gateway to `front`, which calls `back` once. The number of
+scheduled simpy events and started processes is reported per user request. Run it with:
+
+    python -m cna_sim.benchmarks.promise --rps 1000 --duration 10
+"""
+
+
+class CountingDataCollector(DefaultDataCollector):
+    def __init__(self, context, name=None):
+        super().__init__(context, name)
+        self.ended = 0
+
+    def record_ended_request(self, rc):
+        self.ended += 1
+
+    def record(self, measurement, tags, fields, time=None):
+        pass
+
+
+def count_calls(obj, attr, counter):
+    func = getattr(obj, attr)
+
+    def wrapper(*args, **kwargs):
+        counter[attr] += 1
+        return func(*args, **kwargs)
+
+    setattr(obj, attr, wrapper)
+
+
+def build(rps):
+    context = ContextConfig(
+        data_collector_config=Config.of(lambda ctx: CountingDataCollector(ctx))
+    ).generate()
+    for name, dependencies in [('front', [('back', '/b')]), ('back', [])]:
+        endpoint = '/f' if name == 'front' else '/b'
+        ServiceConfig(
+            SyncServerConfig(StaticEndPointConfig([(endpoint, dependencies, Distribution(mean=0.001))]),
+                             threads=1024, cpu_quota=64),
+            replicas=2,
+            name=name
+        ).generate(context)
+    context.gateway.register_hosts(['front', 'back'])
+    load_generator = RPSLoadGenerator(context, context.gateway, rps=rps, host='front', endpoint='/f')
+    return context, load_generator
+
+
+def bench(rps, duration):
+    context, load_generator = build(rps)
+    counter = {'schedule': 0, 'process': 0, 'send_request': 0}
+    count_calls(context.env, 'schedule', counter)
+    count_calls(context.env, 'process', counter)
+    count_calls(load_generator.client, 'send_request', counter)
+
+    start = time.perf_counter()
+    context.simulate(duration)
+    elapsed = time.perf_counter() - start
+    context.close()
+
+    requests = max(counter['send_request'], 1)
+    return {
+        'requests': counter['send_request'],
+        'ended_requests': context.data_collector.ended,
+        'events_per_request': counter['schedule'] / requests,
+        'processes_per_request': counter['process'] / requests,
+        'wall_time': elapsed,
+        'requests_per_second': counter['send_request'] / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Promise and request plumbing microbenchmark.')
+    parser.add_argument('--rps', type=float, default=1000)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args(argv)
+
+    result = bench(args.rps, args.duration)
+    for k, v in result.items():
+        print(f'{k:>22}: {v:.2f}' if type(v) is float else f'{k:>22}: {v}')
+
+
+if __name__ == '__main__':
+    main()
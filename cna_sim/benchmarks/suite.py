@@ -0,0 +1,177 @@
+import argparse
+import datetime
+import fnmatch
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ..core import Context
+from .topologies import TOPOLOGIES
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+"""
+Benchmark suite of canonical topologies (see `topologies.py`) at several request rates. Every scenario runs in a fresh
+process and reports simulated requests and scheduled events per wall second and the peak RSS of that process.
+Results are written as JSON and can be compared against a saved baseline:
+
+    cna-sim bench -o baseline.json
+    cna-sim bench --baseline baseline.json --threshold 0.1
+    cna-sim bench --engine fast --baseline baseline.json
+
+The comparison exits with status 1 when the requests or events per second of a scenario dropped by more than the
+threshold (a fraction of the baseline).
+"""
+
+# (topology, rps, simulated seconds)
+SCENARIOS = [
+    ('single', 100, 60),
+    ('single', 1000, 20),
+    ('chain', 100, 30),
+    ('chain', 500, 10),
+    ('fanout', 100, 20),
+    ('fanout', 500, 5),
+    ('edge', 1000, 20),
+    ('zones', 500, 10),
+    ('mesh', 100, 60),
+    ('mesh', 300, 30),
+]
+
+METRICS = ['requests_per_second', 'events_per_second']
+
+
+def scenario_name(topology, rps):
+    return f'{topology}@{rps}'
+
+
+def peak_rss_mb():
+    # peak resident memory of this process, None if neither `resource` nor psutil is available
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)  # bytes on macOS, KB elsewhere
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+
+
+def run_scenario(topology, rps, duration, engine=None):
+    context = TOPOLOGIES[topology](rps, engine=engine)
+    start = time.perf_counter()
+    context.simulate(duration)
+    wall_time = time.perf_counter() - start
+    events = context.scheduled_events()
+    context.close()
+    requests = context.data_collector.ended
+    return {
+        'topology': topology,
+        'engine': context.engine,
+        'rps': rps,
+        'duration': duration,
+        'requests': requests,
+        'events': events,
+        'wall_time': wall_time,
+        'requests_per_second': requests / wall_time,
+        'events_per_second': events / wall_time,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_suite(scenarios, repeat=1, engine=None):
+    # best of `repeat` runs by wall time, each run in a fresh process
+    results = {}
+    for topology, rps, duration in scenarios:
+        best = None
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(run_scenario, topology, rps, duration, engine).result()
+            if best is None or result['wall_time'] < best['wall_time']:
+                best = result
+        results[scenario_name(topology, rps)] = best
+        print(f'{scenario_name(topology, rps):<14} {best["requests"]:>9} requests {best["wall_time"]:>8.2f}s '
+              f'{best["requests_per_second"]:>10.0f} req/s {best["events_per_second"]:>10.0f} events/s '
+              + ('' if best['peak_rss_mb'] is None else f'{best["peak_rss_mb"]:>8.1f} MB'), flush=True)
+    return {
+        'meta': {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'engine': engine,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    # returns the report lines and whether any scenario regressed by more than `threshold`
+    lines = [f'{"scenario":<14} {"metric":<20} {"baseline":>12} {"current":>12} {"change":>8}']
+    regressed = False
+    for name, result in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            lines.append(f'{name:<14} not in baseline')
+            continue
+        for metric in METRICS + ['peak_rss_mb']:
+            if result.get(metric) is None or base.get(metric) is None:
+                continue
+            change = result[metric] / base[metric] - 1 if base[metric] else 0.0
+            flag = ''
+            if metric in METRICS and change < -threshold:
+                flag = ' REGRESSION'
+                regressed = True
+            lines.append(f'{name:<14} {metric:<20} {base[metric]:>12.1f} {result[metric]:>12.1f} '
+                         f'{change * 100:>+7.1f}%{flag}')
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='cna-sim bench', description='Benchmark suite of canonical topologies.')
+    parser.add_argument('-s', '--scenarios', type=str, nargs='+',
+                        help='Scenarios to run as topology@rps, shell patterns allowed (default: all)')
+    parser.add_argument('--duration-scale', type=float, default=1.0, help='Factor applied to the simulated durations')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per scenario, the fastest one is kept')
+    parser.add_argument('--engine', type=str, choices=Context.ENGINES, help='Event engine (default: simpy)')
+    parser.add_argument('-o', '--output', type=str, help='File to write the results to')
+    parser.add_argument('--baseline', type=str, help='Results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Allowed drop of requests or events per second relative to the baseline')
+    parser.add_argument('--list', action='store_true', help='List the scenarios and exit')
+    args = parser.parse_args(argv)
+
+    scenarios = [(t, r, d * args.duration_scale) for t, r, d in SCENARIOS
+                 if args.scenarios is None or any(fnmatch.fnmatch(scenario_name(t, r), x) for x in args.scenarios)]
+    if args.list:
+        for topology, rps, duration in scenarios:
+            print(f'{scenario_name(topology, rps):<14} {duration:g}s')
+        return 0
+    if not scenarios:
+        print('No scenario matches.')
+        return 1
+
+    results = run_suite(scenarios, args.repeat, args.engine)
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote the results to {args.output}.')
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        lines, regressed = compare(results, baseline, args.threshold)
+        print('\n'.join(lines))
+        if regressed:
+            print(f'Regression of more than {args.threshold * 100:.0f}% against {args.baseline}.')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
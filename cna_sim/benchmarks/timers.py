@@ -0,0 +1,64 @@
+import argparse
+import sys
+import time
+
+from ..core import Context
+from .topologies import single
+
+
+"""
+Request timeouts at long durations. The `single` topology is run with a client timeout that is much longer than the
+response time, so nearly every timer is cancelled. Reported are the simulated requests per wall second and the peak
+sizes, sampled every simulated second, of the event queue and of the timer heap (`context.timers`), which should stay
+proportional to the requests in flight rather than to the requests sent within one timeout. Run it with:
+
+    python -m cna_sim.benchmarks.timers --rps 5000 --timeouts 0 1 30
+"""
+
+
+def run(rps, timeout, duration, engine=None):
+    context = single(rps, engine=engine, timeout=timeout or None)
+    timers = getattr(context, 'timers', None)
+    peaks = {'queue': 0, 'timers': 0}
+
+    def sample():
+        while True:
+            yield context.timeout(1)
+            peaks['queue'] = max(peaks['queue'], len(context.env._queue))
+            if timers is not None:
+                peaks['timers'] = max(peaks['timers'], len(timers))
+    context.run(sample())
+
+    start = time.perf_counter()
+    context.simulate(duration)
+    wall_time = time.perf_counter() - start
+    context.close()
+    return {
+        'timeout': timeout,
+        'requests': context.data_collector.ended,
+        'events': context.scheduled_events(),
+        'requests_per_second': context.data_collector.ended / wall_time,
+        'peak_queue': peaks['queue'],
+        'peak_timers': peaks['timers'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Request timeouts at long durations.')
+    parser.add_argument('--rps', type=float, default=1000)
+    parser.add_argument('--duration', type=float, default=60, help='Simulated seconds of every run')
+    parser.add_argument('--timeouts', type=float, nargs='+', default=[0, 1, 30],
+                        help='Client timeouts in seconds, 0 for none')
+    parser.add_argument('--engine', type=str, choices=Context.ENGINES)
+    args = parser.parse_args(argv)
+
+    print(f'{"timeout":>8} {"requests":>9} {"events":>9} {"requests/s":>11} {"peak queue":>11} {"peak timers":>12}')
+    for timeout in args.timeouts:
+        x = run(args.rps, timeout, args.duration, args.engine)
+        print(f'{x["timeout"]:>8g} {x["requests"]:>9} {x["events"]:>9} {x["requests_per_second"]:>11.0f} '
+              f'{x["peak_queue"]:>11} {x["peak_timers"]:>12}', flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
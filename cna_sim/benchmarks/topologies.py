@@ -0,0 +1,128 @@
+import numpy as np
+
+from ..components.autoscalers import HorizontalAutoscalerConfig
+from ..components.endpoints import StaticEndPointConfig
+from ..components.instances import SyncServerConfig
+from ..components.load_generators import RPSLoadGenerator, MixedLoadGenerator
+from ..components.networks import LatencyNetworkConfig
+from ..components.proxies import GatewayConfig
+from ..components.services import ServiceConfig
+from ..core import ContextConfig, Config, MessageConfig
+from ..utils import Distribution
+from .promise import CountingDataCollector
+
+
+"""
+Canonical topologies of the benchmark suite, built programmatically with fixed seeds. Each builder returns a context
+on the given event engine with a `CountingDataCollector` and a load generator sending `rps` requests per second.
+Every service is registered at the gateway, which instances also use to reach their dependencies.
+"""
+
+
+def _context(seed, engine, gateway_config=None, network_config=None):
+    return ContextConfig(data_collector_config=Config.of(lambda ctx: CountingDataCollector(ctx)), seed=seed,
+                         engine=engine, gateway_config=gateway_config, network_config=network_config).generate()
+
+
+def _service(context, name, endpoint, dependencies, cpu_time, replicas=1, cpu_quota=4, threads=64, autoscaler=None,
+             network_group=None):
+    ServiceConfig(
+        SyncServerConfig(StaticEndPointConfig([(endpoint, dependencies, Distribution(cpu_time, cpu_time / 4))]),
+                         cpu_quota=cpu_quota, threads=threads, network_group=network_group),
+        autoscaler_config=autoscaler,
+        replicas=replicas,
+        name=name,
+        network_group=network_group
+    ).generate(context)
+
+
+def single(rps, seed=1, engine=None, timeout=None):
+    # one instance, requests time out after `timeout` seconds if given
+    context = _context(seed, engine)
+    _service(context, 'single', '/s', [], 0.005, cpu_quota=8)
+    context.gateway.register_hosts(['single'])
+    RPSLoadGenerator(context, context.gateway, rps=rps, host='single', endpoint='/s', timeout=timeout,
+                     name='load_generator')
+    return context
+
+
+def chain(rps, seed=1, engine=None, hops=10):
+    # hop_0 -> hop_1 -> ... -> hop_{hops - 1}
+    context = _context(seed, engine)
+    for i in range(hops):
+        dependencies = [(f'hop_{i + 1}', '/c')] if i + 1 < hops else []
+        _service(context, f'hop_{i}', '/c', dependencies, 0.001, replicas=2)
+    context.gateway.register_hosts([f'hop_{i}' for i in range(hops)])
+    RPSLoadGenerator(context, context.gateway, rps=rps, host='hop_0', endpoint='/c', name='load_generator')
+    return context
+
+
+def fanout(rps, seed=1, engine=None, width=20):
+    # front calls each of `width` backends once
+    context = _context(seed, engine)
+    _service(context, 'front', '/f', [(f'backend_{i}', '/b') for i in range(width)], 0.001, replicas=2)
+    for i in range(width):
+        _service(context, f'backend_{i}', '/b', [], 0.001, replicas=2)
+    context.gateway.register_hosts(['front'] + [f'backend_{i}' for i in range(width)])
+    RPSLoadGenerator(context, context.gateway, rps=rps, host='front', endpoint='/f', name='load_generator')
+    return context
+
+
+def zones(rps, seed=1, engine=None, hops=6):
+    # a chain alternating between two zones, cross-zone hops add latency and share a 1 Gbit/s link per direction;
+    # the load comes from the second zone, so its 16 KiB requests queue on that link
+    network_config = LatencyNetworkConfig(
+        latency={'zone_a': {'zone_a': 0.0002, 'zone_b': Distribution(0.002, 0.0005)}, 'zone_b': {'zone_b': 0.0002}},
+        bandwidth={'zone_a': {'zone_b': 125e6}})
+    context = _context(seed, engine, network_config=network_config)
+    for i in range(hops):
+        dependencies = [(f'zone_hop_{i + 1}', '/z')] if i + 1 < hops else []
+        _service(context, f'zone_hop_{i}', '/z', dependencies, 0.001, replicas=2,
+                 network_group='zone_a' if i % 2 == 0 else 'zone_b')
+    context.gateway.register_hosts([f'zone_hop_{i}' for i in range(hops)])
+    RPSLoadGenerator(context, context.gateway, rps=rps, host='zone_hop_0', endpoint='/z',
+                     request_gen=MessageConfig(size=16384).generator(), network_group='zone_b', name='load_generator')
+    return context
+
+
+def edge(rps, seed=1, engine=None, pass_through=True):
+    # requests are sent to the gateway, which routes a tenth of them to a canary
+    gateway_config = GatewayConfig(routes=[{'host': 'shop', 'targets': {'shop_stable': 9, 'shop_canary': 1}}],
+                                   pass_through=pass_through, name='gateway')
+    context = _context(seed, engine, gateway_config)
+    _service(context, 'shop_stable', '/e', [], 0.002, replicas=2)
+    _service(context, 'shop_canary', '/e', [], 0.002)
+    RPSLoadGenerator(context, context.gateway, rps=rps, host='shop', endpoint='/e', by_proxy=True,
+                     name='load_generator')
+    return context
+
+
+def mesh(rps, seed=1, engine=None, services=200, tiers=4):
+    # services in tiers, each service outside the last tier calls two random services of the next tier; the load is
+    # spread evenly over the first tier and every service is scaled by a horizontal autoscaler
+    context = _context(seed, engine)
+    rng = np.random.default_rng(seed)
+    size = services // tiers
+    autoscaler = HorizontalAutoscalerConfig('cpu_utilization', 0.6, min_num=1, max_num=5, interval=15,
+                                            downscale_stabilization_window=60)
+    for tier in range(tiers):
+        for i in range(size):
+            dependencies = []
+            if tier + 1 < tiers:
+                dependencies = [(f'mesh_{tier + 1}_{j}', '/m') for j in rng.choice(size, 2, replace=False).tolist()]
+            _service(context, f'mesh_{tier}_{i}', '/m', dependencies, 0.002, cpu_quota=1, threads=32,
+                     autoscaler=autoscaler)
+    context.gateway.register_hosts([f'mesh_{tier}_{i}' for tier in range(tiers) for i in range(size)])
+    MixedLoadGenerator(context, context.gateway, [{'host': f'mesh_0_{i}', 'endpoint': '/m'} for i in range(size)],
+                       rps_list=[(0, rps)], name='load_generator')
+    return context
+
+
+TOPOLOGIES = {
+    'single': single,
+    'chain': chain,
+    'fanout': fanout,
+    'edge': edge,
+    'zones': zones,
+    'mesh': mesh,
+}
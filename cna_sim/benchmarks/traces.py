@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ..components.load_generators import TraceReplayLoadGenerator
+from ..core import Context
+
+
+"""
+Trace replay reading speed. A trace of `--rows` requests to a few hosts is written as CSV and as `.npy`, and the
+arrivals of a `TraceReplayLoadGenerator` (the simulated send times, hosts, endpoints and sizes, read a chunk at a
+time) are drawn from each without simulating the requests. Reported are the arrivals per wall second, which should be
+at least `--target`; the command fails otherwise. Run it with:
+
+    python -m cna_sim.benchmarks.traces --rows 1000000
+"""
+
+
+def write_traces(directory, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    trace = np.zeros(rows, dtype=[('timestamp', float), ('host', 'U8'), ('endpoint', 'U16'), ('size', int)])
+    trace['timestamp'] = np.cumsum(rng.exponential(0.001, rows))
+    trace['host'] = np.char.add('host', (np.arange(rows) % 4).astype(str))
+    trace['endpoint'] = np.char.add('/endpoint', (np.arange(rows) % 16).astype(str))
+    trace['size'] = rng.integers(0, 1000, rows)
+    npy = os.path.join(directory, 'trace.npy')
+    np.save(npy, trace)
+    csv = os.path.join(directory, 'trace.csv')
+    np.savetxt(csv, trace, fmt=['%.6f', '%s', '%s', '%d'], delimiter=',', header='timestamp,host,endpoint,size',
+               comments='')
+    return {'csv': csv, 'npy': npy}
+
+
+def run(file, chunk_size=None, hosts=None):
+    generator = TraceReplayLoadGenerator(Context(seed=0), None, file, chunk_size=chunk_size, hosts=hosts)
+    start = time.perf_counter()
+    arrivals = sum(len(at) for at, _, _, _ in generator.arrivals())
+    wall_time = time.perf_counter() - start
+    return {'arrivals': arrivals, 'arrivals_per_second': arrivals / wall_time}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Trace replay reading speed.')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--chunk-size', type=int)
+    parser.add_argument('--target', type=float, default=100000, help='Arrivals per wall second each format must reach')
+    args = parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        print(f'{"format":>6} {"arrivals":>9} {"arrivals/s":>11}')
+        for format, file in write_traces(directory, args.rows).items():
+            x = run(file, args.chunk_size)
+            failed |= x['arrivals_per_second'] < args.target
+            print(f'{format:>6} {x["arrivals"]:>9} {x["arrivals_per_second"]:>11.0f}', flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,20 @@
 import yaml
 import os
+from copy import copy, deepcopy
 
 from .components.autoscalers import DefaultScalerConfig, HorizontalAutoscalerConfig
-from .components.data_collectors import DefaultDataCollectorConfig, InfluxDataCollectorConfig
+from .components.data_collectors import DefaultDataCollectorConfig, InfluxDataCollectorConfig, \
+    InfluxLineDataCollectorConfig, ColumnarDataCollectorConfig, HistogramDataCollectorConfig
 from .components.endpoints import StaticEndPointConfig
 from .components.instances import SyncServerConfig
-from .components.load_generators import RPSLoadGeneratorConfig, DynamicRPSLoadGeneratorConfig
-from .components.networks import DefaultNetworkConfig
-from .components.proxies import GatewayConfig, RandomLoadBalancerConfig
+from .components.load_generators import RPSLoadGeneratorConfig, DynamicRPSLoadGeneratorConfig, \
+    TraceReplayLoadGeneratorConfig, MixedLoadGeneratorConfig, ClosedLoopLoadGeneratorConfig
+from .components.networks import DefaultNetworkConfig, LatencyNetworkConfig
+from .components.proxies import GatewayConfig, RandomLoadBalancerConfig, RoundRobinLoadBalancerConfig, \
+    LeastOutstandingLoadBalancerConfig, PowerOfTwoLoadBalancerConfig, WeightedLoadBalancerConfig
+from .components.samplers import MetricSamplerConfig
 from .components.services import ServiceConfig
-from .core import ContextConfig, Context
+from .core import ContextConfig, Context, MessageConfig
 from .utils import default_if_none, uuid
 
 
@@ -36,6 +41,34 @@ class ContextBuilder:
         self.config_jsons[config_json['name']] = config_json
         return self
 
+    def copy(self):
+        builder = ContextBuilder()
+        builder.class_templates = copy(self.class_templates)
+        builder.config_jsons = copy(self.config_jsons)
+        return builder
+
+    def override(self, name, path, value):
+        # sets a field in the spec of config `name`, e.g. override('pod_config', 'threads', 16) or
+        # override('endpoint_config', '0.computation_time.mean', 0.1)
+        config_json = deepcopy(self.config_jsons[name])
+        if config_json.get('spec') is None:
+            config_json['spec'] = {}
+        node = config_json['spec']
+        keys = str(path).split('.')
+        for k in keys[:-1]:
+            if type(node) is list:
+                node = node[int(k)]
+            else:
+                if node.get(k) is None:
+                    node[k] = {}
+                node = node[k]
+        if type(node) is list:
+            node[int(keys[-1])] = value
+        else:
+            node[keys[-1]] = value
+        self.config_jsons[name] = config_json
+        return self
+
     def add_file(self, file_path):
         with open(file_path, 'r', encoding='utf-8') as f:
             data = yaml.safe_load_all(f)
@@ -53,7 +86,7 @@ class ContextBuilder:
                     self.add_file(file_path)
         return self
 
-    def build(self) -> Context:
+    def context_config(self) -> ContextConfig:
         for k, v in self.config_jsons.items():
             if v['kind'] == 'ContextConfig':
                 context_config_json = v
@@ -61,19 +94,25 @@ class ContextBuilder:
         else:
             raise Exception('ContextConfig not found.')
 
-        context_config = ContextConfig.from_json(default_if_none(context_config_json.get('spec'), {}), self)
-        return context_config.generate()
+        return ContextConfig.from_json(default_if_none(context_config_json.get('spec'), {}), self)
+
+    def build(self, seed=None) -> Context:
+        return self.context_config().generate(seed)
 
 
 def default_context_builder():
     return ContextBuilder().with_classes([
-        ContextConfig,
+        ContextConfig, MessageConfig,
         DefaultScalerConfig, HorizontalAutoscalerConfig,
-        DefaultDataCollectorConfig, InfluxDataCollectorConfig,
+        DefaultDataCollectorConfig, InfluxDataCollectorConfig, InfluxLineDataCollectorConfig,
+        ColumnarDataCollectorConfig, HistogramDataCollectorConfig,
         StaticEndPointConfig,
         SyncServerConfig,
-        RPSLoadGeneratorConfig, DynamicRPSLoadGeneratorConfig,
-        DefaultNetworkConfig,
-        GatewayConfig, RandomLoadBalancerConfig,
+        RPSLoadGeneratorConfig, DynamicRPSLoadGeneratorConfig, TraceReplayLoadGeneratorConfig,
+        MixedLoadGeneratorConfig, ClosedLoopLoadGeneratorConfig,
+        DefaultNetworkConfig, LatencyNetworkConfig,
+        GatewayConfig, RandomLoadBalancerConfig, RoundRobinLoadBalancerConfig, LeastOutstandingLoadBalancerConfig,
+        PowerOfTwoLoadBalancerConfig, WeightedLoadBalancerConfig,
+        MetricSamplerConfig,
         ServiceConfig,
     ])
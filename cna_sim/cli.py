@@ -1,12 +1,29 @@
 import argparse
+import json
+import sys
 from .builder import default_context_builder
 
 def run():
+    if sys.argv[1:2] == ['bench']:
+        from .benchmarks.suite import main
+        sys.exit(main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(description='Say hi.')
     parser.add_argument('-f', '--file', type=str, nargs='+', help='File path of configurations')
     parser.add_argument('-fo', '--folder', type=str, nargs='+', help='Folder of configurations')
     parser.add_argument('-d', '--duration', type=float, help='Duration of the simulation (in seconds)')
+    parser.add_argument('-s', '--seed', type=int, help='Seed of the simulation, overrides the one in ContextConfig')
+    parser.add_argument('-r', '--replications', type=int, help='Number of independent replications to run')
+    parser.add_argument('-j', '--jobs', type=int, help='Number of processes for replications (default: all cores)')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the reported intervals')
+    parser.add_argument('-o', '--output', type=str, help='File to write the replication or sweep results to')
+    parser.add_argument('--sweep', type=str, nargs='*',
+                        help='Run the SweepConfig found in the configurations or in the given files')
+    parser.add_argument('--profile', type=str, nargs='?', const='',
+                        help='Profile the simulation, print a report and write it as JSON to the given file')
     args = parser.parse_args()
+    if args.profile is not None and (args.replications is not None or args.sweep is not None):
+        parser.error('--profile profiles a single simulation, it cannot be combined with --replications or --sweep')
 
     builder = default_context_builder()
     if args.file is not None:
@@ -22,8 +39,52 @@ def run():
     if args.duration is not None:
         duration = args.duration
 
-    with builder.build() as context:
+    if args.sweep is not None:
+        from .sweep import SweepConfig, Sweep
+
+        builder.with_classes([SweepConfig])
+        for file_path in args.sweep:
+            builder.add_file(file_path)
+        names = [k for k, v in builder.config_jsons.items() if v['kind'] == SweepConfig.kind()]
+        if not names:
+            raise Exception('SweepConfig not found.')
+        sweep = builder.use_config(names[0]).generate(builder)
+        if args.seed is not None:
+            sweep.seed = args.seed
+        points = sweep.points()
+        print(f'Running sweep {names[0]}: {len(points)} points.')
+        rows = sweep.run(args.jobs, args.duration, args.replications)
+        output = args.output if args.output is not None else sweep.output
+        if output is not None:
+            Sweep.write(rows, output)
+            print(f'Wrote {len(rows)} rows to {output}.')
+        return
+
+    if args.replications is not None:
+        from .runner import run_replications, format_aggregate
+
+        print(f'Running {args.replications} replications.')
+        result = run_replications(builder, duration, args.replications, args.jobs, args.seed, args.confidence)
+        print(f'Seed entropy: {result["entropy"]}')
+        print(format_aggregate(result))
+        if args.output is not None:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+        return
+
+    with builder.build(args.seed) as context:
+        if args.profile is not None:
+            context.start_profiling()
         print('Simulation started.')
-        context.simulate(duration)
+        try:
+            context.simulate(duration)
+        finally:
+            if args.profile is not None:
+                context.stop_profiling()
         print('Simulation ended.')
-
+        if args.profile is not None:
+            profiler = context.profiler
+            print(profiler.report())
+            if args.profile:
+                profiler.write(args.profile)
+                print(f'Wrote the profile to {args.profile}.')
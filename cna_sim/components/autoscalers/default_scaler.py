@@ -9,7 +9,7 @@ class DefaultScalerConfig(Config):
     name: str = None
 
     def generator(self):
-        return lambda ctx, svc: DefaultScaler(ctx, self.name)
+        return lambda ctx, svc: DefaultScaler(ctx, ctx.child_name(svc, 'DefaultScaler') if self.name is None else self.name)
 
 
 class DefaultScaler(AutoScalerBase):
@@ -34,6 +34,8 @@ class HorizontalAutoscaler(AutoScalerBase):
     def __init__(self, context: Context, service, metric_name, target_value, enabled=None, min_num=None, max_num=None,
                  interval=None,
                  downscale_stabilization_window=None, name=None):
+        if name is None:
+            name = context.child_name(service, type(self).__name__)
         super().__init__(context, name)
         self.service = not_none(service)
         self.enabled = default_if_none(enabled, True)
@@ -57,8 +59,7 @@ class HorizontalAutoscaler(AutoScalerBase):
         return optimal
 
     def scale(self):
-        metric_list = [x.metric(self.metric_name) for x in self.service.instances.values() if
-                       x.metric('status') == 'ACTIVE']
+        metric_list = [x.metric(self.metric_name) for x in self.service.active_instances]
         if len(metric_list) == 0:
             return
         avg_metric = sum(metric_list) / len(metric_list)
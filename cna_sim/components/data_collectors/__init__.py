@@ -1,3 +1,6 @@
 from .data_collector_base import DataCollectorBase
 from .default_data_collector import DefaultDataCollector, DefaultDataCollectorConfig
-from .influx_data_collector import InfluxDataCollector, InfluxDataCollectorConfig
\ No newline at end of file
+from .influx_data_collector import InfluxDataCollector, InfluxDataCollectorConfig
+from .influx_line_data_collector import InfluxLineDataCollector, InfluxLineDataCollectorConfig, LineProtocolWriter
+from .columnar_data_collector import ColumnarDataCollector, ColumnarDataCollectorConfig
+from .histogram_data_collector import HistogramDataCollector, HistogramDataCollectorConfig, LogHistogram
\ No newline at end of file
@@ -0,0 +1,281 @@
+import csv
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import DataCollectorBase
+from ...core import *
+from ...utils import default_if_none, shallow_asdict
+
+
+_NUMBER = (int, float, np.number)
+
+
+@dataclass
+class ColumnarDataCollectorConfig(Config):
+    path: str = None
+    format: str = None
+    capacity: int = None
+    name: str = None
+
+    def generator(self):
+        return lambda ctx: ColumnarDataCollector(ctx, **shallow_asdict(self))
+
+
+class ColumnTable:
+    # growable typed columns; tag columns hold int32 codes (-1 for missing), field columns float64 (NaN for missing),
+    # or int32 codes like tags for fields with non-numeric values
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.capacity = capacity
+        self.tag_columns = {}
+        self.field_columns = {}
+
+    def add_tag(self, key):
+        col = self.tag_columns[key] = np.full(self.capacity, -1, dtype=np.int32)
+        return col
+
+    def add_field(self, key, coded=False):
+        if coded:
+            col = self.field_columns[key] = np.full(self.capacity, -1, dtype=np.int32)
+        else:
+            col = self.field_columns[key] = np.full(self.capacity, np.nan, dtype=np.float64)
+        return col
+
+    def next_row(self):
+        if self.size == self.capacity:
+            self.grow()
+        self.size += 1
+        return self.size - 1
+
+    def next_rows(self, n):
+        while self.size + n > self.capacity:
+            self.grow()
+        self.size += n
+        return slice(self.size - n, self.size)
+
+    def grow(self):
+        self.capacity *= 2
+        for columns in [self.tag_columns, self.field_columns]:
+            for k, col in columns.items():
+                new_col = np.full(self.capacity, -1 if col.dtype == np.int32 else np.nan, dtype=col.dtype)
+                new_col[:self.size] = col[:self.size]
+                columns[k] = new_col
+
+    def tags(self):
+        return {k: v[:self.size] for k, v in self.tag_columns.items()}
+
+    def coded_columns(self):
+        return [*self.tag_columns, *(k for k, v in self.field_columns.items() if v.dtype == np.int32)]
+
+    def fields(self):
+        return {k: v[:self.size] for k, v in self.field_columns.items()}
+
+
+class ColumnarDataCollector(DataCollectorBase):
+    REQUESTS = 'requests'
+    REQUEST_TAGS = ['host_name', 'instance_name', 'endpoint_name', 'status']
+    REQUEST_FIELDS = ['req_sent', 'req_arrived', 'proc_started', 'proc_completed', 'resp_arrived', 'failed_at']
+    FORMATS = ['npz', 'parquet', 'csv']
+
+    def __init__(self, context: Context, path=None, format=None, capacity=None, name=None):
+        super().__init__(context, name)
+        self.path = path  # directory to write one file per measurement to, can be none
+        self.format = default_if_none(format, 'npz')
+        if self.format not in ColumnarDataCollector.FORMATS:
+            raise ValueError(f'Unknown format {self.format}.')
+        self.capacity = default_if_none(capacity, 1024)
+        self.codes = {}
+        self.categories = {}
+        self.tables = {}
+        self._written = {}
+
+        self.requests = self.table(ColumnarDataCollector.REQUESTS)
+        for k in ColumnarDataCollector.REQUEST_TAGS:
+            self.requests.add_tag(k)
+        for k in ColumnarDataCollector.REQUEST_FIELDS:
+            self.requests.add_field(k)
+
+    def table(self, measurement) -> ColumnTable:
+        table = self.tables.get(measurement)
+        if table is None:
+            table = self.tables[measurement] = ColumnTable(self.capacity)
+        return table
+
+    def intern(self, key, value):
+        if value is None:
+            return -1
+        codes = self.codes.get(key)
+        if codes is None:
+            codes = self.codes[key] = {}
+            self.categories[key] = []
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.categories[key].append(value)
+        return code
+
+    def record_ended_request(self, rc: RequestContext):
+        if not rc.mark:
+            return
+        t = self.requests
+        i = t.next_row()
+        tags = t.tag_columns
+        tags['host_name'][i] = self.intern('host_name', rc.host_name)
+        tags['instance_name'][i] = self.intern('instance_name', rc.instance_name)
+        tags['endpoint_name'][i] = self.intern('endpoint_name', rc.endpoint_name)
+        tags['status'][i] = self.intern('status', 'TIMEOUT' if rc.is_timeout else rc.status)
+        fields = t.field_columns
+        fields['req_sent'][i] = rc.req_sent
+        fields['req_arrived'][i] = rc.req_arrived
+        fields['proc_started'][i] = rc.proc_started
+        fields['proc_completed'][i] = rc.proc_completed
+        fields['resp_arrived'][i] = rc.resp_arrived
+        fields['failed_at'][i] = rc.failed_at
+
+    def field_column(self, t: ColumnTable, key, numeric):
+        # float64 while the values are numbers, codes interned like tags once one is not (a string, a status, ...)
+        col = t.field_columns.get(key)
+        if col is None:
+            return t.add_field(key, coded=not numeric)
+        if not numeric and col.dtype != np.int32:
+            values = col[:t.size].tolist()
+            col = t.add_field(key, coded=True)
+            for i, v in enumerate(values):
+                if v == v:
+                    col[i] = self.intern(key, v)
+        return col
+
+    def record(self, measurement, tags, fields, time=None):
+        if time is None:
+            time = self.now()
+        t = self.table(measurement)
+        i = t.next_row()
+        for k, v in tags.items():
+            col = t.tag_columns.get(k)
+            if col is None:
+                col = t.add_tag(k)
+            col[i] = self.intern(k, v)
+        col = t.field_columns.get('time')
+        if col is None:
+            col = t.add_field('time')
+        col[i] = time
+        for k, v in fields.items():
+            if v is None:
+                continue
+            col = self.field_column(t, k, isinstance(v, _NUMBER))
+            col[i] = self.intern(k, v) if col.dtype == np.int32 else v
+
+    def record_batch(self, records, time=None):
+        # one block of rows per measurement, every column is assigned once
+        if time is None:
+            time = self.now()
+        groups = {}
+        for record in records:
+            group = groups.get(record[0])
+            if group is None:
+                group = groups[record[0]] = []
+            group.append(record)
+        tag_codes = {}  # id of a tags dict (shared by the records of a sampled source) -> interned items
+        for measurement, group in groups.items():
+            t = self.table(measurement)
+            n = len(group)
+            tags, fields = {}, {}
+            for j, (_, record_tags, record_fields) in enumerate(group):
+                codes = tag_codes.get(id(record_tags))
+                if codes is None:
+                    codes = tag_codes[id(record_tags)] = [(k, self.intern(k, v)) for k, v in record_tags.items()]
+                for k, code in codes:
+                    col = tags.get(k)
+                    if col is None:
+                        col = tags[k] = [-1] * n
+                    col[j] = code
+                for k, v in record_fields.items():
+                    col = fields.get(k)
+                    if col is None:
+                        col = fields[k] = [None] * n
+                    col[j] = v
+            rows = t.next_rows(n)
+            for k, codes in tags.items():
+                col = t.tag_columns.get(k)
+                if col is None:
+                    col = t.add_tag(k)
+                col[rows] = codes
+            col = t.field_columns.get('time')
+            if col is None:
+                col = t.add_field('time')
+            col[rows] = time
+            for k, values in fields.items():
+                numeric = all(v is None or isinstance(v, _NUMBER) for v in values)
+                col = self.field_column(t, k, numeric)
+                if col.dtype == np.int32:
+                    col[rows] = [-1 if v is None else self.intern(k, v) for v in values]
+                else:
+                    col[rows] = np.array(values, dtype=np.float64)  # None is NaN
+
+    def measurements(self):
+        return list(self.tables.keys())
+
+    def category_array(self, key):
+        return np.array([str(x) for x in self.categories.get(key, [])], dtype=str)
+
+    def arrays(self, measurement=REQUESTS):
+        # views over the recorded rows, tags and non-numeric fields are int32 codes into `category_array(key)`
+        t = self.tables[measurement]
+        return {**t.tags(), **t.fields()}
+
+    def to_pandas(self, measurement=REQUESTS):
+        import pandas as pd
+
+        t = self.tables[measurement]
+        columns = {**t.tags(), **t.fields()}
+        for k in t.coded_columns():
+            columns[k] = pd.Categorical.from_codes(columns[k], categories=self.category_array(k))
+        return pd.DataFrame(columns, copy=False)
+
+    def write_npz(self, measurement, file_path):
+        t = self.tables[measurement]
+        arrays = {**t.tags(), **t.fields()}
+        arrays.update({f'categories/{k}': self.category_array(k) for k in t.coded_columns()})
+        np.savez(file_path, **arrays)
+
+    def write_parquet(self, measurement, file_path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        t = self.tables[measurement]
+        coded = t.coded_columns()
+        columns = {k: pa.DictionaryArray.from_arrays(pa.array(v, mask=v < 0), pa.array(self.category_array(k)))
+                   if k in coded else pa.array(v) for k, v in {**t.tags(), **t.fields()}.items()}
+        pq.write_table(pa.table(columns), file_path)
+
+    def write_csv(self, measurement, file_path):
+        t = self.tables[measurement]
+        arrays = {**t.tags(), **t.fields()}
+        coded = t.coded_columns()
+        columns = []
+        for k, v in arrays.items():
+            if k in coded:
+                categories = self.categories.get(k, [])
+                columns.append(['' if x < 0 else categories[x] for x in v.tolist()])
+            else:
+                columns.append(['' if x != x else x for x in v.tolist()])
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(list(arrays.keys()))
+            writer.writerows(zip(*columns))
+
+    def flush(self):
+        if self.path is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        write = getattr(self, f'write_{self.format}')
+        for measurement, t in self.tables.items():
+            if self._written.get(measurement) == t.size:
+                continue
+            write(measurement, os.path.join(self.path, f'{measurement}.{self.format}'))
+            self._written[measurement] = t.size
+
+    def close(self):
+        self.flush()
@@ -10,6 +10,11 @@ class DataCollectorBase(Base):
     def record(self, measurement, tags, fields, time=None):
         raise NotImplementedError()
 
+    def record_batch(self, records, time=None):
+        # records are (measurement, tags, fields) tuples sharing the same time
+        for measurement, tags, fields in records:
+            self.record(measurement, tags, fields, time)
+
     def flush(self):
         raise NotImplementedError()
 
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import math
+from copy import copy
+from dataclasses import dataclass
+from typing import List
+
+from . import DataCollectorBase
+from ...core import *
+from ...utils import default_if_none, shallow_asdict, remove_m
+
+
+@dataclass
+class HistogramDataCollectorConfig(Config):
+    window: float | str = None
+    tags: List[str] = None
+    relative_error: float = None
+    min_value: float | str = None
+    path: str = None
+    name: str = None
+
+    def generator(self):
+        return lambda ctx: HistogramDataCollector(ctx, **shallow_asdict(self))
+
+    @classmethod
+    def from_json(cls, j, builder):
+        j = copy(j)
+        j['window'] = remove_m(j.get('window'))
+        j['min_value'] = remove_m(j.get('min_value'))
+        return cls(**j)
+
+
+class LogHistogram:
+    # log-bucketed histogram: bucket i > 0 covers (min_value * gamma^(i-1), min_value * gamma^i], bucket 0 everything
+    # up to min_value. Values are reported with a relative error of at most `relative_error`.
+    def __init__(self, relative_error=0.01, min_value=1e-6):
+        self.relative_error = relative_error
+        self.min_value = min_value
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self._inv_log_gamma = 1 / math.log(self.gamma)
+        self.buckets = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def bucket(self, value):
+        if value <= self.min_value:
+            return 0
+        return math.ceil(math.log(value / self.min_value) * self._inv_log_gamma)
+
+    def bucket_value(self, i):
+        if i == 0:
+            return self.min_value
+        return self.min_value * self.gamma ** i * 2 / (1 + self.gamma)
+
+    def record(self, value, count=1):
+        i = self.bucket(value)
+        self.buckets[i] = self.buckets.get(i, 0) + count
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: LogHistogram):
+        if other.gamma != self.gamma or other.min_value != self.min_value:
+            raise ValueError('Histograms with different bucketing cannot be merged.')
+        for i, c in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def percentiles(self, qs):
+        if self.count == 0:
+            return {q: None for q in qs}
+        result = {}
+        items = sorted(self.buckets.items())
+        for q in qs:
+            rank = max(1, math.ceil(q / 100 * self.count))
+            seen = 0
+            for i, c in items:
+                seen += c
+                if seen >= rank:
+                    result[q] = min(max(self.bucket_value(i), self.min), self.max)
+                    break
+        return result
+
+    def percentile(self, q):
+        return self.percentiles([q])[q]
+
+    def to_json(self):
+        return {
+            'relative_error': self.relative_error, 'min_value': self.min_value,
+            'buckets': [[i, c] for i, c in sorted(self.buckets.items())],
+            'count': self.count, 'sum': self.sum,
+            'min': self.min if self.count else None, 'max': self.max if self.count else None,
+        }
+
+    @staticmethod
+    def from_json(j):
+        h = LogHistogram(j['relative_error'], j['min_value'])
+        h.buckets = {i: c for i, c in j['buckets']}
+        h.count = j['count']
+        h.sum = j['sum']
+        h.min = math.inf if j['min'] is None else j['min']
+        h.max = -math.inf if j['max'] is None else j['max']
+        return h
+
+
+class HistogramDataCollector(DataCollectorBase):
+    REQUEST_TAGS = ['host_name', 'instance_name', 'endpoint_name', 'status']
+
+    def __init__(self, context: Context, window=None, tags=None, relative_error=None, min_value=None, path=None,
+                 name=None):
+        super().__init__(context, name)
+        self.window = default_if_none(window, 10)
+        self.tags = list(default_if_none(tags, ['host_name', 'endpoint_name', 'status']))
+        self.relative_error = default_if_none(relative_error, 0.01)
+        self.min_value = default_if_none(min_value, 1e-6)
+        self.path = path  # json file to write the histograms to, can be none
+        self.histograms = {}  # (measurement, window index, tag values) -> LogHistogram
+        self.counts = {}  # (window index, tag values) -> number of ended requests
+        self._request_tag_getters = [self._request_tag_getter(k) for k in self.tags]
+
+    @staticmethod
+    def _request_tag_getter(key):
+        if key not in HistogramDataCollector.REQUEST_TAGS:
+            raise ValueError(f'Unknown request tag {key}.')
+        if key == 'status':
+            return lambda rc: 'TIMEOUT' if rc.is_timeout else rc.status
+        return lambda rc: getattr(rc, key)
+
+    def _histogram(self, key):
+        h = self.histograms.get(key)
+        if h is None:
+            h = self.histograms[key] = LogHistogram(self.relative_error, self.min_value)
+        return h
+
+    def record_ended_request(self, rc: RequestContext):
+        if not rc.mark or rc.req_sent is None:
+            return
+        w = int(rc.req_sent // self.window)
+        tags = tuple(get(rc) for get in self._request_tag_getters)
+        self.counts[(w, tags)] = self.counts.get((w, tags), 0) + 1
+        if rc.req_arrived is not None and rc.proc_started is not None:
+            self._histogram(('queue_time', w, tags)).record(rc.proc_started - rc.req_arrived)
+        if rc.proc_started is not None and rc.proc_completed is not None:
+            self._histogram(('computation_time', w, tags)).record(rc.proc_completed - rc.proc_started)
+        if rc.resp_arrived is not None:
+            self._histogram(('response_time', w, tags)).record(rc.resp_arrived - rc.req_sent)
+
+    def record(self, measurement, tags, fields, time=None):
+        value = fields.get('value')
+        if value is None:
+            return
+        if time is None:
+            time = self.now()
+        key = (measurement, int(time // self.window), tuple(tags.get(k) for k in self.tags))
+        self._histogram(key).record(value)
+
+    def record_batch(self, records, time=None):
+        # the window is found once per batch, and the tag values once per tags dict (shared by a sampled source)
+        if time is None:
+            time = self.now()
+        w = int(time // self.window)
+        tag_values = {}
+        for measurement, tags, fields in records:
+            value = fields.get('value')
+            if value is None:
+                continue
+            values = tag_values.get(id(tags))
+            if values is None:
+                values = tag_values[id(tags)] = tuple(tags.get(k) for k in self.tags)
+            self._histogram((measurement, w, values)).record(value)
+
+    def _matches(self, w, tag_values, start, end, tags):
+        if start is not None and w < int(start // self.window):
+            return False
+        if end is not None and w >= math.ceil(end / self.window):
+            return False
+        for k, v in tags.items():
+            if tag_values[self.tags.index(k)] != v:
+                return False
+        return True
+
+    def histogram(self, measurement='response_time', start=None, end=None, **tags) -> LogHistogram:
+        # merged histogram over the windows overlapping [start, end) whose tags match the given ones
+        result = LogHistogram(self.relative_error, self.min_value)
+        for (m, w, tag_values), h in self.histograms.items():
+            if m == measurement and self._matches(w, tag_values, start, end, tags):
+                result.merge(h)
+        return result
+
+    def percentiles(self, measurement='response_time', qs=(50, 95, 99, 99.9), start=None, end=None, **tags):
+        return self.histogram(measurement, start, end, **tags).percentiles(qs)
+
+    def count(self, start=None, end=None, **tags):
+        return sum(c for (w, tag_values), c in self.counts.items() if self._matches(w, tag_values, start, end, tags))
+
+    def windows(self):
+        return sorted({w for (_, w, _) in self.histograms} | {w for (w, _) in self.counts})
+
+    def to_json(self):
+        return {
+            'window': self.window,
+            'tags': self.tags,
+            'histograms': [[m, w, list(t), h.to_json()] for (m, w, t), h in self.histograms.items()],
+            'counts': [[w, list(t), c] for (w, t), c in self.counts.items()],
+        }
+
+    def merge(self, other: HistogramDataCollector | dict):
+        # folds in the histograms of another run (a collector or its `to_json()`) with the same window and tags
+        j = other if isinstance(other, dict) else other.to_json()
+        if j['window'] != self.window or j['tags'] != self.tags:
+            raise ValueError('Collectors with different windows or tags cannot be merged.')
+        for m, w, t, h in j['histograms']:
+            self._histogram((m, w, tuple(t))).merge(LogHistogram.from_json(h))
+        for w, t, c in j['counts']:
+            self.counts[(w, tuple(t))] = self.counts.get((w, tuple(t)), 0) + c
+        return self
+
+    def flush(self):
+        if self.path is None:
+            return
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f)
+
+    def close(self):
+        self.flush()
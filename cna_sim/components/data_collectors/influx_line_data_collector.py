@@ -0,0 +1,232 @@
+import datetime
+import gzip
+import http.client
+import logging
+import math
+import queue
+import threading
+import time as _time
+from dataclasses import dataclass
+from urllib.parse import urlsplit, urlencode
+
+from .default_data_collector import DefaultDataCollector
+from ...core import *
+from ...utils import to_timestamp_ns, not_none, default_if_none, shallow_asdict
+
+
+@dataclass
+class InfluxLineDataCollectorConfig(Config):
+    url: str
+    token: str
+    org: str
+    bucket: str
+    time_offset: datetime.datetime
+    batch_size: int = None
+    queue_size: int = None
+    gzip: bool = None
+    timeout: float = None
+    name: str = None
+
+    def generator(self):
+        return lambda ctx: InfluxLineDataCollector(ctx, **shallow_asdict(self))
+
+
+_MEASUREMENT_ESCAPE = str.maketrans({',': '\\,', ' ': '\\ ', '\n': '\\n'})
+_TAG_ESCAPE = str.maketrans({',': '\\,', '=': '\\=', ' ': '\\ ', '\n': '\\n'})
+_STRING_ESCAPE = str.maketrans({'"': '\\"', '\\': '\\\\'})
+
+
+def encode_field(value):
+    t = type(value)
+    if t is float:
+        return None if math.isnan(value) or math.isinf(value) else repr(value)
+    if t is bool:
+        return 'true' if value else 'false'
+    if t is int:
+        return f'{value}i'
+    if t is str:
+        return f'"{value.translate(_STRING_ESCAPE)}"'
+    if value is None:
+        return None
+    return encode_field(float(value))
+
+
+class LineProtocolWriter:
+    # posts line protocol batches to `/api/v2/write` from a background thread; `submit` blocks when `queue_size`
+    # batches are pending, which is counted in `stats`
+    def __init__(self, url, token, org, bucket, precision='ns', gzip=False, queue_size=8, timeout=10):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.path = parts.path.rstrip('/') + '/api/v2/write?' + urlencode(
+            {'org': org, 'bucket': bucket, 'precision': precision})
+        self.headers = {'Authorization': f'Token {token}', 'Content-Type': 'text/plain; charset=utf-8'}
+        if gzip:
+            self.headers['Content-Encoding'] = 'gzip'
+        self.gzip = gzip
+        self.timeout = timeout
+        self.stats = {
+            'submitted_points': 0, 'submitted_batches': 0, 'blocked_submits': 0, 'blocked_time': 0.0,
+            'written_points': 0, 'written_batches': 0, 'written_bytes': 0, 'write_time': 0.0, 'write_errors': 0,
+        }
+        self._connection = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name='influx-line-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, body: bytes, points: int):
+        self.stats['submitted_points'] += points
+        self.stats['submitted_batches'] += 1
+        try:
+            self._queue.put_nowait((body, points))
+        except queue.Full:
+            start = _time.perf_counter()
+            self._queue.put((body, points))
+            self.stats['blocked_submits'] += 1
+            self.stats['blocked_time'] += _time.perf_counter() - start
+
+    def _connect(self):
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def _post(self, body, points):
+        start = _time.perf_counter()
+        if self.gzip:
+            body = gzip.compress(body, compresslevel=1)
+        try:
+            if self._connection is None:
+                self._connection = self._connect()
+            self._connection.request('POST', self.path, body=body, headers=self.headers)
+            resp = self._connection.getresponse()
+            data = resp.read()
+            if resp.status >= 300:
+                raise http.client.HTTPException(f'{resp.status} {data[:200]}')
+            self.stats['written_points'] += points
+            self.stats['written_batches'] += 1
+            self.stats['written_bytes'] += len(body)
+        except (OSError, http.client.HTTPException) as e:
+            self.stats['write_errors'] += 1
+            logging.warning(f'Failed to write {points} points to InfluxDB: {e}')
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+        self.stats['write_time'] += _time.perf_counter() - start
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._post(*item)
+            except Exception as e:
+                # the thread must keep consuming, otherwise `submit` blocks forever once the queue is full
+                self.stats['write_errors'] += 1
+                logging.exception(f'Failed to write {item[1]} points to InfluxDB: {e}')
+                if self._connection is not None:
+                    self._connection.close()
+                    self._connection = None
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class InfluxLineDataCollector(DefaultDataCollector):
+    def __init__(self, context: Context, url, token, org, bucket, time_offset, batch_size=None, queue_size=None,
+                 gzip=None, timeout=None, name=None):
+        super().__init__(context, name)
+        self.time_offset = to_timestamp_ns(not_none(time_offset))  # in ns
+        self.batch_size = default_if_none(batch_size, 5000)
+        self.writer = LineProtocolWriter(not_none(url), not_none(token), not_none(org), not_none(bucket),
+                                         gzip=default_if_none(gzip, False),
+                                         queue_size=default_if_none(queue_size, 8),
+                                         timeout=default_if_none(timeout, 10))
+        self._buffer = bytearray()
+        self._points = 0
+        self._prefixes = {}  # (measurement, tags) -> encoded `measurement,tag=value,...`
+
+    def transform_time(self, t):
+        return t
+
+    def prefix(self, measurement, tags):
+        key = (measurement, *tags.items())
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            if len(self._prefixes) >= 100_000:
+                self._prefixes.clear()
+            parts = [measurement.translate(_MEASUREMENT_ESCAPE)]
+            for k, v in sorted(tags.items()):
+                if v is None or v == '':
+                    continue
+                parts.append(f'{str(k).translate(_TAG_ESCAPE)}={str(v).translate(_TAG_ESCAPE)}')
+            prefix = self._prefixes[key] = ','.join(parts)
+        return prefix
+
+    @staticmethod
+    def encode_fields(fields):
+        encoded = []
+        for k, v in fields.items():
+            v = encode_field(v)
+            if v is not None:
+                encoded.append(f'{str(k).translate(_TAG_ESCAPE)}={v}')
+        return ','.join(encoded)
+
+    def record(self, measurement, tags, fields, time=None):
+        if time is None:
+            time = self.now()
+        time = self.transform_time(time)
+
+        encoded = self.encode_fields(fields)
+        if not encoded:
+            return
+        line = f'{self.prefix(measurement, tags)} {encoded} {self.time_offset + int(time * 1e9)}\n'
+        self._buffer += line.encode('utf-8')
+        self._points += 1
+        if self._points >= self.batch_size:
+            self._submit()
+
+    def record_batch(self, records, time=None):
+        # the timestamp is encoded once, and the lines of the batch appended to the buffer at once
+        if time is None:
+            time = self.now()
+        timestamp = self.time_offset + int(self.transform_time(time) * 1e9)
+        lines = []
+        for measurement, tags, fields in records:
+            encoded = self.encode_fields(fields)
+            if encoded:
+                lines.append(f'{self.prefix(measurement, tags)} {encoded} {timestamp}\n')
+        if not lines:
+            return
+        self._buffer += ''.join(lines).encode('utf-8')
+        self._points += len(lines)
+        if self._points >= self.batch_size:
+            self._submit()
+
+    def _submit(self):
+        if self._points == 0:
+            return
+        self.writer.submit(bytes(self._buffer), self._points)
+        del self._buffer[:]
+        self._points = 0
+
+    def stats(self):
+        return dict(self.writer.stats)
+
+    def flush(self):
+        self._submit()
+        self.writer.flush()
+
+    def close(self):
+        self.flush()
+        self.writer.close()
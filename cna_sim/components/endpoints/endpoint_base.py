@@ -3,6 +3,8 @@ from ...core import *
 
 class EndPointBase(Base):
     def __init__(self, context: Context, instance: InstanceBase, name=None):
+        if name is None:
+            name = context.child_name(instance, type(self).__name__)
         super().__init__(context, name, in_context=True)
         self.instance = instance
 
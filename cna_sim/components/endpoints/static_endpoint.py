@@ -36,6 +36,8 @@ class StaticEndPointConfig(Config):
                 "dis": "lognormal"
             }
         }, ...]
+        `dis` can be one of lognormal, normal, exponential, gamma, constant and empirical (with `file` or `samples`).
+        Samples are drawn in blocks of `block_size` (1024 by default); set `block_size: 1` to draw one at a time.
         """
         return cls(endpoints=[(x['endpoint_name'], x['dependencies'], Distribution.from_json(x['computation_time'])) for x in j])
 
@@ -6,8 +6,15 @@ from ...utils import Distribution
 class InstanceBase(Agent):
     def __init__(self, context: Context, name=None, service_name=None, network_group='default'):
         self.service_name = service_name
+        self.status = None
+        self.status_listeners = []  # called with (instance, previous, status) on every status transition
         super().__init__(context, name, network_group)
 
+    def set_status(self, status):
+        previous, self.status = self.status, status
+        for listener in self.status_listeners:
+            listener(self, previous, status)
+
     def compute(self, cpu_time: Distribution):
         raise NotImplementedError()
 
@@ -17,6 +24,9 @@ class InstanceBase(Agent):
     def terminate(self):
         pass
 
+    def summary(self):
+        return {}
+
 
 
 
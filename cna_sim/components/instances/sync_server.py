@@ -1,24 +1,98 @@
+from bisect import bisect_right
 from dataclasses import dataclass
 from copy import copy
-import simpy
 from ...core import *
 from .instance_base import InstanceBase
 from ...utils import remove_m, inject_context, not_none, default_if_none, shallow_asdict
 
 
 class ThreadPool(Base):
-    def __init__(self, context: Context, threads: int):
-        super().__init__(context)
-        self.threads = simpy.Container(context.env, threads, threads)
+    # CPU usage is the time-weighted integral of min(active_threads, cpu_quota), updated only when a computation
+    # starts or ends. Cumulative values at every `resolution` boundary of the last `horizon` seconds are kept in a
+    # ring buffer, so usage over a window needs no polling and costs no events while idle. The level changes since the
+    # last boundary are kept too: the integral is exact at any time since then and at every boundary, and interpolated
+    # linearly between two older boundaries.
+    def __init__(self, context: Context, threads: int, cpu_quota: float = None, resolution=0.1, horizon=60, name=None):
+        super().__init__(context, name)
+        self.threads = context.container(threads, threads)
         self.active_threads = 0
-        self.active_threads_track = []
-        self.run(self.monitoring())
+        self.cpu_quota = cpu_quota  # can be none
+        self.resolution = resolution
+        self.created_at = self.now()
+        self._size = max(2, int(round(horizon / resolution)))
+        self._boundaries = [0.0] * self._size  # cumulative integral at boundary k * resolution, slot k % size
+        self._next_boundary = int(-(-self.created_at // resolution))
+        self._last_change = self.created_at
+        self._integral = 0.0  # cumulative integral until _last_change
+        self._level = 0
+        # times, cumulative integrals and levels from the last boundary (or creation) on, one entry per change
+        self._change_times, self._change_values, self._change_levels = [self.created_at], [0.0], [0]
+
+    def _advance(self):
+        now = self.now()
+        res = self.resolution
+        k = self._next_boundary
+        if k * res <= now:
+            last_k = int(now // res)
+            k = max(k, last_k - self._size + 1)
+            integral, level, last = self._integral, self._level, self._last_change
+            for i in range(k, last_k + 1):
+                self._boundaries[i % self._size] = integral + level * (i * res - last)
+            self._next_boundary = last_k + 1
+            self._change_times = [last_k * res]
+            self._change_values = [self._boundaries[last_k % self._size]]
+            self._change_levels = [level]
+        self._integral += self._level * (now - self._last_change)
+        self._last_change = now
+
+    def _set_active(self, active_threads):
+        self._advance()
+        self.active_threads = active_threads
+        self._level = active_threads if self.cpu_quota is None else min(active_threads, self.cpu_quota)
+        if self._change_times[-1] == self._last_change:
+            self._change_values[-1], self._change_levels[-1] = self._integral, self._level
+        else:
+            self._change_times.append(self._last_change)
+            self._change_values.append(self._integral)
+            self._change_levels.append(self._level)
+
+    def compute_started(self):
+        self._set_active(self.active_threads + 1)
+
+    def compute_ended(self):
+        self._set_active(self.active_threads - 1)
+
+    def integral(self, t):
+        # integral of the CPU usage from the creation of the pool to t, within the horizon
+        self._advance()
+        if t >= self._last_change:
+            return self._integral + self._level * (t - self._last_change)
+        if t >= self._change_times[0]:
+            i = bisect_right(self._change_times, t) - 1
+            return self._change_values[i] + self._change_levels[i] * (t - self._change_times[i])
+        res = self.resolution
+        t = max(t, self.created_at, (self._next_boundary - self._size) * res)
+        k = int(t // res)
+        if k * res < self.created_at:
+            t0, v0 = self.created_at, 0.0
+        else:
+            t0, v0 = k * res, self._boundaries[k % self._size]
+        if k + 1 < self._next_boundary:
+            t1, v1 = (k + 1) * res, self._boundaries[(k + 1) % self._size]
+        else:
+            t1, v1 = self._change_times[0], self._change_values[0]
+        if t1 <= t0:
+            return v0
+        return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+
+    def usage(self, window=1.0):
+        # exact average CPU usage since the last boundary at least `window` seconds ago (or since creation)
+        now = self.now()
+        start = max((now - window) // self.resolution * self.resolution, self.created_at)
+        if now <= start:
+            return 0.0
+        return (self.integral(now) - self.integral(start)) / (now - start)
 
-    def monitoring(self):
-        while True:
-            yield self.timeout(0.1)
-            self.active_threads_track.append(self.active_threads)
-            self.active_threads_track = self.active_threads_track[-20:]
 
 @dataclass
 class SyncServerConfig(Config):
@@ -41,6 +115,8 @@ class SyncServerConfig(Config):
             d['endpoint_gen'] = endpoint_config.generator()
             if svc is not None and d.get('service_name') is None:
                 d['service_name'] = svc.name
+            if svc is not None and d.get('name') is None:
+                d['name'] = ctx.child_name(svc, 'instance')
             return SyncServer(ctx, **d)
         return sync_server_gen
 
@@ -57,22 +133,27 @@ class SyncServer(InstanceBase):
                  start_up_delay=None, warming_up_time=None, warming_up_factor_init=None, shut_down_delay=None):
         super().__init__(context, name, service_name, network_group)
         self.endpoints = inject_context(not_none(endpoint_gen), self.context, self)
-        self.queue = simpy.Store(context.env)
+        self.queue = context.store()
         self.cpu_quota = default_if_none(cpu_quota, 1)
         self.queue_size = queue_size # can be none
         self.start_up_delay = default_if_none(start_up_delay, 0)
         self.warming_up_time = default_if_none(warming_up_time, 0)
         self.warming_up_factor_init = default_if_none(warming_up_factor_init, 2)
         self.shut_down_delay = default_if_none(shut_down_delay, 60)
-        self.threads = ThreadPool(context, default_if_none(threads, 32))
+        self.threads = ThreadPool(context, default_if_none(threads, 32), self.cpu_quota,
+                                  name=context.child_name(self, 'ThreadPool'))
 
         self.client = Client(context, owner=self)
         self.start_time = self.now()
+        self.terminated_at = None
         self.status = 'STARTING' # could be ['STARTING', 'ACTIVE', 'TERMINATING', 'TERMINATED']
         self.alive = self.context.env.event()
+        self._computing = {}  # `done` events of the running computations (in start order), failed on termination
         self.init(self.start_up_delay)
         self.run(self.process())
-        self.run(self.monitoring())
+        # service_name may be assigned after construction, so the tags are resolved on the first sample
+        self.context.sampler.register(self, ['cpu_usage', 'active_threads'],
+                                      lambda: {'host_name': self.service_name, 'instance_name': self.name})
 
     def recv_request(self, host, endpoint, request_context):
         if self.alive.triggered:
@@ -86,7 +167,10 @@ class SyncServer(InstanceBase):
 
     def process(self):
         while not self.alive.triggered:
-            host, name, request_promise = yield self.queue.get()
+            item = yield self.queue.get()
+            if item is None:  # put by `teardown`
+                return
+            host, name, request_promise = item
             yield self.threads.threads.get(1)
 
             def _(host, name, request_promise):
@@ -109,17 +193,29 @@ class SyncServer(InstanceBase):
 
     def compute(self, cpu_time):
         def _(cpu_time):
-            t = cpu_time.sample()
-            self.threads.active_threads += 1
+            if self.alive.triggered:
+                raise self.alive.value
+            t = cpu_time.sample(self.rng)
+            self.threads.compute_started()
+            # race with `alive` without a process or condition of its own: the timeout settles `done`, unless
+            # `terminate` fails it first
+            done = self.context.env.event()
+            self._computing[done] = None
             try:
                 t = t * max(1.0, self.threads.active_threads / self.cpu_quota) * self.warming_up_factor()
-                yield self.alive_race(self.timeout(t), self.alive)
-            except SimError as e:
-                raise e
+                self.context.env.timeout(t, done).callbacks.append(self._computed)
+                yield done
             finally:
-                self.threads.active_threads -= 1
+                self._computing.pop(done, None)
+                self.threads.compute_ended()
+
+        return self.context.env.process(_(cpu_time))
 
-        return self.run(_(cpu_time))
+    @staticmethod
+    def _computed(timeout):
+        done = timeout.value
+        if not done.triggered:
+            done.succeed()
 
     def send_request(self, host, endpoint, request, timeout=None):
         request_promise = self.client.send_request(host, endpoint, request, timeout)
@@ -127,33 +223,64 @@ class SyncServer(InstanceBase):
         return request_promise
 
     def init(self, delay=.0):
+        if delay <= 0:
+            # active as soon as it is created (it used to become active after a zero timeout, see
+            # docs/custom_components.md), services pick this up when they add the instance
+            self.set_status('ACTIVE')
+            return
+
         def _(delay=delay):
             yield self.timeout(delay)
             if self.status == 'STARTING':
-                self.status = 'ACTIVE'
+                self.set_status('ACTIVE')
         self.run(_())
 
     def terminate(self):
-        self.status = 'TERMINATING'
+        self.set_status('TERMINATING')
         def _():
             yield self.timeout(self.shut_down_delay)
             for host, name, request_context in self.queue.items:
                 request_context.fail(SimException('SERVER_DOWN'), True)
             self.queue.items.clear()
-            self.alive.succeed(SimError('THIS_DOWN'))
-            self.status = 'TERMINATED'
+            error = SimError('THIS_DOWN')
+            self.alive.succeed(error)
+            for done in list(self._computing):
+                # a computation that ends at this instant already succeeded
+                if not done.triggered:
+                    done.fail(error)
+            self.terminated_at = self.now()
+            self.set_status('TERMINATED')
+            self.teardown()
         self.run(_())
 
-    def cpu_usage(self):
-        threads_track = self.threads.active_threads_track[-10:]
-        if not threads_track:
-            return 0.0
-        cpu_track = [min(x, self.cpu_quota) for x in threads_track]
-        return float(sum(cpu_track) / len(cpu_track))
+    def teardown(self):
+        # wakes up the serving loop to let it exit, and releases the components owned by this instance
+        self.queue.put(None)
+        self.status_listeners.clear()
+        self.client.teardown()
+        self.endpoints.teardown()
+        self.threads.teardown()
+        super().teardown()
+
+    def summary(self):
+        # final metrics, recorded by the service when it archives terminated instances
+        end = default_if_none(self.terminated_at, self.now())
+        lifetime = end - self.start_time
+        cpu_seconds = self.threads.integral(end)  # cumulative since the pool was created
+        return {
+            'lifetime': lifetime,
+            'cpu_seconds': cpu_seconds,
+            'cpu_utilization': cpu_seconds / (lifetime * self.cpu_quota) if lifetime > 0 else 0.0,
+        }
+
+    def cpu_usage(self, window=1.0):
+        return self.threads.usage(window)
 
     def metric(self, name):
         if name == 'status':
             return self.status
+        if name == 'cpu_quota':
+            return self.cpu_quota
         if self.status in ['ACTIVE']:
             if name == 'cpu_usage':
                 return self.cpu_usage()
@@ -162,12 +289,3 @@ class SyncServer(InstanceBase):
             if name == 'active_threads':
                 return self.threads.active_threads
 
-    def monitoring(self):
-        while not self.alive.triggered:
-            tags = {
-                'host_name': self.service_name,
-                'instance_name': self.name
-            }
-            self.context.data_collector.record('cpu_usage', tags, {'value': self.metric('cpu_usage')})
-            self.context.data_collector.record('active_threads', tags, {'value': self.metric('active_threads')})
-            yield self.timeout(1)
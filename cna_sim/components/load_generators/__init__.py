@@ -1,3 +1,6 @@
-from .load_generator_base import LoadGeneratorBase
+from .load_generator_base import LoadGeneratorBase, arrival_distribution
 from .rps_load_generator import RPSLoadGenerator, RPSLoadGeneratorConfig
-from .dynamic_rps_load_generator import DynamicRPSLoadGenerator, DynamicRPSLoadGeneratorConfig
\ No newline at end of file
+from .dynamic_rps_load_generator import DynamicRPSLoadGenerator, DynamicRPSLoadGeneratorConfig, ScheduledLoadGenerator
+from .trace_replay_load_generator import TraceReplayLoadGenerator, TraceReplayLoadGeneratorConfig
+from .mixed_load_generator import MixedLoadGenerator, MixedLoadGeneratorConfig
+from .closed_loop_load_generator import ClosedLoopLoadGenerator, ClosedLoopLoadGeneratorConfig
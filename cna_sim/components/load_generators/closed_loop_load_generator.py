@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import heapq
+from copy import copy
+from dataclasses import dataclass
+
+import numpy as np
+
+from .load_generator_base import LoadGeneratorBase
+from ...core import *
+from ...utils import inject_context, remove_m, shallow_asdict, default_if_none, not_none, Distribution
+
+
+@dataclass
+class ClosedLoopLoadGeneratorConfig(Config):
+    users: int
+    host: str
+    endpoint: str
+    think_time: Distribution
+    request_config: Config = None
+    ramp_up: float | str = None
+    timeout: int | str = None
+    name: str = None
+    network_group: str = None
+    by_proxy: bool = None
+
+    def generator(self):
+        d = shallow_asdict(self)
+        request_config = d.pop('request_config', None)
+        d['request_gen'] = None if request_config is None else request_config.generator()
+        return lambda ctx, proxy=None: ClosedLoopLoadGenerator(ctx, proxy, **d)
+
+    @classmethod
+    def from_json(cls, j, builder):
+        """
+        `think_time` is a distribution like the computation time of a `StaticEndPoint`, or a constant in seconds.
+        """
+        j = copy(j)
+        think_time = j.get('think_time')
+        if isinstance(think_time, dict):
+            j['think_time'] = Distribution.from_json(think_time)
+        else:
+            j['think_time'] = Distribution(remove_m(not_none(think_time)), dis='constant')
+        j['request_config'] = builder.use_config(j.get('request_config'))
+        return cls(**j)
+
+
+class ClosedLoopLoadGenerator(LoadGeneratorBase):
+    # `users` virtual users that each send a request, wait for the response (or the error) and sleep a think time
+    # before the next one. Users are plain indices into numpy arrays, sleeping users wait in a shared timer heap
+    # that is served by a single timeout at a time, so no process is created per user.
+    def __init__(self, context: Context, proxy, users, host, endpoint, think_time, request_gen=None, ramp_up=None,
+                 timeout=None, name=None, network_group=None, by_proxy=None):
+        super().__init__(context, proxy, name=name, network_group=network_group)
+        self.client = Client(context, owner=self)
+        self.timeout_v = timeout  # can be none
+        self.users = int(not_none(users))
+        self.host = not_none(host)
+        self.endpoint = not_none(endpoint)
+        self.think_time = not_none(think_time)
+        self.request_gen = default_if_none(request_gen, MessageConfig().generator())
+        self.by_proxy = default_if_none(by_proxy, False)
+        self.start_time = self.now()
+
+        self.sent_at = np.full(self.users, np.nan)  # nan while thinking
+        self.requests = np.zeros(self.users, dtype=np.int64)
+        self.errors = np.zeros(self.users, dtype=np.int64)
+        self.response_time = np.zeros(self.users)  # sum over completed requests
+        self.thinking_time = np.zeros(self.users)  # sum over completed think times
+
+        # users start spread over `ramp_up`, or after a first think time
+        ramp_up = remove_m(ramp_up)
+        if ramp_up is None:
+            first = self.think_time.sample_array(self.users, self.rng)
+        else:
+            first = self.rng.random(self.users) * ramp_up
+        self._heap = [(self.start_time + t, i) for i, t in enumerate(first.tolist())]
+        heapq.heapify(self._heap)
+        self._timer = None
+        self._timer_at = None
+        self._arm()
+
+    def _arm(self):
+        if not self._heap:
+            return
+        at = self._heap[0][0]
+        if self._timer_at is not None and self._timer_at <= at:
+            return
+        # an armed timer firing later is left to expire, `_fire` ignores it
+        self._timer_at = at
+        self._timer = self.timeout(max(0.0, at - self.now()))
+        self._timer.callbacks.append(self._fire)
+
+    def _fire(self, timer):
+        if timer is not self._timer:
+            return
+        self._timer = self._timer_at = None
+        now = self.now()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, user = heapq.heappop(heap)
+            self.send(user)
+        self._arm()
+
+    def send(self, user):
+        self.sent_at[user] = self.now()
+        promise = self.client.send_request(self.host, self.endpoint, inject_context(self.request_gen, self.context),
+                                           timeout=self.timeout_v, proxy=self.proxy, by_proxy=self.by_proxy)
+        promise.on_settled(lambda p, user=user: self._done(user, p))
+
+    def _done(self, user, promise):
+        now = self.now()
+        self.response_time[user] += now - self.sent_at[user]
+        self.sent_at[user] = np.nan
+        self.requests[user] += 1
+        if promise.failed:
+            self.errors[user] += 1
+        think = self.think_time.sample(self.rng)
+        self.thinking_time[user] += think
+        heapq.heappush(self._heap, (now + think, user))
+        self._arm()
+
+    def user_stats(self):
+        # per user arrays over the completed requests
+        elapsed = self.now() - self.start_time
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                'requests': self.requests.copy(),
+                'errors': self.errors.copy(),
+                'throughput': self.requests / elapsed if elapsed > 0 else np.zeros(self.users),
+                'response_time_mean': self.response_time / self.requests,
+                'think_time_mean': self.thinking_time / self.requests,
+            }
+
+    def summary(self):
+        # totals for the interactive response time law N = X * (R + Z)
+        elapsed = self.now() - self.start_time
+        completed = int(self.requests.sum())
+        x = completed / elapsed if elapsed > 0 else None
+        r = float(self.response_time.sum() / completed) if completed else None
+        z = float(self.thinking_time.sum() / completed) if completed else None
+        return {
+            'users': self.users,
+            'completed': completed,
+            'errors': int(self.errors.sum()),
+            'in_flight': int((~np.isnan(self.sent_at)).sum()),
+            'throughput': x,
+            'response_time_mean': r,
+            'think_time_mean': z,
+            'users_by_law': None if x is None or r is None else x * (r + z),
+        }
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import bisect
+import csv
+import math
 from copy import copy
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from . import LoadGeneratorBase
 from ...core import *
 from typing import List, Tuple
@@ -12,13 +16,81 @@ from ...utils import inject_context, remove_m, shallow_asdict, default_if_none,
 
 
 def preprocess_rps_list(rps_list):
-    rps_list = [(remove_m(x[0]), x[1], 'linear' if len(x) <= 2 else x[2]) for x in rps_list]
+    rps_list = [(remove_m(x[0]), float(x[1]), 'linear' if len(x) <= 2 or not x[2] else x[2]) for x in rps_list]
     rps_list.sort(key=lambda x: x[0])
     if rps_list[0][0] != 0:
         rps_list.insert(0, (0, 0, 'linear'))
     return rps_list
 
 
+def load_rps_file(file):
+    # rows of `time,rps[,mode]`, a header row is skipped
+    rps_list = []
+    with open(file, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            row = [x.strip() for x in row]
+            if not row or not row[0] or row[0].startswith('#'):
+                continue
+            try:
+                rps_list.append((remove_m(row[0]), float(row[1]), *row[2:3]))
+            except ValueError:
+                if rps_list:
+                    raise
+    return rps_list
+
+
+class RateSchedule:
+    MODES = ['linear', 'step_start', 'step_end', 'accelerating', 'decelerating']
+
+    # rps_list compiled into segments (start, end, start_value, end_value, mode); a segment takes the mode of the
+    # point it ends at, the rate stays at the last value after the last point. Lookups are served by a cursor that
+    # moves forward with the time and falls back to a binary search.
+    def __init__(self, rps_list):
+        rps_list = preprocess_rps_list(rps_list)
+        segments = []
+        for (t0, v0, _), (t1, v1, mode) in zip(rps_list, rps_list[1:]):
+            if mode not in RateSchedule.MODES:
+                raise ValueError(f'Unknown mode {mode}.')
+            if t1 > t0:
+                segments.append((t0, t1, v0, v1, mode))
+        t, v, _ = rps_list[-1]
+        segments.append((t, math.inf, v, v, 'step_end'))
+        self.segments = tuple(segments)
+        self.starts = tuple(x[0] for x in segments)
+        self.max_rates = tuple(max(x[2], x[3]) for x in segments)
+        self.cursor = 0
+
+    def index(self, t):
+        i = self.cursor
+        start, end = self.segments[i][:2]
+        if t < start:
+            i = max(bisect.bisect_right(self.starts, t) - 1, 0)
+        else:
+            while t >= end:
+                i += 1
+                end = self.segments[i][1]
+        self.cursor = i
+        return i
+
+    @staticmethod
+    def evaluate(segment, t):
+        # works on floats and numpy arrays
+        start, end, v0, v1, mode = segment
+        if mode == 'step_start':
+            return v1 + 0 * t
+        if mode == 'step_end' or end == math.inf:
+            return v0 + 0 * t
+        x = (t - start) / (end - start)
+        if mode == 'accelerating':
+            x = x ** 2
+        elif mode == 'decelerating':
+            x = 1 - (1 - x) ** 2
+        return v0 + (v1 - v0) * x
+
+    def rate(self, t):
+        return RateSchedule.evaluate(self.segments[self.index(t)], t)
+
+
 @dataclass
 class DynamicRPSLoadGeneratorConfig(Config):
     rps_list: List[Tuple[float | str, float, str]]
@@ -29,6 +101,9 @@ class DynamicRPSLoadGeneratorConfig(Config):
     name: str = None
     network_group: str = None
     by_proxy: bool = None
+    rps_file: str = None
+    arrival: str = None
+    block_size: int = None
 
     def generator(self):
         d = shallow_asdict(self)
@@ -39,58 +114,100 @@ class DynamicRPSLoadGeneratorConfig(Config):
     @classmethod
     def from_json(cls, j, builder):
         j = copy(j)
+        j.setdefault('rps_list', None)
         j['request_config'] = builder.use_config(j.get('request_config'))
         return cls(**j)
 
 
-class DynamicRPSLoadGenerator(LoadGeneratorBase):
-    def __init__(self, context: Context, proxy, rps_list, host, endpoint, request_gen=None, timeout=None, name=None,
-                 network_group=None, by_proxy=None):
+class ScheduledLoadGenerator(LoadGeneratorBase):
+    ARRIVALS = ['deterministic', 'poisson']
+
+    # sends requests following a RateSchedule, subclasses decide what to send
+    def __init__(self, context: Context, proxy, rps_list=None, rps_file=None, arrival=None, block_size=None,
+                 timeout=None, name=None, network_group=None, by_proxy=None):
         super().__init__(context, proxy, name=name, network_group=network_group)
         self.client = Client(context, owner=self)
         self.timeout_v = timeout # can be none
-        self.rps_list = preprocess_rps_list(not_none(rps_list))
-        self.host = not_none(host)
-        self.endpoint = not_none(endpoint)
-        self.request_gen = default_if_none(request_gen, MessageConfig().generator())
+        if rps_list is None:
+            rps_list = load_rps_file(not_none(rps_file))
+        self.schedule = RateSchedule(not_none(rps_list))
         self.by_proxy = default_if_none(by_proxy, False)
-        self.run(self.process())
+        self.arrival = default_if_none(arrival, 'deterministic')
+        if self.arrival not in ScheduledLoadGenerator.ARRIVALS:
+            raise ValueError(f'Unknown arrival process {self.arrival}.')
+        self.block_size = default_if_none(block_size, 256)
+        self.run(self.process() if self.arrival == 'deterministic' else self.poisson_process())
+
+    def send(self):
+        raise NotImplementedError()
 
     def rps(self, t):
-        times = [x[0] for x in self.rps_list]
-        idx = bisect.bisect_left(times, t)
-
-        if idx == 0:
-            start_time, start_value, _ = self.rps_list[0]
-            end_time, end_value, mode = self.rps_list[1]
-        elif idx == len(self.rps_list):
-            start_time, start_value, _ = self.rps_list[-2]
-            end_time, end_value, mode = self.rps_list[-1]
-        else:
-            start_time, start_value, _ = self.rps_list[idx - 1]
-            end_time, end_value, mode = self.rps_list[idx]
-
-        if start_time <= t < end_time:
-            if mode == 'linear':
-                return start_value + (end_value - start_value) * (t - start_time) / (end_time - start_time)
-            elif mode == 'step_start':
-                return end_value
-            elif mode == 'step_end':
-                return start_value
-            elif mode == 'accelerating':
-                return start_value + (end_value - start_value) * ((t - start_time) / (end_time - start_time)) ** 2
-            elif mode == 'decelerating':
-                return start_value + (end_value - start_value) * (
-                        1 - (1 - (t - start_time) / (end_time - start_time)) ** 2)
-        return self.rps_list[-1][1]
+        return self.schedule.rate(t)
 
     def process(self):
+        # the gap is 1 / rps at its start; a gap crossing a segment end is carried over to the next segment as a
+        # fraction, so low rates and steps are followed
+        progress = 0.0  # fraction of the next gap that has elapsed
+        schedule = self.schedule
         while True:
-            if self.rps(self.now()) >= 1:
-                yield self.timeout(1 / self.rps(self.now()))
-                p = self.client.send_request(self.host, self.endpoint, inject_context(self.request_gen, self.context),
-                                             timeout=self.timeout_v,
-                                             proxy=self.proxy,
-                                             by_proxy=self.by_proxy)
+            t = self.now()
+            i = schedule.index(t)
+            r = schedule.evaluate(schedule.segments[i], t)
+            end = schedule.segments[i][1]
+            if r <= 0:
+                if end == math.inf:
+                    return
+                yield self.timeout(min(0.1, end - t))
+                continue
+            gap = (1 - progress) / r
+            if t + gap < end:
+                yield self.timeout(gap)
+                progress = 0.0
+                self.send()
             else:
-                yield self.timeout(0.1)
+                progress += (end - t) * r
+                yield self.timeout(end - t)
+
+    def arrival_times(self, t):
+        # non-homogeneous Poisson arrivals after t by thinning: candidates are drawn in blocks at the maximum rate of
+        # the segment and accepted with probability rps / maximum rate; exponential gaps are memoryless, so the
+        # candidates can restart at a segment end with the bound of the next segment
+        schedule, rng = self.schedule, self.rng
+        while True:
+            i = schedule.index(t)
+            segment, bound = schedule.segments[i], schedule.max_rates[i]
+            end = segment[1]
+            if bound <= 0:
+                if end == math.inf:
+                    return
+                t = end
+                continue
+            candidates = t + np.cumsum(rng.exponential(1 / bound, self.block_size))
+            if candidates[-1] < end:
+                t = float(candidates[-1])
+            else:
+                candidates = candidates[candidates < end]
+                t = end
+            accepted = candidates[rng.random(len(candidates)) * bound < schedule.evaluate(segment, candidates)]
+            yield from accepted.tolist()
+
+    def poisson_process(self):
+        for t in self.arrival_times(self.now()):
+            yield self.timeout(t - self.now())
+            self.send()
+
+
+class DynamicRPSLoadGenerator(ScheduledLoadGenerator):
+    def __init__(self, context: Context, proxy, rps_list, host, endpoint, request_gen=None, timeout=None, name=None,
+                 network_group=None, by_proxy=None, rps_file=None, arrival=None, block_size=None):
+        super().__init__(context, proxy, rps_list, rps_file, arrival, block_size, timeout, name, network_group,
+                         by_proxy)
+        self.host = not_none(host)
+        self.endpoint = not_none(endpoint)
+        self.request_gen = default_if_none(request_gen, MessageConfig().generator())
+
+    def send(self):
+        self.client.send_request(self.host, self.endpoint, inject_context(self.request_gen, self.context),
+                                 timeout=self.timeout_v,
+                                 proxy=self.proxy,
+                                 by_proxy=self.by_proxy)
@@ -1,4 +1,7 @@
+import re
+
 from ...core import *
+from ...utils import Distribution
 
 
 class LoadGeneratorBase(Agent):
@@ -7,3 +10,16 @@ class LoadGeneratorBase(Agent):
         if proxy is None:
             proxy = self.context.gateway
         self.proxy = proxy
+
+
+
+def arrival_distribution(arrival: str) -> Distribution:
+    # inter-arrival gaps with mean 1, to be divided by the rate: `deterministic`, `poisson` or `gamma(cv)`
+    if arrival == 'deterministic':
+        return Distribution(1, 0, 'constant')
+    if arrival == 'poisson':
+        return Distribution(1, 1, 'exponential')
+    m = re.fullmatch(r'\s*gamma\(\s*([0-9.eE+-]+)\s*\)\s*', arrival)
+    if m is not None:
+        return Distribution(1, float(m.group(1)), 'gamma')
+    raise ValueError(f'Unknown arrival process {arrival}.')
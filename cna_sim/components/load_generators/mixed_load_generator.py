@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from copy import copy
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from .dynamic_rps_load_generator import ScheduledLoadGenerator
+from ...core import *
+from ...utils import inject_context, shallow_asdict, default_if_none, not_none, AliasTable, SampleBuffer
+
+
+@dataclass
+class MixedLoadGeneratorConfig(Config):
+    entries: List[dict]
+    rps_list: List[Tuple[float | str, float, str]] = None
+    rps_file: str = None
+    arrival: str = None
+    block_size: int = None
+    timeout: int | str = None
+    name: str = None
+    network_group: str = None
+    by_proxy: bool = None
+
+    def generator(self):
+        d = shallow_asdict(self)
+        d['entries'] = []
+        for x in not_none(self.entries):
+            x = copy(x)
+            request_config = x.pop('request_config', None)
+            x['request_gen'] = None if request_config is None else request_config.generator()
+            d['entries'].append(x)
+        return lambda ctx, proxy=None: MixedLoadGenerator(ctx, proxy, **d)
+
+    @classmethod
+    def from_json(cls, j, builder):
+        j = copy(j)
+        j['entries'] = [{**x, 'request_config': builder.use_config(x.get('request_config'))} for x in j['entries']]
+        return cls(**j)
+
+
+class MixedLoadGenerator(ScheduledLoadGenerator):
+    # sends a weighted mix of `entries` (dicts of host, endpoint, weight and optionally request_config) following one
+    # rate schedule, from a single process and client; the entry of each request is drawn from an alias table
+    def __init__(self, context: Context, proxy, entries, rps_list=None, rps_file=None, arrival=None, block_size=None,
+                 timeout=None, name=None, network_group=None, by_proxy=None):
+        super().__init__(context, proxy, rps_list, rps_file, arrival, block_size, timeout, name, network_group,
+                         by_proxy)
+        default_request_gen = MessageConfig().generator()
+        self.entries = [(not_none(x['host']), not_none(x['endpoint']),
+                         default_if_none(x.get('request_gen'), default_request_gen)) for x in not_none(entries)]
+        self.weights = [float(default_if_none(x.get('weight'), 1)) for x in entries]
+        self.alias_table = AliasTable(self.weights)
+        self.choices = SampleBuffer(self.alias_table.sample_array, self.rng, self.block_size)
+
+    def send(self):
+        host, endpoint, request_gen = self.entries[self.choices.next()]
+        self.client.send_request(host, endpoint, inject_context(request_gen, self.context),
+                                 timeout=self.timeout_v,
+                                 proxy=self.proxy,
+                                 by_proxy=self.by_proxy)
@@ -2,8 +2,8 @@ from copy import copy
 from dataclasses import dataclass, field
 
 from ...core import *
-from .load_generator_base import LoadGeneratorBase
-from ...utils import inject_context, default_if_none, not_none, shallow_asdict
+from .load_generator_base import LoadGeneratorBase, arrival_distribution
+from ...utils import inject_context, default_if_none, not_none, shallow_asdict, remove_m
 
 
 @dataclass
@@ -16,6 +16,8 @@ class RPSLoadGeneratorConfig(Config):
     name: str = None
     network_group: str = None
     by_proxy: bool = None
+    arrival: str = None
+    tick: float | str = None
 
     def generator(self):
         d = shallow_asdict(self)
@@ -33,7 +35,7 @@ class RPSLoadGeneratorConfig(Config):
 
 class RPSLoadGenerator(LoadGeneratorBase):
     def __init__(self, context: Context, proxy, rps, host, endpoint, request_gen=None, timeout=None, name=None,
-                 network_group=None, by_proxy=None):
+                 network_group=None, by_proxy=None, arrival=None, tick=None):
         super().__init__(context, proxy, name, network_group)
         self.client = Client(context, owner=self)
         self.timeout_v = timeout  # can be none
@@ -42,14 +44,40 @@ class RPSLoadGenerator(LoadGeneratorBase):
         self.endpoint = not_none(endpoint)
         self.request_gen = default_if_none(request_gen, MessageConfig().generator())
         self.by_proxy = default_if_none(by_proxy, False)
-        self.run(self.process())
+        self.arrival = default_if_none(arrival, 'deterministic')
+        self.gaps = arrival_distribution(self.arrival)
+        self.tick = remove_m(tick)  # can be none
+        self.run(self.process() if self.tick is None else self.batch_process())
+
+    def send(self, _=None):
+        self.client.send_request(self.host, self.endpoint, inject_context(self.request_gen, self.context),
+                                 proxy=self.proxy, timeout=self.timeout_v,
+                                 by_proxy=self.by_proxy)
 
     def process(self):
         while True:
             if self.rps > 0:
-                yield self.timeout(1 / self.rps)
-                self.client.send_request(self.host, self.endpoint, inject_context(self.request_gen, self.context),
-                                         proxy=self.proxy, timeout=self.timeout_v,
-                                         by_proxy=self.by_proxy)
+                yield self.timeout(self.gaps.sample(self.rng) / self.rps)
+                self.send()
             else:
                 yield self.timeout(0.1)
+
+    def batch_process(self):
+        # wakes once per tick and schedules the arrivals of the tick at their exact times as plain timeouts, so the
+        # process is not resumed for every request. The arrival times are the same as without a tick, a change of
+        # `rps` takes effect from the next tick.
+        env = self.context.env
+        next_arrival = None
+        while True:
+            now = env.now
+            end = now + self.tick
+            if self.rps > 0:
+                rps, rng, sample, send = self.rps, self.rng, self.gaps.sample, self.send
+                if next_arrival is None:
+                    next_arrival = now + sample(rng) / rps
+                while next_arrival < end:
+                    env.timeout(next_arrival - now).callbacks.append(send)
+                    next_arrival += sample(rng) / rps
+            else:
+                next_arrival = None
+            yield env.timeout(self.tick)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import csv
+from copy import copy
+from dataclasses import dataclass
+from itertools import islice
+from typing import List
+
+import numpy as np
+
+from .load_generator_base import LoadGeneratorBase
+from ...core import *
+from ...utils import remove_m, shallow_asdict, default_if_none, not_none
+
+
+TRACE_COLUMNS = ['timestamp', 'host', 'endpoint', 'size']
+
+
+def _decode(values):
+    if values.dtype.kind == 'S':
+        return np.char.decode(values, 'utf-8')
+    return values
+
+
+def read_csv_header(file):
+    with open(file, newline='', encoding='utf-8') as f:
+        header = [x.strip() for x in next(csv.reader(f), [])]
+    missing = [x for x in TRACE_COLUMNS[:3] if x not in header]
+    if missing:
+        raise ValueError(f'Trace {file} has no column {", ".join(missing)}.')
+    return header
+
+
+def read_csv_chunks(file, chunk_size):
+    # rows of `timestamp,host,endpoint[,size]` with a header naming the columns, timestamps in seconds. A chunk is
+    # parsed at once, by pandas if it is installed and by `np.loadtxt` otherwise
+    header = read_csv_header(file)
+    try:
+        import pandas
+    except ImportError:
+        return _loadtxt_chunks(file, chunk_size, header)
+    return _pandas_chunks(pandas, file, chunk_size, header)
+
+
+def _pandas_chunks(pd, file, chunk_size, header):
+    columns = [x for x in TRACE_COLUMNS if x in header]
+    with pd.read_csv(file, header=0, names=header, usecols=columns, chunksize=chunk_size, encoding='utf-8',
+                     dtype={'timestamp': float, 'host': str, 'endpoint': str, 'size': float},
+                     keep_default_na=False, na_values={'size': ['']}) as reader:
+        for frame in reader:
+            yield (frame['timestamp'].to_numpy(dtype=float),
+                   frame['host'].to_numpy(dtype=object),
+                   frame['endpoint'].to_numpy(dtype=object),
+                   frame['size'].fillna(0).to_numpy(dtype=float).astype(int) if 'size' in columns else None)
+
+
+def _loadtxt_chunks(file, chunk_size, header):
+    t_i, h_i, e_i = [header.index(x) for x in TRACE_COLUMNS[:3]]
+    s_i = header.index('size') if 'size' in header else None
+    with open(file, newline='', encoding='utf-8') as f:
+        next(f)
+        while True:
+            lines = [line for line in islice(f, chunk_size) if line.strip()]
+            if not lines:
+                return
+            # object cells are the parsed strings, converting them column by column is faster than a str array
+            rows = np.loadtxt(lines, dtype=object, delimiter=',', comments=None, quotechar='"', ndmin=2)
+            sizes = None
+            if s_i is not None:
+                sizes = rows[:, s_i]
+                sizes[sizes == ''] = '0'  # empty sizes are 0
+                sizes = np.array(sizes, dtype=float).astype(int)
+            yield np.array(rows[:, t_i], dtype=float), rows[:, h_i], rows[:, e_i], sizes
+
+
+def read_npy_chunks(file, chunk_size):
+    # a structured array with fields `timestamp`, `host`, `endpoint` and optionally `size`, memory-mapped
+    trace = np.load(file, mmap_mode='r')
+    names = trace.dtype.names or ()
+    missing = [x for x in TRACE_COLUMNS[:3] if x not in names]
+    if missing:
+        raise ValueError(f'Trace {file} has no field {", ".join(missing)}.')
+    for start in range(0, len(trace), chunk_size):
+        chunk = trace[start:start + chunk_size]
+        yield (np.asarray(chunk['timestamp'], dtype=float),
+               _decode(np.asarray(chunk['host'])),
+               _decode(np.asarray(chunk['endpoint'])),
+               np.asarray(chunk['size'], dtype=int) if 'size' in names else None)
+
+
+def read_trace_chunks(file, chunk_size, format=None):
+    format = default_if_none(format, 'npy' if file.endswith('.npy') else 'csv')
+    if format == 'npy':
+        return read_npy_chunks(file, chunk_size)
+    if format == 'csv':
+        return read_csv_chunks(file, chunk_size)
+    raise ValueError(f'Unknown trace format {format}.')
+
+
+@dataclass
+class TraceReplayLoadGeneratorConfig(Config):
+    file: str
+    format: str = None
+    time_scale: float = None
+    offset: float | str = None
+    trace_start: float = None
+    hosts: List[str] = None
+    chunk_size: int = None
+    timeout: int | str = None
+    name: str = None
+    network_group: str = None
+    by_proxy: bool = None
+
+    def generator(self):
+        return lambda ctx, proxy=None: TraceReplayLoadGenerator(ctx, proxy, **shallow_asdict(self))
+
+    @classmethod
+    def from_json(cls, j, builder):
+        j = copy(j)
+        j['offset'] = remove_m(j.get('offset'))
+        return cls(**j)
+
+
+class TraceReplayLoadGenerator(LoadGeneratorBase):
+    # replays `(timestamp, host, endpoint, size)` rows: the row at `trace_start` (the first row by default) is sent at
+    # `offset`, the following ones `time_scale` times faster than recorded. The trace is read in chunks of
+    # `chunk_size` rows and must be sorted by timestamp; rows before `trace_start` or for hosts not in `hosts` are
+    # skipped.
+    def __init__(self, context: Context, proxy, file, format=None, time_scale=None, offset=None, trace_start=None,
+                 hosts=None, chunk_size=None, timeout=None, name=None, network_group=None, by_proxy=None):
+        super().__init__(context, proxy, name=name, network_group=network_group)
+        self.client = Client(context, owner=self)
+        self.timeout_v = timeout  # can be none
+        self.file = not_none(file)
+        self.format = format
+        self.time_scale = float(default_if_none(time_scale, 1))
+        self.offset = default_if_none(remove_m(offset), 0.0)
+        self.trace_start = trace_start
+        self.hosts = None if hosts is None else list(hosts)
+        self.chunk_size = default_if_none(chunk_size, 65536)
+        self.by_proxy = default_if_none(by_proxy, False)
+        self.run(self.process())
+
+    def arrivals(self):
+        # simulated send times, hosts, endpoints and sizes of the rows to replay, a chunk at a time
+        origin = self.trace_start
+        for timestamps, hosts, endpoints, sizes in read_trace_chunks(self.file, self.chunk_size, self.format):
+            if origin is None and len(timestamps):
+                origin = float(timestamps[0])
+            mask = timestamps >= origin
+            if self.hosts is not None:
+                mask &= np.isin(hosts, self.hosts)
+            if not mask.all():
+                timestamps, hosts, endpoints = timestamps[mask], hosts[mask], endpoints[mask]
+                sizes = None if sizes is None else sizes[mask]
+            if len(timestamps):
+                at = self.offset + (timestamps - origin) / self.time_scale
+                yield (at.tolist(), hosts.tolist(), endpoints.tolist(),
+                       [0] * len(timestamps) if sizes is None else sizes.tolist())
+
+    def process(self):
+        env = self.context.env
+        send_request, proxy, timeout, by_proxy = self.client.send_request, self.proxy, self.timeout_v, self.by_proxy
+        for at, hosts, endpoints, sizes in self.arrivals():
+            for t, host, endpoint, size in zip(at, hosts, endpoints, sizes):
+                if t > env.now:
+                    yield env.timeout(t - env.now)
+                send_request(host, endpoint, Message(size=size), timeout=timeout, proxy=proxy, by_proxy=by_proxy)
@@ -1,2 +1,3 @@
 from .network_base import NetworkBase
-from .default_network import DefaultNetwork, DefaultNetworkConfig
\ No newline at end of file
+from .default_network import DefaultNetwork, DefaultNetworkConfig
+from .latency_network import LatencyNetwork, LatencyNetworkConfig
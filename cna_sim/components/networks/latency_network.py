@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from copy import copy
+from dataclasses import dataclass
+
+from ...core import *
+from ...utils import Distribution, default_if_none, remove_m, shallow_asdict
+from .network_base import NetworkBase
+
+
+"""
+Network with a latency and a bandwidth per pair of network groups (`network_group` of the sender and the receiver):
+
+    kind: LatencyNetworkConfig
+    spec:
+      default_latency: 1m
+      latency:
+        zone-a: {zone-a: 200u, zone-b: {mean: 2m, std: 500u, dis: lognormal}}
+      bandwidth:
+        zone-a: {zone-b: 125000000}     # bytes per second
+      default_bandwidth: null           # unlimited
+
+A latency is a number of seconds (with an `m` or `u` suffix for milli- and microseconds) or a distribution. Pairs
+missing from `latency`/`bandwidth` use the reverse pair when `symmetric` (the default) and otherwise the defaults.
+Sending a message takes `size / bandwidth` on the link from the sender's group to the receiver's group, after the
+messages sent on that link before it (first in, first out), plus the latency. Messages that take no time are
+delivered without going through the scheduler.
+"""
+
+
+def _seconds(v):
+    if isinstance(v, str) and v.endswith('u'):
+        return float(v[:-1]) / 1e6
+    return remove_m(v)
+
+
+def _latency(v):
+    # seconds or a distribution of seconds, constant zero as None
+    if v is None or isinstance(v, Distribution):
+        return v
+    if isinstance(v, dict):
+        return Distribution.from_json({k: _seconds(x) if k in ('mean', 'std') else x for k, x in v.items()})
+    v = float(_seconds(v))
+    return v if v > 0 else None
+
+
+class Link:
+    __slots__ = ('latency', 'bandwidth', 'free_at')
+
+    def __init__(self, latency, bandwidth):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.free_at = 0.0  # when the messages queued on the link are sent
+
+
+@dataclass
+class LatencyNetworkConfig(Config):
+    latency: dict = None
+    bandwidth: dict = None
+    default_latency: float | str | dict = None
+    default_bandwidth: float = None
+    symmetric: bool = None
+    name: str = None
+
+    def generator(self):
+        return lambda ctx: LatencyNetwork(ctx, **shallow_asdict(self))
+
+    @classmethod
+    def from_json(cls, j, builder):
+        j = copy(j)
+        if j.get('latency') is not None:
+            j['latency'] = {a: {b: _latency(v) for b, v in row.items()} for a, row in j['latency'].items()}
+        j['default_latency'] = _latency(j.get('default_latency'))
+        return cls(**j)
+
+
+class LatencyNetwork(NetworkBase):
+    def __init__(self, context: Context, latency=None, bandwidth=None, default_latency=None, default_bandwidth=None,
+                 symmetric=None, name=None):
+        super().__init__(context, name=name)
+        self.latency = {(a, b): _latency(v) for a, row in default_if_none(latency, {}).items() for b, v in row.items()}
+        self.bandwidth = {(a, b): v for a, row in default_if_none(bandwidth, {}).items() for b, v in row.items()}
+        self.default_latency = _latency(default_latency)
+        self.default_bandwidth = default_bandwidth  # can be none, for unlimited
+        self.symmetric = default_if_none(symmetric, True)
+        self.links = {}  # (group sent, group received) -> Link, created on first use
+
+    def _lookup(self, table, a, b, default):
+        if (a, b) in table:
+            return table[a, b]
+        if self.symmetric and (b, a) in table:
+            return table[b, a]
+        return default
+
+    def link(self, group_sent, group_recv) -> Link:
+        link = self.links.get((group_sent, group_recv))
+        if link is None:
+            bandwidth = self._lookup(self.bandwidth, group_sent, group_recv, self.default_bandwidth)
+            if bandwidth is not None and bandwidth <= 0:
+                raise ValueError(f'Bandwidth from {group_sent} to {group_recv} must be positive.')
+            link = self.links[group_sent, group_recv] = Link(
+                self._lookup(self.latency, group_sent, group_recv, self.default_latency), bandwidth)
+        return link
+
+    def delay(self, message: Message, comp_sent: Agent, comp_recv: Agent):
+        link = self.link(comp_sent.network_group, comp_recv.network_group)
+        delay = 0.0
+        size = getattr(message, 'size', 0)
+        if link.bandwidth is not None and size:
+            # the link sends one message at a time, in the order they were handed to it
+            now = self.context.env.now
+            link.free_at = max(link.free_at, now) + size / link.bandwidth
+            delay = link.free_at - now
+        latency = link.latency
+        if latency is not None:
+            delay += latency if type(latency) is float else max(0.0, latency.sample(self.rng))
+        return delay
+
+    def transmit(self, message: Message, comp_sent: Agent, comp_recv: Agent):
+        delay = self.delay(message, comp_sent, comp_recv)
+        if delay <= 0:
+            return self.context.processed()
+        return self.context.env.timeout(delay)
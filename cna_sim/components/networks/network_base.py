@@ -6,6 +6,7 @@ class NetworkBase(Base):
         super().__init__(context, name, in_context=True)
 
     def transmit(self, message: Message, comp_sent: Agent, comp_recv: Agent):
+        # returns the event the sender waits on until the message is delivered, failed with a SimException if lost
         raise NotImplementedError()
 
 
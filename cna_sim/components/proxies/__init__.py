@@ -1,2 +1,6 @@
-from .gateway import Gateway, GatewayConfig
-from .random_load_balancer import RandomLoadBalancer, RandomLoadBalancerConfig
\ No newline at end of file
+from .gateway import Gateway, GatewayConfig, GatewayRoute
+from .random_load_balancer import RandomLoadBalancer, RandomLoadBalancerConfig
+from .round_robin_load_balancer import RoundRobinLoadBalancer, RoundRobinLoadBalancerConfig
+from .least_outstanding_load_balancer import LeastOutstandingLoadBalancer, LeastOutstandingLoadBalancerConfig
+from .power_of_two_load_balancer import PowerOfTwoLoadBalancer, PowerOfTwoLoadBalancerConfig
+from .weighted_load_balancer import WeightedLoadBalancer, WeightedLoadBalancerConfig
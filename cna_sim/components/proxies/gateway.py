@@ -1,15 +1,56 @@
+from bisect import bisect
 from copy import copy
 from dataclasses import dataclass, field
+from itertools import accumulate
 from typing import List
 
 from .proxy_base import ProxyBase
 from ...core import *
-from ...utils import default_if_none, shallow_asdict
+from ...utils import default_if_none, not_none, shallow_asdict
+
+
+"""
+The gateway resolves hosts to components through a routing table that is rebuilt when hosts or routes are registered
+or components are added or removed, instead of on every request. Routes send the requests of a host (optionally only
+those whose endpoint starts with `prefix`) to other hosts, picked by weight, e.g. for a canary release:
+
+    kind: GatewayConfig
+    spec:
+      components: [shop, shop_canary, shop_v2]
+      pass_through: true
+      routes:
+        - {host: shop, prefix: /v2, targets: {shop_v2: 1}}
+        - {host: shop, targets: {shop: 9, shop_canary: 1}}
+
+The longest matching prefix wins. With `pass_through`, requests sent to the gateway itself (`by_proxy`) are handed to
+the target with their own `RequestContext`, instead of being sent again by the client of the gateway. The request
+still crosses the network from the gateway to the target, but the response is sent from the gateway to the client
+only: the hop from the target back to the gateway is not simulated.
+"""
+
+
+class GatewayRoute:
+    def __init__(self, host, targets, prefix=None):
+        self.host = not_none(host)
+        if isinstance(targets, str):
+            targets = [targets]
+        if not isinstance(targets, dict):
+            targets = {x: 1 for x in not_none(targets)}
+        if not targets or any(w < 0 for w in targets.values()) or sum(targets.values()) <= 0:
+            raise ValueError(f'Route of {host} needs targets with positive weights.')
+        self.targets = dict(targets)
+        self.prefix = default_if_none(prefix, '')
+
+    @staticmethod
+    def from_json(j):
+        return GatewayRoute(**j)
 
 
 @dataclass
 class GatewayConfig(Config):
     components: List[str] = None
+    routes: List[dict] = None
+    pass_through: bool = None
     name: str = None
     network_group: str = None
 
@@ -18,19 +59,76 @@ class GatewayConfig(Config):
 
 
 class Gateway(ProxyBase):
-    def __init__(self, context, components=None, name=None, network_group=None):
+    def __init__(self, context, components=None, routes=None, pass_through=None, name=None, network_group=None):
         super().__init__(context, name=name, network_group=network_group)
         self.components = set(default_if_none(components, []))
+        self.routes = []
+        self.pass_through = default_if_none(pass_through, False)
         self.client = Client(context, owner=self)
+        self._table = None  # host -> component, or -> routes as (prefix, target components, cumulative weights, route)
+        self._table_version = None  # `context.components_version` the table was built for
+        self.add_routes(default_if_none(routes, []))
 
     def register_hosts(self, components: List[str]):
         self.components |= set(components)
+        self._table = None
+
+    def add_routes(self, routes):
+        self.routes += [x if isinstance(x, GatewayRoute) else GatewayRoute.from_json(x) for x in routes]
+        # longest prefix first, the order of registration among equal prefixes
+        self.routes.sort(key=lambda x: -len(x.prefix))
+        self._table = None
+
+    def _build_table(self):
+        components = self.context.components
+        table = {host: components[host] for host in self.components if host in components}
+        routed = {}
+        for route in self.routes:
+            # targets that are not created yet are None until the table is rebuilt, an error only if they are picked
+            targets = [components.get(x) for x in route.targets]
+            weights = list(accumulate(route.targets.values()))
+            routed.setdefault(route.host, []).append((route.prefix, targets, weights, route))
+        for host, host_routes in routed.items():
+            # a host that is also registered is the fallback when none of its prefixes match
+            fallback = table.get(host)
+            table[host] = host_routes if fallback is None else host_routes + [('', [fallback], [1], None)]
+        self._table = table
+        self._table_version = self.context.components_version
+        return table
 
     def find_component(self, host: str, name: str=None, request: RequestContext=None):
-        assert host in self.components
-        return self.context.components[host]
+        table = self._table
+        if table is None or self._table_version != self.context.components_version:
+            table = self._build_table()
+        entry = table.get(host)
+        if entry is None:
+            assert host in self.components
+            raise ValueError(f'Host {host} of {self.name} is not a component.')
+        if type(entry) is not list:
+            return entry
+        name = default_if_none(name, '')
+        for prefix, targets, weights, route in entry:
+            if name.startswith(prefix):
+                i = 0 if len(targets) == 1 else bisect(weights, self.rng.random() * weights[-1])
+                target = targets[i]
+                if target is None:
+                    raise ValueError(f'Route target {list(route.targets)[i]} of {host} is not a component.')
+                return target
+        raise AssertionError(f'No route of {host} matches {name}.')
 
     def recv_request(self, host, endpoint, request_context: RequestContext):
+        if self.pass_through:
+            # a single dispatch: the target serves the request context of the client
+            component = self.find_component(host, endpoint, request_context)
+            request_context.host_name = component.name
+            request_context.endpoint_name = endpoint
+            delivered = self.context.network.transmit(request_context.request, self, component)
+            if delivered.processed:
+                component.recv_request(component.name, endpoint, request_context)
+            else:
+                delivered.callbacks.append(lambda event: self._delivered(event, component, endpoint, request_context))
+            return
+
         def _(host, endpoint, rc):
             rc.req_arrived = self.now()
             rc.proc_started = self.now()
@@ -40,3 +138,12 @@ class Gateway(ProxyBase):
             except SimException as e:
                 rc.fail(SimException('SERVER_ERROR'), True)
         self.run(_(host, endpoint, request_context))
+
+    @staticmethod
+    def _delivered(event, component, endpoint, request_context):
+        if event.ok:
+            component.recv_request(component.name, endpoint, request_context)
+        else:
+            # lost on the way to the target, the client waits on the server promise
+            event.defused = True
+            request_context.fail(event.value, True)
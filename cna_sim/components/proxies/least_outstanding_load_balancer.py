@@ -0,0 +1,76 @@
+from ...core import *
+from .proxy_base import ProxyBase
+from dataclasses import dataclass
+
+from ...utils import shallow_asdict, IndexedSet
+
+
+@dataclass
+class LeastOutstandingLoadBalancerConfig(Config):
+    name: str = None
+
+    def generator(self):
+        return lambda ctx, svc: LeastOutstandingLoadBalancer(ctx, svc, **shallow_asdict(self))
+
+
+class LeastOutstandingLoadBalancer(ProxyBase):
+    # sends to the active instance with the fewest requests sent by this load balancer and not yet answered, ties are
+    # broken at random. Instances are kept in buckets by their count, so a pick is O(1) amortized.
+    def __init__(self, context, service, name=None):
+        if name is None:
+            name = context.child_name(service, type(self).__name__)
+        super().__init__(context, name)
+        self.service = service
+        self.outstanding = {}  # instance -> outstanding requests
+        self.buckets = [IndexedSet()]  # outstanding requests -> active instances
+        self.min_outstanding = 0
+        for instance in service.active_instances:
+            self.instance_activated(instance)
+
+    def _move(self, instance, n):
+        m = self.outstanding[instance]
+        self.outstanding[instance] = n
+        if instance in self.buckets[m]:
+            self.buckets[m].discard(instance)
+            if n == len(self.buckets):
+                self.buckets.append(IndexedSet())
+            self.buckets[n].add(instance)
+            self.min_outstanding = min(self.min_outstanding, n)
+
+    def instance_activated(self, instance):
+        n = self.outstanding.setdefault(instance, 0)
+        while n >= len(self.buckets):
+            self.buckets.append(IndexedSet())
+        self.buckets[n].add(instance)
+        self.min_outstanding = min(self.min_outstanding, n)
+
+    def instance_deactivated(self, instance):
+        n = self.outstanding.get(instance)
+        if n is None:
+            return
+        self.buckets[n].discard(instance)
+        if n == 0:
+            del self.outstanding[instance]
+
+    def _done(self, instance):
+        n = self.outstanding.get(instance)
+        if n is None:
+            return
+        self._move(instance, n - 1)
+        if n == 1 and instance not in self.buckets[0]:
+            del self.outstanding[instance]  # deactivated in the meantime
+
+    def track(self, instance, request_context: RequestContext):
+        self._move(instance, self.outstanding[instance] + 1)
+        request_context.server_promise.on_settled(lambda _: self._done(instance))
+
+    def find_component(self, host: str, name: str=None, request: RequestContext=None):
+        if len(self.service.active_instances) == 0:
+            return None
+        while not self.buckets[self.min_outstanding]:
+            self.min_outstanding += 1
+        bucket = self.buckets[self.min_outstanding]
+        component = bucket[int(self.rng.random() * len(bucket))]
+        if request is not None:
+            self.track(component, request)
+        return component
@@ -0,0 +1,46 @@
+from ...core import *
+from .proxy_base import ProxyBase
+from dataclasses import dataclass
+
+from ...utils import shallow_asdict
+
+
+@dataclass
+class PowerOfTwoLoadBalancerConfig(Config):
+    name: str = None
+
+    def generator(self):
+        return lambda ctx, svc: PowerOfTwoLoadBalancer(ctx, svc, **shallow_asdict(self))
+
+
+class PowerOfTwoLoadBalancer(ProxyBase):
+    # samples two distinct active instances and sends to the one with fewer outstanding requests from this load balancer
+    def __init__(self, context, service, name=None):
+        if name is None:
+            name = context.child_name(service, type(self).__name__)
+        super().__init__(context, name)
+        self.service = service
+        self.outstanding = {}  # instance -> outstanding requests
+
+    def _done(self, instance):
+        n = self.outstanding[instance] - 1
+        if n:
+            self.outstanding[instance] = n
+        else:
+            del self.outstanding[instance]
+
+    def find_component(self, host: str, name: str=None, request: RequestContext=None):
+        x = self.service.active_instances
+        if len(x) == 0:
+            return None
+        if len(x) == 1:
+            component = x[0]
+        else:
+            i = int(self.rng.random() * len(x))
+            j = int(self.rng.random() * (len(x) - 1))
+            a, b = x[i], x[j if j < i else j + 1]
+            component = a if self.outstanding.get(a, 0) <= self.outstanding.get(b, 0) else b
+        if request is not None:
+            self.outstanding[component] = self.outstanding.get(component, 0) + 1
+            request.server_promise.on_settled(lambda _: self._done(component))
+        return component
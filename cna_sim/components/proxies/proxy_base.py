@@ -7,5 +7,13 @@ class ProxyBase(Agent):
     def find_component(self, host: str, name: str=None, request: RequestContext=None):
         raise NotImplementedError()
 
+    def instance_activated(self, instance):
+        # called by the service owning this proxy when an instance becomes ACTIVE
+        pass
+
+    def instance_deactivated(self, instance):
+        # called by the service owning this proxy when an ACTIVE instance changes its status
+        pass
+
     def recv_request(self, host, endpoint, request_context: RequestContext):
         raise NotImplementedError()
\ No newline at end of file
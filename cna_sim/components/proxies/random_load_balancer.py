@@ -1,7 +1,6 @@
 from ...core import *
 from .proxy_base import ProxyBase
 from dataclasses import dataclass
-import random
 
 from ...utils import shallow_asdict
 
@@ -16,12 +15,13 @@ class RandomLoadBalancerConfig(Config):
 
 class RandomLoadBalancer(ProxyBase):
     def __init__(self, context, service, name=None):
+        if name is None:
+            name = context.child_name(service, type(self).__name__)
         super().__init__(context, name)
         self.service = service
 
     def find_component(self, host: str, name: str=None, request: RequestContext=None):
-        x = [y for y in list(self.service.instances.values()) if y.metric('status') == 'ACTIVE']
+        x = self.service.active_instances
         if len(x) == 0:
             return None
-        x = random.choice(x)
-        return x
\ No newline at end of file
+        return x[int(self.rng.random() * len(x))]
\ No newline at end of file
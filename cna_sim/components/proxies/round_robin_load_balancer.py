@@ -0,0 +1,32 @@
+from ...core import *
+from .proxy_base import ProxyBase
+from dataclasses import dataclass
+
+from ...utils import shallow_asdict
+
+
+@dataclass
+class RoundRobinLoadBalancerConfig(Config):
+    name: str = None
+
+    def generator(self):
+        return lambda ctx, svc: RoundRobinLoadBalancer(ctx, svc, **shallow_asdict(self))
+
+
+class RoundRobinLoadBalancer(ProxyBase):
+    def __init__(self, context, service, name=None):
+        if name is None:
+            name = context.child_name(service, type(self).__name__)
+        super().__init__(context, name)
+        self.service = service
+        self.cur = 0
+
+    def find_component(self, host: str, name: str=None, request: RequestContext=None):
+        x = self.service.active_instances
+        if len(x) == 0:
+            return None
+        # the order changes when an instance leaves (its slot is taken by the last one), which only shifts the cycle
+        self.cur = self.cur % len(x)
+        component = x[self.cur]
+        self.cur += 1
+        return component
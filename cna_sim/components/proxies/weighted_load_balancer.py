@@ -0,0 +1,65 @@
+from ...core import *
+from .proxy_base import ProxyBase
+from dataclasses import dataclass
+
+from ...utils import shallow_asdict, default_if_none, FenwickTree
+
+
+@dataclass
+class WeightedLoadBalancerConfig(Config):
+    weight_metric: str = None
+    name: str = None
+
+    def generator(self):
+        return lambda ctx, svc: WeightedLoadBalancer(ctx, svc, **shallow_asdict(self))
+
+
+class WeightedLoadBalancer(ProxyBase):
+    # picks an active instance with probability proportional to its weight, the value of `weight_metric` (cpu_quota by
+    # default) when it becomes active. Weights are kept in a Fenwick tree, so a pick is O(log n).
+    def __init__(self, context, service, weight_metric=None, name=None):
+        if name is None:
+            name = context.child_name(service, type(self).__name__)
+        super().__init__(context, name)
+        self.service = service
+        self.weight_metric = default_if_none(weight_metric, 'cpu_quota')
+        self.tree = FenwickTree()
+        self.slots = []  # slot -> instance, None when free
+        self.slot_of = {}  # instance -> slot
+        self.free_slots = []
+        for instance in service.active_instances:
+            self.instance_activated(instance)
+
+    def instance_activated(self, instance):
+        if instance in self.slot_of:
+            return
+        weight = instance.metric(self.weight_metric)
+        weight = 1.0 if weight is None else float(weight)
+        if self.free_slots:
+            i = self.free_slots.pop()
+            self.slots[i] = instance
+        else:
+            i = len(self.slots)
+            self.slots.append(instance)
+            self.tree.grow(len(self.slots))
+        self.slot_of[instance] = i
+        self.tree.set(i, weight)
+
+    def instance_deactivated(self, instance):
+        i = self.slot_of.pop(instance, None)
+        if i is None:
+            return
+        self.tree.set(i, 0.0)
+        self.slots[i] = None
+        self.free_slots.append(i)
+
+    def find_component(self, host: str, name: str=None, request: RequestContext=None):
+        if not self.slot_of:
+            return None
+        if self.tree.total <= 0:
+            x = self.service.active_instances
+            return x[int(self.rng.random() * len(x))]
+        component = self.slots[self.tree.find(self.rng.random() * self.tree.total)]
+        if component is None:  # rounding past the last positive weight
+            component = next(x for x in reversed(self.slots) if x is not None)
+        return component
@@ -0,0 +1,2 @@
+from .sampler_base import SamplerBase
+from .metric_sampler import MetricSampler, MetricSamplerConfig
@@ -0,0 +1,107 @@
+from copy import copy
+from dataclasses import dataclass
+
+from .sampler_base import SamplerBase
+from ...core import *
+from ...utils import default_if_none, shallow_asdict, remove_m
+
+
+@dataclass
+class MetricSamplerConfig(Config):
+    interval: float = None
+    skip_unchanged: bool = None
+    name: str = None
+
+    def generator(self):
+        return lambda ctx: MetricSampler(ctx, **shallow_asdict(self))
+
+    @classmethod
+    def from_json(cls, j, builder):
+        j = copy(j)
+        j['interval'] = remove_m(j.get('interval'))
+        return cls(**j)
+
+
+class MetricSource:
+    def __init__(self, source, metrics, tags):
+        self.source = source
+        self.metrics = metrics
+        self._tags = tags
+        self.last_values = {}
+
+    @property
+    def tags(self):
+        # resolved on the first sample and reused afterwards
+        if callable(self._tags):
+            self._tags = self._tags()
+        return self._tags
+
+
+class MetricSampler(SamplerBase):
+    # samples the metrics of all registered sources from a single process; metrics sharing an interval are sampled
+    # in one pass and handed to the data collector as one batch
+    def __init__(self, context: Context, interval=None, skip_unchanged=None, name=None):
+        super().__init__(context, name)
+        self.interval = default_if_none(interval, 1.0)
+        self.skip_unchanged = default_if_none(skip_unchanged, False)
+        self.sources = {}  # source -> MetricSource
+        self.groups = {}  # interval -> {source: [metric names]}
+        self._next_due = {}  # interval -> next sampling time
+        self._wake_at = None  # time the sampling process wakes up at, None if it is not running
+        self._generation = 0
+
+    def register(self, source, metrics, tags=None):
+        """
+        `metrics` is a list of metric names sampled every `interval`, or a dict of metric name to its own interval.
+        `tags` is a dict or a function returning it.
+        """
+        if type(metrics) is not dict:
+            metrics = {m: None for m in metrics}
+        self.sources[source] = MetricSource(source, list(metrics.keys()), default_if_none(tags, {}))
+        for metric, interval in metrics.items():
+            interval = default_if_none(remove_m(interval), self.interval)
+            if interval not in self.groups:
+                self.groups[interval] = {}
+                self._next_due[interval] = self.now()
+            self.groups[interval].setdefault(source, []).append(metric)
+        if self._wake_at is None or self._wake_at > min(self._next_due.values()):
+            # a process sleeping past the new due time is superseded and exits when it wakes up
+            self._generation += 1
+            self._wake_at = self.now()
+            self.run(self.process(self._generation))
+
+    def unregister(self, source):
+        if self.sources.pop(source, None) is None:
+            return
+        for interval in list(self.groups.keys()):
+            self.groups[interval].pop(source, None)
+            if not self.groups[interval]:
+                del self.groups[interval]
+                del self._next_due[interval]
+
+    def sample(self, interval):
+        records = []
+        for source, metrics in self.groups[interval].items():
+            entry = self.sources[source]
+            tags = entry.tags
+            for metric in metrics:
+                value = source.metric(metric)
+                if self.skip_unchanged:
+                    if metric in entry.last_values and entry.last_values[metric] == value:
+                        continue
+                    entry.last_values[metric] = value
+                records.append((metric, tags, {'value': value}))
+        if records:
+            self.context.data_collector.record_batch(records, self.now())
+
+    def process(self, generation):
+        while generation == self._generation:
+            if not self._next_due:
+                self._wake_at = None
+                return
+            now = self.now()
+            for interval in [k for k, v in self._next_due.items() if v <= now]:
+                self.sample(interval)
+                self._next_due[interval] += interval
+            self._wake_at = min(self._next_due.values())
+            yield self.timeout(self._wake_at - now)
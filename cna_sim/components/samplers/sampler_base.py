@@ -0,0 +1,12 @@
+from ...core import *
+
+
+class SamplerBase(Base):
+    def __init__(self, context: Context, name=None):
+        super().__init__(context, name, in_context=True)
+
+    def register(self, source, metrics, tags):
+        raise NotImplementedError()
+
+    def unregister(self, source):
+        raise NotImplementedError()
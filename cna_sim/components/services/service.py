@@ -1,11 +1,10 @@
 from __future__ import annotations
-import random
 from copy import copy
 from dataclasses import dataclass, field
 
 from ..autoscalers import DefaultScalerConfig
 from ...core import *
-from ...utils import inject_context, default_if_none, not_none, shallow_asdict
+from ...utils import inject_context, default_if_none, not_none, shallow_asdict, IndexedSet
 from ..proxies import RandomLoadBalancerConfig
 
 
@@ -15,6 +14,7 @@ class ServiceConfig(Config):
     load_balancer_config: Config = None
     autoscaler_config: Config = None
     replicas: int = None
+    archive: bool = None
     name: str = None
     network_group: str = None
 
@@ -37,15 +37,18 @@ class ServiceConfig(Config):
 
 
 class Service(Agent):
-    def __init__(self, context: Context, instance_gen, load_balancer_gen=None, autoscaler_gen=None, replicas=None, name=None, network_group=None):
+    def __init__(self, context: Context, instance_gen, load_balancer_gen=None, autoscaler_gen=None, replicas=None,
+                 archive=None, name=None, network_group=None):
         super().__init__(context, name, network_group)
+        self.archive = default_if_none(archive, False)  # record the summary of every terminated instance
         self.instances = {}  # will only contain STARTING and ACTIVE
+        self.active_instances = IndexedSet()  # updated on status transitions of the instances
         self.instance_gen = not_none(instance_gen)
         self.load_balancer = default_if_none(load_balancer_gen, RandomLoadBalancerConfig().generator())(context, self)
         self.autoscaler = default_if_none(autoscaler_gen, DefaultScalerConfig().generator())(context, self)
         self.scale_to(default_if_none(replicas, 1))
 
-        self.run(self.monitoring())
+        self.context.sampler.register(self, ['instance_num', 'active_instance_num'], {'host_name': self.name})
 
     def scale_to(self, instances: int):
         delta = instances - len(self.instances)
@@ -54,18 +57,34 @@ class Service(Agent):
                 new_instance = inject_context(self.instance_gen, self.context, self)
                 new_instance.service_name = self.name
                 self.instances[new_instance.name] = new_instance
+                new_instance.status_listeners.append(self.instance_status_changed)
+                if new_instance.metric('status') == 'ACTIVE':
+                    self.instance_status_changed(new_instance, None, 'ACTIVE')
         else:
             for _ in range(-delta):
                 not_init = [k for k, v in self.instances.items() if v.metric('status') == 'STARTING']
                 if not_init:
-                    k = random.choice(not_init)
+                    k = not_init[int(self.rng.random() * len(not_init))]
                 else:
-                    k = random.choice(list(self.instances.keys()))
+                    k = list(self.instances.keys())[int(self.rng.random() * len(self.instances))]
                 self.instances[k].terminate()
                 del self.instances[k]
 
+    def instance_status_changed(self, instance, previous, status):
+        if status == 'TERMINATED' and self.archive:
+            self.context.data_collector.record('instance_summary',
+                                               {'host_name': self.name, 'instance_name': instance.name},
+                                               instance.summary(), self.now())
+        if status == 'ACTIVE':
+            if instance not in self.active_instances:
+                self.active_instances.add(instance)
+                self.load_balancer.instance_activated(instance)
+        elif instance in self.active_instances:
+            self.active_instances.discard(instance)
+            self.load_balancer.instance_deactivated(instance)
+
     def recv_request(self, host, endpoint, request_context):
-        component = self.load_balancer.find_component(host, endpoint, request_context.request)
+        component = self.load_balancer.find_component(host, endpoint, request_context)
         if component is None:
             request_context.fail(SimException('CONNECTION_REFUSED'), True)
         else:
@@ -73,16 +92,7 @@ class Service(Agent):
 
     def metric(self, name):
         if name == 'active_instance_num':
-            return len([x for x in self.instances.values() if x.metric('status') == 'ACTIVE'])
+            return len(self.active_instances)
         if name == 'instance_num':
             return len(self.instances)
 
-    def monitoring(self):
-        while True:
-            tags = {
-                'host_name': self.name,
-            }
-            self.context.data_collector.record('instance_num', tags, {'value': self.metric('instance_num')})
-            self.context.data_collector.record('active_instance_num', tags,
-                                               {'value': self.metric('active_instance_num')})
-            yield self.timeout(1)
@@ -7,5 +7,6 @@ from .base import Base, Agent
 from .promise import Promise
 from .request import Message, MessageConfig, RequestContext
 from .client import Client
+from .timers import Timer, TimerQueue
 
 
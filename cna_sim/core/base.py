@@ -1,15 +1,18 @@
 from .context import Context
-from .. import utils
 
 
 class Base:
     def __init__(self, context: Context, name=None, in_context=False):
         self.context = context
         if name is None:
-            name = utils.uuid()
+            name = context.uuid(type(self).__name__)
         self.name = name
         if in_context:
-            self.context.components[name] = self
+            self.context.add(self)
+
+    @property
+    def rng(self):
+        return self.context.rng(self.name)
 
     def run(self, generator, delay=0):
         return self.context.run(generator, delay)
@@ -23,11 +26,16 @@ class Base:
     def now(self):
         return self.context.now()
 
+    def teardown(self):
+        # releases what the component holds in the context once it is no longer used; subclasses stop their
+        # processes and tear down the components they own before calling this
+        self.context.remove(self)
+
 
 class Agent(Base):
     def __init__(self, context: Context, name=None, network_group='default', in_context=True):
         super().__init__(context, name, in_context)
-        self.network_group = network_group
+        self.network_group = 'default' if network_group is None else network_group
 
     def metric(self, name):
         pass
@@ -5,6 +5,8 @@ from . import *
 
 class Client(Agent):
     def __init__(self, context: Context, name=None, network_group='default', in_context=True, owner: Agent=None):
+        if name is None and owner is not None:
+            name = context.child_name(owner, 'Client')
         super().__init__(context, name, network_group, in_context=in_context)
         if owner is None:
             owner = self
@@ -25,7 +27,7 @@ class Client(Agent):
 
         def send_delay(rc=rc, sender=self.owner, receiver=receiver, host=host, endpoint=endpoint):
             try:
-                yield self.run(self.context.network.transmit(rc.request, sender, receiver))
+                yield self.context.network.transmit(rc.request, sender, receiver)
             except SimException as e:
                 rc.failed_at = self.now()
                 rc.status = e.code
@@ -35,7 +37,7 @@ class Client(Agent):
 
         def recv_delay(resp, rc=rc, sender=receiver, receiver=self.owner):
             try:
-                yield self.run(self.context.network.transmit(resp, sender, receiver))
+                yield self.context.network.transmit(resp, sender, receiver)
             except SimException as e:
                 rc.failed_at = self.now()
                 rc.status = e.code
@@ -43,10 +45,9 @@ class Client(Agent):
             rc.resp_arrived = self.now()
             return resp
 
-        resp_promise = (Promise.init(self.context, None)
-                        .then(lambda _: (yield self.run(send_delay())))
-                        .then(lambda _: (yield rc.server_promise.wait()))
-                        .then(lambda resp: (yield self.run(recv_delay(resp)))))
+        resp_promise = (Promise.init(self.context, send_delay())
+                        .then(lambda _: rc.server_promise)
+                        .then(lambda resp: recv_delay(resp)))
         resp_promise.then(lambda _, rc=rc: self.context.data_collector.record_ended_request(rc))
         resp_promise.catch(lambda _, rc=rc: self.context.data_collector.record_ended_request(rc))
 
@@ -54,12 +55,13 @@ class Client(Agent):
             return resp_promise
 
         timeout_promise = Promise(self.context)
-        def _timeout(timeout, rc=rc, timeout_promise=timeout_promise):
-            yield self.timeout(timeout)
+        def _timeout(rc=rc, timeout_promise=timeout_promise):
             rc.is_timeout = True
             timeout_promise.reject(SimException('TIMEOUT'))
 
-        self.run(_timeout(timeout))
+        # the timer is cancelled as soon as the response settles, so only requests in flight hold one
+        timer = self.context.call_later(timeout, _timeout)
+        resp_promise.on_settled(lambda _, timer=timer: timer.cancel())
 
         return Promise.race(self.context, [resp_promise, timeout_promise])
 
@@ -1,53 +1,143 @@
+import itertools
+import os
+import random
 from copy import copy
 from types import GeneratorType, FunctionType
 from typing import List
 
 from . import *
+from . import engine as engine_module
+from .timers import TimerQueue, Timer
+import numpy as np
 import simpy
-from ..utils import inject_context, default_if_none
+from .. import utils
+from ..utils import inject_context, default_if_none, stable_hash_words
 
 
 class ContextConfig(Config):
     def __init__(self, gateway_config: Config = None, data_collector_config: Config = None,
-                 network_config: Config = None, component_configs: List[Config]=None):
+                 network_config: Config = None, component_configs: List[Config]=None, seed: int = None,
+                 sampler_config: Config = None, engine: str = None):
 
         self.component_configs = component_configs
         self.gateway_config = gateway_config
         self.data_collector_config = data_collector_config
         self.network_config = network_config
+        self.sampler_config = sampler_config
+        self.seed = seed
+        self.engine = engine
 
     def generator(self):
-        return lambda: Context(
+        return lambda seed=None: Context(
             component_gens=[x.generator() for x in default_if_none(self.component_configs, [])],
             gateway_gen=None if self.gateway_config is None else self.gateway_config.generator(),
             data_collector_gen=None if self.data_collector_config is None else self.data_collector_config.generator(),
-            network_gen=None if self.network_config is None else self.network_config.generator()
+            network_gen=None if self.network_config is None else self.network_config.generator(),
+            sampler_gen=None if self.sampler_config is None else self.sampler_config.generator(),
+            seed=default_if_none(seed, self.seed),
+            engine=self.engine
         )
 
     @classmethod
     def from_json(cls, j, builder):
         j = copy(j)
-        j['component_configs'] = [builder.use_config(x) for x in j['component_configs']]
+        j['component_configs'] = [builder.use_config(x) for x in default_if_none(j.get('component_configs'), [])]
         j['gateway_config'] = builder.use_config(j.get('gateway_config'))
         j['data_collector_config'] = builder.use_config(j.get('data_collector_config'))
         j['network_config'] = builder.use_config(j.get('network_config'))
+        j['sampler_config'] = builder.use_config(j.get('sampler_config'))
         return ContextConfig(**j)
 
 
 class Context:
-    def __init__(self, component_gens=None, gateway_gen=None, data_collector_gen=None, network_gen=None):
+    ENGINES = ['simpy', 'fast']
+
+    def __init__(self, component_gens=None, gateway_gen=None, data_collector_gen=None, network_gen=None, seed=None,
+                 sampler_gen=None, engine=None):
         from ..components.data_collectors import DefaultDataCollectorConfig
         from ..components.networks import DefaultNetworkConfig
         from ..components.proxies import GatewayConfig
+        from ..components.samplers import MetricSamplerConfig
 
         self.components = {}
-        self.env: simpy.Environment = simpy.Environment()
+        # changes whenever a component is added or removed, so caches of components know when to refresh
+        self.components_version = 0
+        self.seed = seed
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self._rngs = {}
+        self.profiler = None
+        # names are only reproducible when a seed is given, otherwise they are uuid4. One stream per scope, see `uuid`
+        self._name_randoms = None if seed is None else {}
+        self._owned_scopes = {}  # owner name -> naming scopes of `child_name`, released with the owner
+        # ids of short-lived objects (requests, promises), which get no uuid name
+        self.next_id = itertools.count(1).__next__
+        # `fast` is the kernel of `core.engine`, the default can be changed with the CNA_SIM_ENGINE variable
+        self.engine = default_if_none(engine, os.environ.get('CNA_SIM_ENGINE', 'simpy'))
+        if self.engine == 'simpy':
+            self.env: simpy.Environment = engine_module.SimpyEnvironment()
+            self._store, self._container = simpy.Store, simpy.Container
+        elif self.engine == 'fast':
+            self.env = engine_module.Environment()
+            self._store, self._container = engine_module.Store, engine_module.Container
+        else:
+            raise ValueError(f'Unknown engine {self.engine}, expected one of {Context.ENGINES}.')
+        self.timers = TimerQueue(self.env)
         self.gateway = default_if_none(gateway_gen, GatewayConfig().generator())(self)
         self.data_collector = default_if_none(data_collector_gen, DefaultDataCollectorConfig().generator())(self)
         self.network = default_if_none(network_gen, DefaultNetworkConfig().generator())(self)
+        self.sampler = default_if_none(sampler_gen, MetricSamplerConfig().generator())(self)
         for component_gen in default_if_none(component_gens, []):
             component_gen(self)
 
+    def seed_sequence_for(self, key):
+        ss = self.seed_sequence
+        return np.random.SeedSequence(ss.entropy, spawn_key=(*ss.spawn_key, *stable_hash_words(key)))
+
+    def seed_for(self, key):
+        return int(self.seed_sequence_for(key).generate_state(1, np.uint64)[0])
+
+    def rng(self, key) -> np.random.Generator:
+        # independent stream per key (usually a component name), stable across runs with the same seed
+        rng = self._rngs.get(key)
+        if rng is None:
+            rng = self._rngs[key] = np.random.default_rng(self.seed_sequence_for(key))
+        return rng
+
+    def uuid(self, scope=None):
+        # seeded names are drawn from one stream per scope, so creating a component only shifts the names created
+        # after it in the same scope. Unnamed components use their class as the scope, or `child_name` if owned.
+        if self._name_randoms is None:
+            return utils.uuid()
+        name_random = self._name_randoms.get(scope)
+        if name_random is None:
+            key = '__names__' if scope is None else f'__names__/{scope}'
+            name_random = self._name_randoms[scope] = random.Random(self.seed_for(key))
+        return utils.uuid(name_random)
+
+    def child_name(self, owner, kind):
+        # name of the `kind`-th component owned by `owner`, independent of components created elsewhere
+        scope = f'{owner.name}/{kind}'
+        if self._name_randoms is not None and scope not in self._name_randoms:
+            self._owned_scopes.setdefault(owner.name, []).append(scope)
+        return self.uuid(scope)
+
+    def add(self, component):
+        self.components[component.name] = component
+        self.components_version += 1
+
+    def remove(self, component):
+        # forgets a component that is no longer used: its registration, sampled metrics and random streams
+        name = component.name
+        if self.components.get(name) is component:
+            del self.components[name]
+            self.components_version += 1
+        self.sampler.unregister(component)
+        for scope in self._owned_scopes.pop(name, ()):
+            del self._name_randoms[scope]
+        rng = self._rngs.pop(name, None)
+        if rng is not None:
+            utils.Distribution.release(rng)
+
     def __getitem__(self, item):
         return self.components[item]
 
@@ -59,6 +149,18 @@ class Context:
         return False
 
     def run(self, element, delay=0):
+        # runs a generator as a process, calls a function or passes a value through after `delay`, and returns an
+        # event with the result. Without a delay a generator is started as a process right away (it still only runs
+        # once the caller yields, in the order `run` was called), and a plain value is returned as an already
+        # processed event, so a process yielding it resumes at once and nothing is scheduled. Functions are still
+        # called from the event loop after a zero timeout, after the events already due now.
+        if delay == 0:
+            element_type = type(element)
+            if element_type is GeneratorType:
+                return self.env.process(element)
+            if element_type is not FunctionType:
+                return self.env.processed(element)
+
         def _():
             yield self.env.timeout(delay)
             if type(element) is GeneratorType:
@@ -70,37 +172,66 @@ class Context:
 
         return self.env.process(_())
 
+    def processed(self, value=None):
+        # an event that already succeeded and was processed, see `engine.Processed`
+        return self.env.processed(value)
+
     def alive_race(self, generator, alive_event, generator_error=None, alive_error=None):
+        # `generator` is an event; the result is its value, or the error (`alive_error` or the value of
+        # `alive_event`) if `alive_event` is processed first. If both are, `generator` wins.
         def _(generator, alive_event, generator_error, alive_error):
             if alive_event.triggered:
                 if alive_error is not None:
                     raise alive_error
                 raise alive_event.value
             try:
-                result = yield self.env.any_of([generator, alive_event])
+                yield self.env.any_of([generator, alive_event])
             except (SimException, SimError) as e:
                 if generator_error is not None:
                     raise generator_error
                 raise e
-            k = list(result.keys())[0]
-            v = list(result.values())[0]
-            if k == alive_event:
-                if alive_error is not None:
-                    raise alive_error
-                raise v
-            return v
+            if generator.processed:
+                return generator.value
+            if alive_error is not None:
+                raise alive_error
+            raise alive_event.value
 
         return self.env.process(_(generator, alive_event, generator_error, alive_error))
 
     def timeout(self, t):
         return self.env.timeout(t)
 
+    def call_later(self, delay, callback) -> Timer:
+        # cancellable alternative to a process sleeping `delay` before calling `callback()`, see `core.timers`
+        return self.timers.call_later(delay, callback)
+
+    def store(self, capacity=float('inf')):
+        return self._store(self.env, capacity)
+
+    def container(self, capacity=float('inf'), init=0):
+        return self._container(self.env, capacity, init)
+
     def now(self):
         return self.env.now
 
+    def scheduled_events(self):
+        # events scheduled since the context was created, on either engine
+        return self.env.scheduled_events
+
+    def start_profiling(self):
+        # see `cna_sim.profiler`, the returned profiler is kept as `self.profiler`
+        from ..profiler import Profiler
+        self.profiler = Profiler(self).start()
+        return self.profiler
+
+    def stop_profiling(self):
+        return self.profiler.stop()
+
     def simulate(self, until):
         self.env.run(until)
         self.data_collector.flush()
 
     def close(self):
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
         self.data_collector.close()
@@ -0,0 +1,500 @@
+import itertools
+from heapq import heappush, heappop
+from types import MethodType
+
+import simpy
+from simpy.events import ConditionValue
+
+
+"""
+Heap-based event kernel used by `ContextConfig(engine='fast')`. It implements the subset of `simpy.Environment` this
+project uses (`now`, `timeout`, `event`, `process`, `any_of`, `all_of`, `schedule`, `step`, `run`, and the `Store`
+and `Container` resources) with the same scheduling order as simpy, so a seeded simulation gives identical results on
+both engines. Events are slotted, the event constructors are bound to the environment and `run` processes the queue
+in a single loop.
+
+Events created by simpy classes (e.g. a `simpy.Store` built on this environment) are accepted as well.
+"""
+
+URGENT = 0
+NORMAL = 1
+
+PENDING = object()
+
+
+class EmptySchedule(Exception):
+    pass
+
+
+def _count_value(counter: itertools.count):
+    # the next value of a `count(n)` without taking it
+    return int(repr(counter)[6:-1])
+
+
+class Event:
+    __slots__ = ('env', 'callbacks', '_value', '_ok', '_defused', '__weakref__')
+
+    def __init__(self, env):
+        self.env = env
+        self.callbacks = []
+        self._value = PENDING
+        self._ok = True
+        self._defused = False
+
+    def __repr__(self):
+        return f'<{type(self).__name__}() object at {id(self):#x}>'
+
+    @property
+    def triggered(self):
+        return self._value is not PENDING
+
+    @property
+    def processed(self):
+        return self.callbacks is None
+
+    @property
+    def ok(self):
+        return self._ok
+
+    @property
+    def defused(self):
+        return self._defused
+
+    @defused.setter
+    def defused(self, value):
+        self._defused = value
+
+    @property
+    def value(self):
+        if self._value is PENDING:
+            raise AttributeError(f'Value of {self} is not yet available')
+        return self._value
+
+    def trigger(self, event):
+        self._ok = event._ok
+        self._value = event._value
+        self.env.schedule(self)
+
+    def succeed(self, value=None):
+        if self._value is not PENDING:
+            raise RuntimeError(f'{self} has already been triggered')
+        self._ok = True
+        self._value = value
+        env = self.env
+        heappush(env._queue, (env.now, NORMAL, next(env._eid), self))
+        return self
+
+    def fail(self, exception):
+        if self._value is not PENDING:
+            raise RuntimeError(f'{self} has already been triggered')
+        if not isinstance(exception, BaseException):
+            raise TypeError(f'{exception} is not an exception.')
+        self._ok = False
+        self._value = exception
+        self.env.schedule(self)
+        return self
+
+
+class Processed(Event):
+    # an event that already succeeded and was processed: a process yielding it resumes at once, nothing is scheduled
+    __slots__ = ()
+
+    def __init__(self, env, value=None):
+        self.env = env
+        self.callbacks = None
+        self._value = value
+        self._ok = True
+        self._defused = False
+
+
+class Timeout(Event):
+    __slots__ = ('_delay',)
+
+    def __init__(self, env, delay=0, value=None):
+        if delay < 0:
+            raise ValueError(f'Negative delay {delay}')
+        self.env = env
+        self.callbacks = []
+        self._value = value
+        self._ok = True
+        self._defused = False
+        self._delay = delay
+        heappush(env._queue, (env.now + delay, NORMAL, next(env._eid), self))
+
+
+class Initialize(Event):
+    __slots__ = ()
+
+    def __init__(self, env, process):
+        self.env = env
+        self.callbacks = [process._resume]
+        self._value = None
+        self._ok = True
+        self._defused = False
+        heappush(env._queue, (env.now, URGENT, next(env._eid), self))
+
+
+class Process(Event):
+    __slots__ = ('_generator', '_target')
+
+    def __init__(self, env, generator):
+        if not hasattr(generator, 'throw'):
+            raise ValueError(f'{generator} is not a generator.')
+        self.env = env
+        self.callbacks = []
+        self._value = PENDING
+        self._ok = True
+        self._defused = False
+        self._generator = generator
+        self._target = Initialize(env, self)
+
+    def __repr__(self):
+        return f'<Process({self._generator.__name__}) object at {id(self):#x}>'
+
+    @property
+    def target(self):
+        return self._target
+
+    @property
+    def name(self):
+        return self._generator.__name__
+
+    @property
+    def is_alive(self):
+        return self._value is PENDING
+
+    def _resume(self, event):
+        # same semantics as `simpy.Process._resume`
+        env = self.env
+        env._active_proc = self
+        generator = self._generator
+        while True:
+            try:
+                if event._ok:
+                    event = generator.send(event._value)
+                else:
+                    event._defused = True
+                    exc = type(event._value)(*event._value.args)
+                    exc.__cause__ = event._value
+                    event = generator.throw(exc)
+            except StopIteration as e:
+                event = None
+                self._ok = True
+                self._value = e.args[0] if len(e.args) else None
+                heappush(env._queue, (env.now, NORMAL, next(env._eid), self))
+                break
+            except BaseException as e:
+                event = None
+                self._ok = False
+                e.__traceback__ = e.__traceback__.tb_next
+                self._value = e
+                heappush(env._queue, (env.now, NORMAL, next(env._eid), self))
+                break
+            try:
+                if event.callbacks is not None:
+                    event.callbacks.append(self._resume)
+                    break
+            except AttributeError:
+                if hasattr(event, 'callbacks'):
+                    raise
+                raise RuntimeError(f'Invalid yield value "{event}" in {generator.__name__}') from None
+        self._target = event
+        env._active_proc = None
+
+
+class Condition(Event):
+    __slots__ = ('_evaluate', '_events', '_count')
+
+    def __init__(self, env, evaluate, events):
+        super().__init__(env)
+        self._evaluate = evaluate
+        self._events = tuple(events)
+        self._count = 0
+        if not self._events:
+            self.succeed(ConditionValue())
+            return
+        for event in self._events:
+            if event.env is not env:
+                raise ValueError('It is not allowed to mix events from different environments')
+        for event in self._events:
+            if event.callbacks is None:
+                self._check(event)
+            else:
+                event.callbacks.append(self._check)
+        self.callbacks.append(self._build_value)
+
+    def _populate_value(self, value):
+        for event in self._events:
+            if isinstance(event, Condition):
+                event._populate_value(value)
+            elif event.callbacks is None:
+                value.events.append(event)
+
+    def _build_value(self, event):
+        self._remove_check_callbacks()
+        if event._ok:
+            self._value = ConditionValue()
+            self._populate_value(self._value)
+
+    def _remove_check_callbacks(self):
+        for event in self._events:
+            if event.callbacks and self._check in event.callbacks:
+                event.callbacks.remove(self._check)
+            if isinstance(event, Condition):
+                event._remove_check_callbacks()
+
+    def _check(self, event):
+        if self._value is not PENDING:
+            return
+        self._count += 1
+        if not event._ok:
+            event._defused = True
+            self.fail(event._value)
+        elif self._evaluate(self._events, self._count):
+            self.succeed()
+
+    @staticmethod
+    def all_events(events, count):
+        return len(events) == count
+
+    @staticmethod
+    def any_events(events, count):
+        return count > 0 or len(events) == 0
+
+
+class AllOf(Condition):
+    __slots__ = ()
+
+    def __init__(self, env, events):
+        super().__init__(env, Condition.all_events, events)
+
+
+class AnyOf(Condition):
+    __slots__ = ()
+
+    def __init__(self, env, events):
+        super().__init__(env, Condition.any_events, events)
+
+
+class StorePut(Event):
+    __slots__ = ('resource', 'item')
+
+
+class StoreGet(Event):
+    __slots__ = ('resource',)
+
+
+class ContainerPut(Event):
+    __slots__ = ('resource', 'amount')
+
+
+class ContainerGet(Event):
+    __slots__ = ('resource', 'amount')
+
+
+class Store:
+    # FIFO store with the event order of `simpy.Store`: a put is handled when created, waiting gets are only
+    # served once the put event is processed, and every trigger serves at most one request
+    def __init__(self, env, capacity=float('inf')):
+        if capacity <= 0:
+            raise ValueError('"capacity" must be > 0.')
+        self._env = env
+        self._capacity = capacity
+        self.items = []
+        self.put_queue = []
+        self.get_queue = []
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def put(self, item):
+        ev = StorePut(self._env)
+        ev.resource = self
+        ev.item = item
+        ev.callbacks.append(self._trigger_get)
+        self.put_queue.append(ev)
+        self._trigger_put(None)
+        return ev
+
+    def get(self):
+        ev = StoreGet(self._env)
+        ev.resource = self
+        ev.callbacks.append(self._trigger_put)
+        self.get_queue.append(ev)
+        self._trigger_get(None)
+        return ev
+
+    def _trigger_put(self, _):
+        if self.put_queue and len(self.items) < self._capacity:
+            ev = self.put_queue.pop(0)
+            self.items.append(ev.item)
+            ev.succeed()
+
+    def _trigger_get(self, _):
+        if self.get_queue and self.items:
+            self.get_queue.pop(0).succeed(self.items.pop(0))
+
+
+class Container:
+    # continuous or discrete amount with the event order of `simpy.Container`
+    def __init__(self, env, capacity=float('inf'), init=0):
+        if capacity <= 0:
+            raise ValueError('"capacity" must be > 0.')
+        if init < 0:
+            raise ValueError('"init" must be >= 0.')
+        if init > capacity:
+            raise ValueError('"init" must be <= "capacity".')
+        self._env = env
+        self._capacity = capacity
+        self._level = init
+        self.put_queue = []
+        self.get_queue = []
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def level(self):
+        return self._level
+
+    def put(self, amount):
+        if amount <= 0:
+            raise ValueError(f'amount(={amount}) must be > 0.')
+        ev = ContainerPut(self._env)
+        ev.resource = self
+        ev.amount = amount
+        ev.callbacks.append(self._trigger_get)
+        self.put_queue.append(ev)
+        self._trigger_put(None)
+        return ev
+
+    def get(self, amount):
+        if amount <= 0:
+            raise ValueError(f'amount(={amount}) must be > 0.')
+        ev = ContainerGet(self._env)
+        ev.resource = self
+        ev.amount = amount
+        ev.callbacks.append(self._trigger_put)
+        self.get_queue.append(ev)
+        self._trigger_get(None)
+        return ev
+
+    def _trigger_put(self, _):
+        queue = self.put_queue
+        while queue and self._capacity - self._level >= queue[0].amount:
+            ev = queue.pop(0)
+            self._level += ev.amount
+            ev.succeed()
+
+    def _trigger_get(self, _):
+        queue = self.get_queue
+        while queue and self._level >= queue[0].amount:
+            ev = queue.pop(0)
+            self._level -= ev.amount
+            ev.succeed()
+
+
+class Environment:
+    # `now` is a plain attribute; `schedule` and `step` may be replaced on the instance (see `cna_sim.profiler`),
+    # `run` then steps through them instead of its inlined loop
+    def __init__(self, initial_time=0):
+        self.now = initial_time
+        self._queue = []
+        self._eid = itertools.count()
+        self._active_proc = None
+        # event constructors bound to the environment, as simpy does, to save a call per event
+        self.event = MethodType(Event, self)
+        self.processed = MethodType(Processed, self)
+        self.timeout = MethodType(Timeout, self)
+        self.process = MethodType(Process, self)
+        self.any_of = MethodType(AnyOf, self)
+        self.all_of = MethodType(AllOf, self)
+
+    @property
+    def active_process(self):
+        return self._active_proc
+
+    @property
+    def scheduled_events(self):
+        # events scheduled so far: every event takes the next id, which is read here without taking one
+        return _count_value(self._eid)
+
+    def schedule(self, event, priority=NORMAL, delay=0):
+        heappush(self._queue, (self.now + delay, priority, next(self._eid), event))
+
+    def peek(self):
+        try:
+            return self._queue[0][0]
+        except IndexError:
+            return float('inf')
+
+    def step(self):
+        try:
+            self.now, _, _, event = heappop(self._queue)
+        except IndexError:
+            raise EmptySchedule() from None
+        callbacks, event.callbacks = event.callbacks, None
+        for callback in callbacks:
+            callback(event)
+        if not event._ok and not getattr(event, '_defused', False):
+            exc = type(event._value)(*event._value.args)
+            exc.__cause__ = event._value
+            raise exc
+
+    def run(self, until=None):
+        stop = None
+        if until is not None:
+            at = until if isinstance(until, int) else float(until)
+            if at <= self.now:
+                raise ValueError(f'until ({at}) must be greater than the current simulation time')
+            stop = Event(self)
+            stop._value = None
+            self.schedule(stop, URGENT, at - self.now)
+
+        if 'step' in self.__dict__:
+            try:
+                while stop is None or stop.callbacks is not None:
+                    self.step()
+            except EmptySchedule:
+                return None
+        else:
+            queue = self._queue
+            while queue:
+                now, _, _, event = heappop(queue)
+                self.now = now
+                if event is stop:
+                    break
+                callbacks, event.callbacks = event.callbacks, None
+                for callback in callbacks:
+                    callback(event)
+                if not event._ok and not getattr(event, '_defused', False):
+                    exc = type(event._value)(*event._value.args)
+                    exc.__cause__ = event._value
+                    raise exc
+            else:
+                return None
+        # like simpy, the stop event is processed once more (without callbacks) when the simulation resumes
+        stop.callbacks = []
+        self.schedule(stop, -1)
+        return None
+
+
+class SimpyProcessed(simpy.Event):
+    # `Processed` for simpy, initialized the way simpy's own events (e.g. `Initialize`) set up their state. simpy
+    # treats an event as defused once `_defused` is set at all, so it is left unset
+    def __init__(self, env, value=None):
+        self.env = env
+        self.callbacks = None
+        self._value = value
+        self._ok = True
+
+
+class SimpyEnvironment(simpy.Environment):
+    # the simpy environment of `ContextConfig(engine='simpy')`, with the event counter and `processed` of `Environment`
+    scheduled_events = Environment.scheduled_events
+
+    def __init__(self, initial_time=0):
+        super().__init__(initial_time)
+        self.processed = MethodType(SimpyProcessed, self)
@@ -1,101 +1,160 @@
+from types import GeneratorType, FunctionType
+
 from . import *
 
 
-class Promise(Base):
+# Settling a promise schedules a single event that dispatches the registered `then`/`catch` callbacks; a process is
+# only started when a callback returns a generator. Events returned by `wait()` are triggered on settlement.
+# Promises are slotted and named by a counter id, the callback and waiter lists are only allocated when used.
+class Promise:
+    __slots__ = ('context', 'id', 'response', 'error', 'failed', 'succeed', '_callbacks', '_waiters', '_dispatching',
+                 '__weakref__')
+
     def __init__(self, context):
-        super().__init__(context)
+        self.context = context
+        self.id = context.next_id()
         self.response = None
         self.error = None
         self.failed = False
         self.succeed = False
-        self.alive = self.context.env.event()
+        self._callbacks = None
+        self._waiters = None
+        self._dispatching = False
+
+    @property
+    def name(self):
+        return f'promise-{self.id}'
 
     @staticmethod
     def init(context, gen):
         p = Promise(context)
-
-        def _(gen, context=context, p=p):
-            try:
-                resp = yield context.run(gen)
-                p.resolve(resp)
-            except (SimException, SimError) as e:
-                p.reject(e)
-
-        context.run(_(gen))
+        p._adopt(gen)
         return p
 
+    def settled(self):
+        return self.failed or self.succeed
+
     def reject(self, error):
         if self.failed or self.succeed:
             return
         self.failed = True
         self.error = error
-        self.alive.succeed()
+        self._settle()
 
     def resolve(self, response):
         if self.failed or self.succeed:
             return
         self.succeed = True
         self.response = response
-        self.alive.succeed()
+        self._settle()
+
+    def _settle(self):
+        if self._waiters:
+            waiters, self._waiters = self._waiters, None
+            for ev in waiters:
+                self._trigger(ev)
+        if self._callbacks:
+            self._schedule_dispatch()
+
+    def _trigger(self, ev):
+        if self.succeed:
+            ev.succeed(self.response)
+        else:
+            ev.fail(self.error)
+
+    def _schedule_dispatch(self):
+        if self._dispatching:
+            return
+        self._dispatching = True
+        ev = self.context.env.event()
+        ev.callbacks.append(self._dispatch)
+        ev.succeed()
+
+    def _dispatch(self, _):
+        self._dispatching = False
+        callbacks, self._callbacks = self._callbacks, None
+        for callback in callbacks:
+            callback(self)
+
+    def _listen(self, callback):
+        if self._callbacks is None:
+            self._callbacks = [callback]
+        else:
+            self._callbacks.append(callback)
+        if self.failed or self.succeed:
+            self._schedule_dispatch()
+
+    def on_settled(self, callback):
+        # calls `callback(promise)` once settled, without creating a new promise like `then`/`catch` do
+        self._listen(callback)
+
+    def _adopt(self, result):
+        # settle this promise with the outcome of `result`, which follows the semantics of `Context.run`
+        if type(result) is FunctionType:
+            result = result()
+        if type(result) is GeneratorType:
+            self.context.env.process(result).callbacks.append(self._on_process)
+        elif isinstance(result, Promise):
+            result._listen(self._follow)
+        else:
+            self.resolve(result)
+
+    def _on_process(self, proc):
+        if proc.ok:
+            self.resolve(proc.value)
+        elif isinstance(proc.value, (SimException, SimError)):
+            proc.defused = True
+            self.reject(proc.value)
+
+    def _follow(self, other):
+        if other.succeed:
+            self.resolve(other.response)
+        else:
+            self.reject(other.error)
+
+    def _call(self, callback, arg):
+        try:
+            self._adopt(callback(arg))
+        except (SimException, SimError) as e:
+            self.reject(e)
 
     def then(self, callback):
         p = Promise(self.context)
 
-        def _(p, callback):
-            yield self.alive
-            if self.succeed:
-                p.request = self.response
-                try:
-                    res = yield self.run(callback(self.response))
-                    p.resolve(res)
-                except (SimException, SimError) as e:
-                    p.reject(e)
+        def _(src, p=p, callback=callback):
+            if src.succeed:
+                p._call(callback, src.response)
             else:
-                p.reject(self.error)
+                p.reject(src.error)
 
-        self.run(_(p, callback))
+        self._listen(_)
         return p
 
     def catch(self, callback):
         p = Promise(self.context)
 
-        def _(p, callback):
-            yield self.alive
-            if self.failed:
-                try:
-                    res = yield self.run(callback(self.error))
-                    p.resolve(res)
-                except (SimException, SimError) as e:
-                    p.reject(e)
+        def _(src, p=p, callback=callback):
+            if src.failed:
+                p._call(callback, src.error)
             else:
-                p.resolve(self.response)
+                p.resolve(src.response)
 
-        self.run(_(p, callback))
+        self._listen(_)
         return p
 
     def wait(self):
-        def _():
-            yield self.alive
-            if self.succeed:
-                return self.response
-            else:
-                raise self.error
-
-        return self.run(_())
+        ev = self.context.env.event()
+        if self.failed or self.succeed:
+            self._trigger(ev)
+        elif self._waiters is None:
+            self._waiters = [ev]
+        else:
+            self._waiters.append(ev)
+        return ev
 
     @staticmethod
     def race(context, promises):
-        def _(context, promises):
-            events = [x.wait() for x in promises]
-            try:
-                resp = yield context.env.any_of(events)
-            except Exception as e:
-                for ev in events:
-                    ev.defused = True # silence other potential exceptions before this being operated
-                raise e
-
-            for e in events:
-                e.defused = True # silence other potential exceptions
-            return list(resp.values())[0]
-
-        return Promise.init(context, _(context, promises))
+        p = Promise(context)
+        for x in promises:
+            x._listen(p._follow)
+        return p
@@ -1,7 +1,6 @@
 from dataclasses import dataclass
 
 from . import Config
-from .base import Base
 from .promise import Promise
 
 
@@ -15,6 +14,8 @@ class MessageConfig(Config):
 
 
 class Message:
+    __slots__ = ('attachment', 'size', '__weakref__')
+
     def __init__(self, attachment=None, size=0):
         self.attachment = attachment
         self.size = size
@@ -23,9 +24,15 @@ class Message:
         return f'Msg({self.attachment})'
 
 
-class RequestContext(Base):
+# Created for every request, so it is kept small: slots instead of a dict and a counter id instead of a uuid name.
+class RequestContext:
+    __slots__ = ('context', 'id', 'request', 'response', 'host_name', 'endpoint_name', 'instance_name', 'status',
+                 'req_sent', 'req_arrived', 'proc_started', 'proc_completed', 'resp_arrived', 'failed_at', 'is_timeout',
+                 'mark', 'server_promise', '__weakref__')
+
     def __init__(self, context, request):
-        super().__init__(context)
+        self.context = context
+        self.id = context.next_id()
         self.request = request
         self.response = None
         self.host_name = None
@@ -44,6 +51,13 @@ class RequestContext(Base):
 
         self.server_promise = Promise(context)
 
+    @property
+    def name(self):
+        return f'request-{self.id}'
+
+    def now(self):
+        return self.context.env.now
+
     def fail(self, error, at_server=False):
         self.failed_at = self.now()
         self.status = error.code
@@ -0,0 +1,90 @@
+from heapq import heapify, heappop, heappush
+
+
+"""
+Cancellable timers. All timers of a context share one heap and a single pending wake-up event in the event queue, at
+the earliest deadline. Cancelling a timer only clears its callback (O(1)); cancelled entries are dropped when they
+reach the top of the heap, and the heap is compacted once they make up more than half of it, so its size stays
+proportional to the timers that are still pending.
+"""
+
+
+class Timer:
+    __slots__ = ('queue', 'deadline', 'callback')
+
+    def __init__(self, queue, deadline, callback):
+        self.queue = queue
+        self.deadline = deadline
+        self.callback = callback
+
+    @property
+    def pending(self):
+        # neither fired nor cancelled
+        return self.callback is not None
+
+    def cancel(self):
+        if self.callback is not None:
+            self.callback = None
+            self.queue._cancelled()
+
+
+class TimerQueue:
+    COMPACT_MIN = 256
+
+    def __init__(self, env):
+        self.env = env
+        self._heap = []
+        self._seq = 0
+        self._cancelled_count = 0
+        self._wakeup = None
+        self._wakeup_at = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def call_later(self, delay, callback) -> Timer:
+        # calls `callback()` after `delay` simulated seconds unless the returned timer is cancelled
+        if delay < 0:
+            raise ValueError(f'Negative delay {delay}')
+        deadline = self.env.now + delay
+        timer = Timer(self, deadline, callback)
+        self._seq += 1
+        heappush(self._heap, (deadline, self._seq, timer))
+        if self._wakeup_at is None or deadline < self._wakeup_at:
+            self._wake_up_at(deadline)
+        return timer
+
+    def _wake_up_at(self, deadline):
+        # an earlier wake-up supersedes the pending one, which then finds itself stale and does nothing
+        self._wakeup_at = deadline
+        self._wakeup = self.env.timeout(deadline - self.env.now)
+        self._wakeup.callbacks.append(self._fire)
+
+    def _cancelled(self):
+        self._cancelled_count += 1
+        heap = self._heap
+        if self._cancelled_count > TimerQueue.COMPACT_MIN and self._cancelled_count * 2 > len(heap):
+            heap[:] = [x for x in heap if x[2].callback is not None]
+            heapify(heap)
+            self._cancelled_count = 0
+
+    def _fire(self, event):
+        if event is not self._wakeup:
+            return
+        # timers are due up to the deadline the wake-up was set for, which `now` may miss by a rounding error
+        due = self._wakeup_at
+        self._wakeup = self._wakeup_at = None
+        heap = self._heap
+        while heap and heap[0][0] <= due:
+            timer = heappop(heap)[2]
+            callback = timer.callback
+            if callback is None:
+                self._cancelled_count -= 1
+            else:
+                timer.callback = None
+                callback()
+        while heap and heap[0][2].callback is None:
+            heappop(heap)
+            self._cancelled_count -= 1
+        if heap and (self._wakeup_at is None or heap[0][0] < self._wakeup_at):
+            self._wake_up_at(heap[0][0])
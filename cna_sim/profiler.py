@@ -0,0 +1,247 @@
+import json
+import math
+import time
+import weakref
+from collections import Counter, defaultdict
+from types import CodeType, MethodType, FunctionType
+
+from simpy.events import Initialize, Process
+
+from .core import Context, Promise, RequestContext, Message
+from .core import engine
+
+
+"""
+Instrumentation of a running `Context`, enabled with `context.start_profiling()` or `cna-sim --profile`. Every
+processed event is attributed to an owner, the class of the component whose code handles it: the object of a bound
+callback, or the object whose method created the generator of a process. The generators created by `Context.run` (for
+a delayed start) and `Context.alive_race` are reported as `Context.run` and `Context.alive_race`, so the cost of these
+wrappers is visible.
+
+Only the `step` of the profiled environment is replaced. The constructors of the tracked classes are wrapped until
+`stop` (or `Context.close`), and only count the objects of the profiled context, or created while it handles an event.
+
+For each owner the report has the wall time spent handling its events, the events scheduled meanwhile, the processes
+started for its generators, and the RequestContext/Promise/Message objects created meanwhile that are still alive.
+"""
+
+TRACKED_CLASSES = [RequestContext, Promise, Message]
+INITIALIZE_CLASSES = (Initialize, engine.Initialize)
+PROCESS_CLASSES = (Process, engine.Process)
+
+
+
+# code of the generators defined in the methods of Context -> `Context.<method>`
+_CONTEXT_CODES = {code: f'Context.{name}' for name, function in vars(Context).items() if type(function) is FunctionType
+                  for code in function.__code__.co_consts if type(code) is CodeType}
+
+
+def _owner_of_code(code, f_locals):
+    obj = f_locals.get('self')
+    if isinstance(obj, Context):
+        return _CONTEXT_CODES.get(code, 'Context')
+    if obj is not None:
+        return type(obj).__name__
+    cls = f_locals.get('cls')
+    if isinstance(cls, type):
+        return cls.__name__
+    # the class or function the code is defined in, `co_qualname` is only there from Python 3.11
+    qualname = getattr(code, 'co_qualname', None)
+    return code.co_name if qualname is None else qualname.split('.')[0]
+
+
+def owner_of_generator(generator):
+    frame = generator.gi_frame
+    return _owner_of_code(generator.gi_code, {} if frame is None else frame.f_locals)
+
+
+_process_owners = weakref.WeakKeyDictionary()
+
+
+def owner_of_callback(callback):
+    if type(callback) is MethodType:
+        obj = callback.__self__
+        if isinstance(obj, PROCESS_CLASSES):
+            owner = _process_owners.get(obj)
+            if owner is None:
+                owner = _process_owners[obj] = owner_of_generator(obj._generator)
+            return owner
+        return obj.__name__ if isinstance(obj, type) else type(obj).__name__
+    if type(callback) is FunctionType:
+        return callback.__qualname__.split('.')[0]
+    return type(callback).__name__
+
+
+class Profiler:
+    def __init__(self, context: Context):
+        self.context = context
+        self.events = Counter()  # event class -> handled events
+        self.events_by_owner = Counter()  # owner handling the event that scheduled them -> scheduled events
+        self.processes = Counter()  # owner of the generator -> started processes
+        self.steps = Counter()  # owner -> handled events
+        self.wall_by_owner = defaultdict(float)  # owner -> wall time spent in handled events
+        self.created = Counter()  # (object class, owner) -> created objects
+        self.peak_live = Counter()  # (object class, owner) -> live objects, maximum over the simulated seconds
+        self.seconds = []  # [simulated second, wall time spent simulating it]
+        self.wall_time = 0.0
+        self.sim_time = 0.0
+        self._live = defaultdict(weakref.WeakSet)
+        self._owner = 'Context'
+        self._stepping = False
+        self._scheduled = 0  # `env.scheduled_events` after the last step
+        self._second = None
+        self._second_wall = 0.0
+        self._patched = []
+        self._started_at = None
+
+    def start(self):
+        env = self.context.env
+        step = env.step
+        profiler = self
+
+        def profiled_step():
+            # events scheduled since the last step were scheduled outside of the event loop
+            scheduled = env.scheduled_events
+            profiler.events_by_owner['Context'] += scheduled - profiler._scheduled
+            queue = env._queue
+            owner = '(no callbacks)'
+            if queue:
+                event = queue[0][3]
+                profiler.events[type(event).__name__] += 1
+                callbacks = event.callbacks
+                if callbacks:
+                    owner = owner_of_callback(callbacks[0])
+                    if type(event) in INITIALIZE_CLASSES:
+                        profiler.processes[owner] += 1
+            profiler._owner = owner
+            profiler._stepping = True
+            start = time.perf_counter()
+            try:
+                step()
+            finally:
+                wall = time.perf_counter() - start
+                profiler._owner = 'Context'
+                profiler._stepping = False
+                profiler._scheduled = env.scheduled_events
+                profiler.events_by_owner[owner] += profiler._scheduled - scheduled
+                profiler.steps[owner] += 1
+                profiler.wall_by_owner[owner] += wall
+                profiler._tick(wall)
+
+        self._scheduled = env.scheduled_events
+        try:
+            env.step = profiled_step
+            self._patched.append((env, 'step'))
+            for cls in TRACKED_CLASSES:
+                self._patch_init(cls)
+        except BaseException:
+            self.stop()
+            raise
+        self._second = math.floor(env.now)
+        self._started_at = time.perf_counter()
+        self.sim_time = env.now
+        return self
+
+    def _patch_init(self, cls):
+        init = cls.__init__
+        profiler = self
+
+        def profiled_init(obj, *args, **kwargs):
+            init(obj, *args, **kwargs)
+            context = getattr(obj, 'context', None)
+            if context is profiler.context or (context is None and profiler._stepping):
+                key = (cls.__name__, profiler._owner)
+                profiler.created[key] += 1
+                profiler._live[key].add(obj)
+
+        cls.__init__ = profiled_init
+        self._patched.append((cls, '__init__', init))
+
+    def _tick(self, wall):
+        self._second_wall += wall
+        second = math.floor(self.context.env.now)
+        if second != self._second:
+            self.seconds.append([self._second, self._second_wall])
+            self._second_wall = 0.0
+            self._second = second
+            for key, objects in self._live.items():
+                self.peak_live[key] = max(self.peak_live[key], len(objects))
+
+    @property
+    def running(self):
+        return self._started_at is not None
+
+    def stop(self):
+        if self._started_at is not None:
+            self.events_by_owner['Context'] += self.context.env.scheduled_events - self._scheduled
+        for patched in reversed(self._patched):
+            if len(patched) == 2:
+                delattr(*patched)
+            else:
+                setattr(*patched)
+        self._patched = []
+        if self._started_at is not None:
+            self.wall_time += time.perf_counter() - self._started_at
+            self.sim_time = self.context.env.now - self.sim_time
+            self._started_at = None
+        return self
+
+    def live(self):
+        return {key: len(objects) for key, objects in self._live.items()}
+
+    def to_json(self):
+        sim_time = self.sim_time if self._started_at is None else self.context.env.now - self.sim_time
+        wall_time = self.wall_time if self._started_at is None else time.perf_counter() - self._started_at
+        live = self.live()
+        objects = defaultdict(dict)
+        for key in sorted(set(self.created) | set(live)):
+            objects[key[0]][key[1]] = {
+                'created': self.created[key],
+                'live': live.get(key, 0),
+                'peak_live': max(self.peak_live[key], live.get(key, 0)),
+            }
+        owners = sorted(set(self.steps) | set(self.events_by_owner) | set(self.processes),
+                        key=lambda x: -self.wall_by_owner.get(x, 0.0))
+        return {
+            'sim_time': sim_time,
+            'wall_time': wall_time,
+            'wall_per_sim_second': wall_time / sim_time if sim_time > 0 else None,
+            'events': dict(self.events.most_common()),
+            'owners': {owner: {
+                'wall_time': self.wall_by_owner.get(owner, 0.0),
+                'handled_events': self.steps[owner],
+                'scheduled_events': self.events_by_owner[owner],
+                'started_processes': self.processes[owner],
+            } for owner in owners},
+            'objects': dict(objects),
+            'seconds': self.seconds,
+        }
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    def report(self):
+        j = self.to_json()
+        step_wall = sum(x['wall_time'] for x in j['owners'].values())
+        lines = [f'Simulated {j["sim_time"]:.3f}s in {j["wall_time"]:.3f}s wall time']
+        if j['wall_per_sim_second'] is not None:
+            walls = [x[1] for x in j['seconds']]
+            lines[0] += f', {j["wall_per_sim_second"] * 1000:.3f}ms per simulated second'
+            if walls:
+                lines[0] += f' (slowest second {max(walls) * 1000:.3f}ms)'
+        scheduled = sum(x['scheduled_events'] for x in j['owners'].values())
+        by_class = ', '.join(f'{k} {v}' for k, v in j['events'].items())
+        lines.append(f'Events: {scheduled} scheduled, {sum(j["events"].values())} handled ({by_class})')
+        lines.append('')
+        lines.append(f'{"owner":<32} {"wall (s)":>10} {"wall %":>7} {"handled":>10} {"scheduled":>10} {"processes":>10}')
+        for owner, x in j['owners'].items():
+            share = 100 * x['wall_time'] / step_wall if step_wall else 0.0
+            lines.append(f'{owner:<32} {x["wall_time"]:>10.3f} {share:>6.1f}% {x["handled_events"]:>10} '
+                         f'{x["scheduled_events"]:>10} {x["started_processes"]:>10}')
+        lines.append('')
+        lines.append(f'{"object":<16} {"created by":<32} {"created":>10} {"live":>8} {"peak live":>10}')
+        for name, by_owner in j['objects'].items():
+            for owner, x in by_owner.items():
+                lines.append(f'{name:<16} {owner:<32} {x["created"]:>10} {x["live"]:>8} {x["peak_live"]:>10}')
+        return '\n'.join(lines)
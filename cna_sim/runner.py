@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .builder import ContextBuilder
+from .components.data_collectors import HistogramDataCollector, HistogramDataCollectorConfig
+from .core import ContextConfig
+from .utils import confidence_interval, default_if_none
+
+
+"""
+Runs independent replications of a configuration in a process pool. Each replication replaces the data collector by
+a `HistogramDataCollector` and reports a flat summary (`<host>/<metric>`) back to the parent, where the replications
+are aggregated into means with confidence intervals.
+"""
+
+PERCENTILES = (50, 95, 99)
+
+
+def replication_seeds(replications, seed=None):
+    seed_sequence = np.random.SeedSequence(seed)
+    return seed_sequence.entropy, [int(x.generate_state(1, np.uint64)[0]) for x in seed_sequence.spawn(replications)]
+
+
+def summarize(collector: HistogramDataCollector, duration):
+    hosts = sorted({tags[0] for (_, tags) in collector.counts if tags[0] is not None} |
+                   {tags[0] for (_, _, tags) in collector.histograms if tags[0] is not None})
+    summary = {}
+    for host in hosts:
+        total = collector.count(host_name=host)
+        if total:
+            summary[f'{host}/throughput'] = total / duration if duration else None
+            summary[f'{host}/error_rate'] = 1 - collector.count(host_name=host, status='SUCCEED') / total
+            response_time = collector.histogram('response_time', host_name=host)
+            summary[f'{host}/response_time_mean'] = response_time.mean()
+            for q, v in response_time.percentiles(PERCENTILES).items():
+                summary[f'{host}/response_time_p{q}'] = v
+        for metric in ['instance_num', 'active_instance_num']:
+            h = collector.histogram(metric, host_name=host)
+            if h.count:
+                summary[f'{host}/{metric}_mean'] = h.mean()
+                summary[f'{host}/{metric}_max'] = h.max
+    return summary
+
+
+def run_replication(context_config: ContextConfig, duration, seed):
+    context_config.data_collector_config = HistogramDataCollectorConfig(window=max(duration, 1),
+                                                                        tags=['host_name', 'status'])
+    with context_config.generate(seed) as context:
+        context.simulate(duration)
+        return summarize(context.data_collector, duration)
+
+
+_worker_builder = None
+_worker_builders = {}
+
+
+def _init_worker(builder):
+    global _worker_builder
+    _worker_builder = builder
+    _worker_builders.clear()
+
+
+def _run_in_worker(duration, seed, point=None, overrides=()):
+    # the builder of a point is derived once per worker, each replication only re-creates the configs from it
+    builder = _worker_builders.get(point)
+    if builder is None:
+        builder = _worker_builder
+        if overrides:
+            builder = builder.copy()
+            for name, path, value in overrides:
+                builder.override(name, path, value)
+        _worker_builders[point] = builder
+    return run_replication(builder.context_config(), duration, seed)
+
+
+def run_tasks(builder: ContextBuilder, tasks, jobs=None):
+    # tasks are (duration, seed, point, overrides) tuples, results are returned in the same order
+    jobs = min(default_if_none(jobs, os.cpu_count()), len(tasks))
+    if jobs <= 1:
+        _init_worker(builder)
+        return [_run_in_worker(*x) for x in tasks]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(builder,)) as executor:
+        return list(executor.map(_run_in_worker, *zip(*tasks)))
+
+
+def aggregate(summaries, confidence=0.95):
+    metrics = sorted({k for x in summaries for k in x})
+    result = {}
+    for metric in metrics:
+        values = [x.get(metric) for x in summaries]
+        mean, half_width = confidence_interval(values, confidence)
+        result[metric] = {'mean': mean, 'half_width': half_width, 'n': len([x for x in values if x is not None])}
+    return result
+
+
+def run_replications(builder: ContextBuilder, duration, replications, jobs=None, seed=None, confidence=0.95):
+    entropy, seeds = replication_seeds(replications, seed)
+    summaries = run_tasks(builder, [(duration, s, None, ()) for s in seeds], jobs)
+    return {
+        'entropy': entropy,
+        'seeds': seeds,
+        'confidence': confidence,
+        'summaries': summaries,
+        'aggregate': aggregate(summaries, confidence),
+    }
+
+
+def format_aggregate(result):
+    lines = [f'{"metric":<48} {"mean":>12} {"+/-":>12} {"n":>4}']
+    for metric, v in result['aggregate'].items():
+        mean = '' if v['mean'] is None else f'{v["mean"]:.6g}'
+        half_width = '' if v['half_width'] is None else f'{v["half_width"]:.4g}'
+        lines.append(f'{metric:<48} {mean:>12} {half_width:>12} {v["n"]:>4}')
+    return '\n'.join(lines)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+from copy import copy
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from .core import Config
+from .runner import replication_seeds, run_tasks
+from .utils import default_if_none, not_none, remove_m, shallow_asdict
+
+
+"""
+Parameter sweeps over fields of the loaded configurations. A sweep is declared with a `SweepConfig`:
+
+    kind: SweepConfig
+    name: sweep
+    spec:
+      design: grid              # grid, random or lhs
+      samples: 20               # number of points for random and lhs designs
+      replications: 3
+      duration: 300
+      seed: 1
+      output: results.csv
+      parameters:
+        - {target: pod_config, path: threads, values: [8, 16, 32, 64]}
+        - {target: pod_config, path: cpu_quota, values: [500m, 1, 2]}
+        - {target: load_generator_config, path: rps, range: [100, 2000], step: 100}
+
+`target` is the name of a configuration and `path` a dot separated path in its spec (list items by index). Every point
+runs `replications` times with the same seeds (common random numbers), the results table has one row per point and
+replication.
+"""
+
+
+class SweepParameter:
+    def __init__(self, target, path, values=None, range=None, step=None, steps=None, type=None, name=None):
+        self.target = not_none(target)
+        self.path = str(not_none(path))
+        self.values = values
+        self.range = None if range is None else [remove_m(x) for x in range]
+        self.step = remove_m(step)
+        self.steps = steps
+        if values is None and range is None:
+            raise ValueError(f'Parameter {target}.{path} needs either values or range.')
+        if type is None and self.range is not None:
+            type = 'int' if all(float(x).is_integer() for x in [*self.range, default_if_none(self.step, 1)]) else 'float'
+        self.type = type
+        self.name = default_if_none(name, f'{target}.{path}')
+
+    @staticmethod
+    def from_json(j):
+        return SweepParameter(**j)
+
+    def cast(self, v):
+        return int(round(v)) if self.type == 'int' else float(v)
+
+    def grid(self):
+        if self.values is not None:
+            return list(self.values)
+        low, high = self.range
+        if self.step is not None:
+            values = np.arange(low, high + self.step / 2, self.step)
+        else:
+            values = np.linspace(low, high, default_if_none(self.steps, 5))
+        return list(dict.fromkeys(self.cast(x) for x in values))
+
+    def at(self, u):
+        # value at quantile u in [0, 1)
+        if self.values is not None:
+            return self.values[min(int(u * len(self.values)), len(self.values) - 1)]
+        low, high = self.range
+        if self.type == 'int':
+            return min(int(low + u * (high - low + 1)), int(high))
+        return float(low + u * (high - low))
+
+
+@dataclass
+class SweepConfig(Config):
+    parameters: List[dict]
+    design: str = None
+    samples: int = None
+    replications: int = None
+    duration: float | str = None
+    seed: int = None
+    output: str = None
+    name: str = None
+
+    def generator(self):
+        return lambda builder: Sweep(builder, **shallow_asdict(self))
+
+    @classmethod
+    def from_json(cls, j, builder):
+        j = copy(j)
+        j['duration'] = remove_m(j.get('duration'))
+        return cls(**j)
+
+
+class Sweep:
+    DESIGNS = ['grid', 'random', 'lhs']
+
+    def __init__(self, builder, parameters, design=None, samples=None, replications=None, duration=None, seed=None,
+                 output=None, name=None):
+        self.builder = builder
+        self.parameters = [x if isinstance(x, SweepParameter) else SweepParameter.from_json(x)
+                           for x in not_none(parameters)]
+        self.design = default_if_none(design, 'grid')
+        if self.design not in Sweep.DESIGNS:
+            raise ValueError(f'Unknown design {self.design}.')
+        self.samples = default_if_none(samples, 10)
+        self.replications = default_if_none(replications, 1)
+        self.duration = duration
+        self.seed = seed
+        self.output = output
+        self.name = name
+        for p in self.parameters:
+            if p.target not in builder.config_jsons:
+                raise ValueError(f'Configuration {p.target} not found.')
+
+    def points(self):
+        if self.design == 'grid':
+            return [dict(zip([p.name for p in self.parameters], x))
+                    for x in itertools.product(*[p.grid() for p in self.parameters])]
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed).spawn(1)[0])
+        n = self.samples
+        if self.design == 'random':
+            u = rng.random((len(self.parameters), n))
+        else:
+            u = np.array([(rng.permutation(n) + rng.random(n)) / n for _ in self.parameters])
+        return [{p.name: p.at(u[i, j]) for i, p in enumerate(self.parameters)} for j in range(n)]
+
+    def run(self, jobs=None, duration=None, replications=None):
+        duration = not_none(default_if_none(duration, self.duration))
+        replications = default_if_none(replications, self.replications)
+        _, seeds = replication_seeds(replications, self.seed)
+        points = self.points()
+        tasks, rows = [], []
+        for i, point in enumerate(points):
+            overrides = tuple((p.target, p.path, point[p.name]) for p in self.parameters)
+            for r, seed in enumerate(seeds):
+                tasks.append((duration, seed, i, overrides))
+                rows.append({'point': i, 'replication': r, 'seed': seed, **point})
+        for row, summary in zip(rows, run_tasks(self.builder, tasks, jobs)):
+            row.update(summary)
+        return rows
+
+    @staticmethod
+    def write(rows, path):
+        if path.endswith('.json'):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, indent=2)
+            return
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
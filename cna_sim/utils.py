@@ -2,8 +2,12 @@ from __future__ import annotations
 
 from dataclasses import is_dataclass, fields
 
+import hashlib
+import math
+import weakref
 import numpy as np
-from uuid import uuid4
+from statistics import NormalDist
+from uuid import uuid4, UUID
 from types import GeneratorType, FunctionType
 
 
@@ -37,8 +41,16 @@ def inject_context(gen, *args):
         return gen
 
 
-def uuid():
-    return str(uuid4())
+def uuid(random=None):
+    if random is None:
+        return str(uuid4())
+    return str(UUID(int=random.getrandbits(128), version=4))
+
+
+def stable_hash_words(key: str, words=4):
+    # process independent hash of a key, used as a SeedSequence spawn key
+    digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=4 * words).digest()
+    return tuple(int.from_bytes(digest[i:i + 4], 'little') for i in range(0, 4 * words, 4))
 
 
 def shallow_asdict(obj):
@@ -47,7 +59,106 @@ def shallow_asdict(obj):
     return {f.name: getattr(obj, f.name) for f in fields(obj)}
 
 
-def fit_lognormal(mean, std):
+class IndexedSet:
+    # set with O(1) add, discard and access by position (removal moves the last item into the freed slot)
+    def __init__(self, items=()):
+        self.items = []
+        self.index = {}
+        for x in items:
+            self.add(x)
+
+    def add(self, x):
+        if x not in self.index:
+            self.index[x] = len(self.items)
+            self.items.append(x)
+
+    def discard(self, x):
+        i = self.index.pop(x, None)
+        if i is None:
+            return
+        last = self.items.pop()
+        if i < len(self.items):
+            self.items[i] = last
+            self.index[last] = i
+
+    def __contains__(self, x):
+        return x in self.index
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+
+class FenwickTree:
+    # prefix sums over non-negative weights with O(log n) updates and weighted search
+    def __init__(self, size=0):
+        self.size = 0
+        self.tree = [0.0]
+        self.weights = []
+        self.total = 0.0
+        self.grow(size)
+
+    def grow(self, size):
+        while self.size < size:
+            self.size += 1
+            self.weights.append(0.0)
+            # the new node covers the range (i - lowbit(i), i]
+            i = self.size
+            lowbit = i & -i
+            self.tree.append(sum(self.weights[i - lowbit:i]))
+
+    def set(self, i, weight):
+        delta = weight - self.weights[i]
+        self.weights[i] = weight
+        self.total += delta
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, u):
+        # smallest index whose prefix sum exceeds u, for 0 <= u < total
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] <= u:
+                pos = nxt
+                u -= self.tree[nxt]
+            step >>= 1
+        return min(pos, self.size - 1)
+
+
+class AliasTable:
+    # Vose's alias method: O(n) construction, vectorized O(1) sampling of indices proportional to `weights`
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        if len(weights) == 0 or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("Weights must be non-negative with a positive sum.")
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1]
+        large = [i for i in range(n) if scaled[i] >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1 - scaled[s]
+            (small if scaled[l] < 1 else large).append(l)
+
+    def sample_array(self, rng: np.random.Generator, n):
+        i = rng.integers(0, len(self.prob), size=n)
+        return np.where(rng.random(n) < self.prob[i], i, self.alias[i])
+
+
+def lognormal_params(mean, std):
     if mean <= 0 or std < 0:
         raise ValueError(f"Mean {mean} and std {std} must be positive.")
     variance = std ** 2
@@ -55,23 +166,129 @@ def fit_lognormal(mean, std):
     sigma = np.sqrt(sigma_squared)
 
     mu = np.log(mean) - 0.5 * sigma_squared
+    return float(mu), float(sigma)
+
+
+def t_quantile(p, df):
+    # quantile of Student's t distribution: exact for df <= 2, Cornish-Fisher expansion otherwise
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * df ** 4))
+
+
+def confidence_interval(values, confidence=0.95):
+    # mean and half width of the confidence interval of the mean
+    values = [x for x in values if x is not None and not math.isnan(x)]
+    n = len(values)
+    if n == 0:
+        return None, None
+    mean = sum(values) / n
+    if n == 1:
+        return mean, None
+    std = math.sqrt(sum((x - mean) ** 2 for x in values) / (n - 1))
+    return mean, t_quantile(0.5 + confidence / 2, n - 1) * std / math.sqrt(n)
+
+
+def fit_lognormal(mean, std):
+    mu, sigma = lognormal_params(mean, std)
     return np.random.lognormal(mean=mu, sigma=sigma)
 
 
+def load_samples(file):
+    if file.endswith('.npy'):
+        samples = np.load(file)
+    else:
+        samples = np.loadtxt(file, delimiter=',' if file.endswith('.csv') else None, ndmin=1)
+    return np.asarray(samples, dtype=float).ravel()
+
+
+class SampleBuffer:
+    # serves pre-drawn samples by a cursor; blocks grow from a small size up to `block_size`
+    def __init__(self, draw, rng, block_size):
+        self.draw = draw
+        self.rng = rng
+        self.block_size = block_size
+        self.next_block = min(16, block_size)
+        self.buffer = []
+        self.cursor = 0
+
+    def next(self):
+        if self.cursor >= len(self.buffer):
+            self.buffer = self.draw(self.rng, self.next_block).tolist()
+            self.next_block = min(self.next_block * 2, self.block_size)
+            self.cursor = 0
+        v = self.buffer[self.cursor]
+        self.cursor += 1
+        return v
+
+
 class Distribution:
-    def __init__(self, mean: float | str = 0, std: float | str = 0, dis: str = 'lognormal'):
+    DEFAULT_BLOCK_SIZE = 1024
+    _instances = weakref.WeakSet()  # to drop the buffers of released random generators
+
+    # samples are pre-drawn in blocks of `block_size` and served by a cursor; `block_size: 1` draws one at a time.
+    # Each random generator passed to `sample` gets its own buffer, the global `np.random` is used without one.
+    def __init__(self, mean: float | str = 0, std: float | str = 0, dis: str = 'lognormal', block_size: int = None,
+                 file: str = None, samples: list = None):
         self.mean = remove_m(mean)
         self.std = remove_m(std)
         self.dis = dis
+        self.block_size = max(1, int(default_if_none(block_size, Distribution.DEFAULT_BLOCK_SIZE)))
+        self.samples = None
+        if dis == 'empirical':
+            if samples is None:
+                samples = load_samples(not_none(file))
+            self.samples = np.asarray([remove_m(x) for x in samples], dtype=float)
+            if len(self.samples) == 0:
+                raise ValueError("Empirical distribution requires at least one sample.")
+            self.mean = float(self.samples.mean())
+            self.std = float(self.samples.std())
+        self._draw = self._drawer()
+        self._buffers = {}
+        Distribution._instances.add(self)
 
     @staticmethod
     def from_json(j):
         return Distribution(**j)
 
-    def sample(self):
+    def _drawer(self):
+        mean, std = self.mean, self.std
         if self.dis == 'lognormal':
-            return fit_lognormal(self.mean, self.std)
+            mu, sigma = lognormal_params(mean, std)
+            return lambda rng, n: rng.lognormal(mean=mu, sigma=sigma, size=n)
         elif self.dis == 'normal':
-            return np.random.normal(loc=self.mean, scale=self.std)
-        else:
-            return NotImplementedError()
+            return lambda rng, n: rng.normal(loc=mean, scale=std, size=n)
+        elif self.dis == 'exponential':
+            return lambda rng, n: rng.exponential(scale=mean, size=n)
+        elif self.dis == 'gamma':
+            if mean <= 0 or std <= 0:
+                raise ValueError(f"Mean {mean} and std {std} must be positive.")
+            shape, scale = (mean / std) ** 2, std ** 2 / mean
+            return lambda rng, n: rng.gamma(shape=shape, scale=scale, size=n)
+        elif self.dis == 'constant':
+            return lambda rng, n: np.full(n, mean)
+        elif self.dis == 'empirical':
+            samples = self.samples
+            return lambda rng, n: rng.choice(samples, size=n)
+        raise ValueError(f"Unknown distribution {self.dis}.")
+
+    def sample(self, rng: np.random.Generator = None):
+        buffer = self._buffers.get(rng)
+        if buffer is None:
+            buffer = self._buffers[rng] = SampleBuffer(self._draw, default_if_none(rng, np.random), self.block_size)
+        return buffer.next()
+
+    @staticmethod
+    def release(rng: np.random.Generator):
+        # drops the buffers drawn from `rng` once its owner is gone, see `Context.remove`
+        for distribution in list(Distribution._instances):
+            distribution._buffers.pop(rng, None)
+
+    def sample_array(self, n, rng: np.random.Generator = None):
+        return self._draw(default_if_none(rng, np.random), n)
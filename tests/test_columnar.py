@@ -0,0 +1,57 @@
+import csv
+
+import numpy as np
+import pytest
+
+from cna_sim.components.data_collectors import ColumnarDataCollector
+from cna_sim.core import Context
+
+
+def recorded(path=None, format=None):
+    collector = ColumnarDataCollector(Context(seed=0), path=path, format=format, capacity=2)
+    collector.record('m', {'host': 'a'}, {'value': 1.5, 'status': 'OK', 'ok': True}, 1.0)
+    collector.record('m', {'host': 'b'}, {'value': 2, 'status': 'DOWN', 'ok': False, 'code': 200}, 2.0)
+    collector.record('m', {}, {'status': None, 'code': 'n/a'}, 3.0)
+    return collector
+
+
+def test_non_numeric_fields_are_interned():
+    collector = recorded()
+    arrays = collector.arrays('m')
+    assert arrays['value'].dtype == np.float64
+    np.testing.assert_array_equal(arrays['value'], [1.5, 2, np.nan])
+    np.testing.assert_array_equal(arrays['ok'], [1, 0, np.nan])
+    assert arrays['status'].dtype == np.int32
+    assert list(collector.category_array('status')[arrays['status'][:2]]) == ['OK', 'DOWN']
+    assert arrays['status'][2] == -1
+    # numeric until the first string, then recoded
+    assert list(collector.category_array('code')[arrays['code'][1:]]) == ['200.0', 'n/a']
+    assert arrays['code'][0] == -1
+
+
+def test_csv(tmp_path):
+    recorded(str(tmp_path), 'csv').close()
+    with open(tmp_path / 'm.csv', newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [x['status'] for x in rows] == ['OK', 'DOWN', '']
+    assert [x['code'] for x in rows] == ['', '200.0', 'n/a']
+    assert [x['value'] for x in rows] == ['1.5', '2.0', '']
+
+
+def test_npz(tmp_path):
+    recorded(str(tmp_path), 'npz').close()
+    with np.load(tmp_path / 'm.npz') as data:
+        assert list(data['categories/status'][data['status'][:2]]) == ['OK', 'DOWN']
+        assert list(data['categories/host']) == ['a', 'b']
+
+
+def test_pandas_and_parquet(tmp_path):
+    pytest.importorskip('pandas')
+    pytest.importorskip('pyarrow')
+    import pandas as pd
+
+    collector = recorded(str(tmp_path), 'parquet')
+    assert collector.to_pandas('m')['status'].tolist()[:2] == ['OK', 'DOWN']
+    collector.close()
+    status = pd.read_parquet(tmp_path / 'm.parquet')['status']
+    assert status.tolist()[:2] == ['OK', 'DOWN'] and pd.isna(status[2])
@@ -0,0 +1,111 @@
+import pytest
+
+from cna_sim.components.endpoints import StaticEndPointConfig
+from cna_sim.components.instances import SyncServerConfig
+from cna_sim.core import Context, SimError
+from cna_sim.utils import Distribution
+
+
+# what `run_semantics` logs: started processes only run once the caller yields, in the order of the `run` calls;
+# values are handed back without scheduling, functions are called from the event loop (after the processes started
+# before them); errors reach the process that yields; a delayed start waits for the delay; `alive_race` gives the value
+# of the event unless `alive` comes first (or is already triggered)
+RUN_SEMANTICS = [
+    ('spawned', 0), ('value', 42, 0), ('start', 'a', 0), ('start', 'b', 0), ('function', 'f', 0),
+    ('results', 1, 2, 0), ('start', 'c', 0), ('caught', 'E', 0), ('start', 'd', 2), ('delayed', 4, 2),
+    ('race', 'x', 3), ('race_lost', 'DOWN', 3),
+]
+
+
+def run_semantics(engine):
+    context = Context(seed=0, engine=engine)
+    log = []
+
+    def worker(tag, result=None, fail=False):
+        log.append(('start', tag, context.now()))
+        yield context.timeout(0)
+        if fail:
+            raise SimError('E')
+        return result
+
+    def main():
+        a, b = context.run(worker('a', 1)), context.run(worker('b', 2))
+        log.append(('spawned', context.now()))
+        log.append(('value', (yield context.run(42)), context.now()))
+        log.append(('function', (yield context.run(lambda: 'f')), context.now()))
+        log.append(('results', (yield a), (yield b), context.now()))
+        try:
+            yield context.run(worker('c', fail=True))
+        except SimError as e:
+            log.append(('caught', e.code, context.now()))
+        log.append(('delayed', (yield context.run(worker('d', 4), 2)), context.now()))
+        log.append(('race', (yield context.alive_race(context.env.timeout(1, 'x'), context.env.event())), context.now()))
+        try:
+            yield context.alive_race(context.timeout(5), context.env.timeout(1, SimError('DOWN')))
+        except SimError as e:
+            log.append(('race_lost', e.code, context.now()))
+
+    context.run(main())
+    context.simulate(10)
+    return log
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_run_semantics(engine):
+    assert run_semantics(engine) == RUN_SEMANTICS
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_run_defers_functions(engine):
+    context = Context(seed=0, engine=engine)
+    log = []
+
+    def fail():
+        raise SimError('E')
+
+    def main():
+        event = context.run(lambda: log.append('called') or 'f')
+        context.env.event().succeed()  # due now and scheduled before the call starts, so it comes first
+        log.append('after run')
+        log.append((yield event))
+        try:
+            yield context.run(fail)
+        except SimError as e:
+            log.append(('caught', e.code, context.now()))
+
+    context.run(main())
+    context.simulate(1)
+    assert log == ['after run', 'called', 'f', ('caught', 'E', 0)]
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_values_are_processed(engine):
+    context = Context(seed=0, engine=engine)
+    event = context.run(42)
+    assert event.processed and event.ok and event.value == 42
+    assert not event.defused
+    assert context.scheduled_events() == 0
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_terminate_as_computation_ends(engine):
+    context = Context(seed=0, engine=engine)
+    instance = SyncServerConfig(StaticEndPointConfig([('/a', [], Distribution(1.0))]), shut_down_delay=1.0,
+                                warming_up_factor_init=1).generator()(context)
+    log = []
+
+    def main():
+        computation = instance.compute(Distribution(1.0))
+        # the computation schedules its end at 1 before the shutdown is scheduled for the same time
+        yield context.timeout(0)
+        instance.terminate()
+        try:
+            yield computation
+            log.append(('computed', context.now()))
+        except SimError as e:
+            log.append(('failed', e.code, context.now()))
+
+    context.run(main())
+    context.simulate(5)
+    assert log == [('computed', 1)]
+    assert instance.status == 'TERMINATED'
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from cna_sim.benchmarks.conformance import TOPOLOGY_RUNS, run_example, topology_outcome
+from cna_sim.core import Context
+
+
+EXAMPLES = Path(__file__).resolve().parents[1] / 'examples'
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('path', sorted(EXAMPLES.glob('*/*.py')), ids=lambda x: str(x.relative_to(EXAMPLES)))
+def test_examples_match_across_engines(path):
+    outputs = {engine: run_example(path, engine) for engine in Context.ENGINES}
+    reference = outputs[Context.ENGINES[0]]
+    assert reference[0] == 0, reference[2]
+    for engine, output in outputs.items():
+        assert output == reference, engine
+
+
+@pytest.mark.parametrize('topology, rps, duration', TOPOLOGY_RUNS, ids=[x[0] for x in TOPOLOGY_RUNS])
+def test_topologies_match_across_engines(topology, rps, duration):
+    outcomes = {engine: topology_outcome(topology, rps, duration, engine) for engine in Context.ENGINES}
+    assert len(set(outcomes.values())) == 1, outcomes
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_defused(engine):
+    event = Context(seed=0, engine=engine).env.event()
+    assert not event.defused
+    event.defused = True
+    assert event.defused
+
+
+def test_defused_can_be_reset():
+    # simpy ignores the value and always defuses, the fast engine keeps what is set
+    event = Context(seed=0, engine='fast').env.event()
+    event.defused = True
+    event.defused = False
+    assert not event.defused
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_scheduled_events(engine):
+    context = Context(seed=0, engine=engine)
+    start = context.scheduled_events()
+    assert context.scheduled_events() == start  # reading the counter schedules nothing and takes no id
+    context.env.timeout(1)
+    context.env.event().succeed()
+    assert context.scheduled_events() == start + 2
@@ -0,0 +1,56 @@
+import pytest
+
+from cna_sim.components.endpoints import StaticEndPointConfig
+from cna_sim.components.instances import SyncServerConfig
+from cna_sim.components.networks import LatencyNetworkConfig
+from cna_sim.components.proxies import Gateway, GatewayConfig
+from cna_sim.core import Base, Client, Context, Message
+from cna_sim.utils import Distribution
+
+
+def test_missing_route_target():
+    context = Context(seed=0)
+    Base(context, 'shop', in_context=True)
+    gateway = Gateway(context, components=['shop'], routes=[{'host': 'shop', 'prefix': '/v2', 'targets': 'shop_v2'}])
+    assert gateway.find_component('shop', '/a').name == 'shop'
+    with pytest.raises(ValueError, match='shop_v2'):
+        gateway.find_component('shop', '/v2/a')
+
+    # resolved once the target is created
+    shop_v2 = Base(context, 'shop_v2', in_context=True)
+    assert gateway.find_component('shop', '/v2/a') is shop_v2
+
+
+def test_table_follows_components():
+    context = Context(seed=0)
+    gateway = Gateway(context, components=['shop'])
+    with pytest.raises(ValueError, match='shop'):
+        gateway.find_component('shop')
+
+    shop = Base(context, 'shop', in_context=True)
+    assert gateway.find_component('shop') is shop
+    context.remove(shop)
+    with pytest.raises(ValueError, match='shop'):
+        gateway.find_component('shop')
+    replacement = Base(context, 'shop', in_context=True)
+    assert gateway.find_component('shop') is replacement
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_pass_through_crosses_the_network_to_the_target(engine):
+    network = LatencyNetworkConfig(latency={'client': {'edge': 1}, 'edge': {'zone': 2}})
+    gateway = GatewayConfig(components=['shop'], pass_through=True, network_group='edge')
+    context = Context(seed=0, engine=engine, network_gen=network.generator(), gateway_gen=gateway.generator())
+    SyncServerConfig(StaticEndPointConfig([('/a', [], Distribution(0.5))]), name='shop', warming_up_factor_init=1,
+                     network_group='zone').generator()(context)
+    client = Client(context, network_group='client')
+    log = []
+
+    def main():
+        yield client.send_request('shop', '/a', Message(), by_proxy=True).wait()
+        log.append(context.now())
+
+    context.run(main())
+    context.simulate(10)
+    # client -> gateway -> shop, and gateway -> client back
+    assert log == [4.5]
@@ -0,0 +1,84 @@
+import datetime
+import logging
+
+import pytest
+
+from cna_sim.benchmarks.influx import StandInInfluxServer
+from cna_sim.components.data_collectors import InfluxLineDataCollectorConfig
+from cna_sim.components.data_collectors.influx_line_data_collector import LineProtocolWriter, encode_field
+from cna_sim.core import ContextConfig
+
+
+OFFSET = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def server():
+    with StandInInfluxServer() as server:
+        server.keep_lines = True
+        yield server
+
+
+def collector_context(server, **kwargs):
+    config = InfluxLineDataCollectorConfig(server.url, 'token', 'org', 'bucket', OFFSET, **kwargs)
+    return ContextConfig(data_collector_config=config).generate()
+
+
+def test_encode_field():
+    assert encode_field(1.5) == '1.5'
+    assert encode_field(3) == '3i'
+    assert encode_field(True) == 'true'
+    assert encode_field('say "hi" \\ bye') == '"say \\"hi\\" \\\\ bye"'
+    assert encode_field(float('nan')) is None
+    assert encode_field(None) is None
+
+
+@pytest.mark.parametrize('gzip', [False, True])
+def test_lines_are_escaped_and_batched(server, gzip):
+    context = collector_context(server, batch_size=2, gzip=gzip)
+    collector = context.data_collector
+    collector.record('response time', {'host name': 'a,b', 'path': 'x=y', 'empty': ''}, {'value': 0.5, 'n': 2}, 1.0)
+    collector.record('m', {}, {'status': 'OK', 'ok': True, 'skipped': float('nan')}, 2.0)
+    collector.record('m', {}, {'skipped': None}, 3.0)  # no field left, not written
+    collector.record('m', {}, {'value': 1.0}, 4.0)
+    context.close()
+
+    offset = int(OFFSET.timestamp()) * 10**9
+    assert server.lines == [
+        f'response\\ time,host\\ name=a\\,b,path=x\\=y value=0.5,n=2i {offset + 10**9}',
+        f'm status="OK",ok=true {offset + 2 * 10**9}',
+        f'm value=1.0 {offset + 4 * 10**9}',
+    ]
+    assert server.requests == 2  # a full batch of two, and the rest on close
+    assert server.gzip_requests == (2 if gzip else 0)
+    stats = collector.stats()
+    assert stats['written_points'] == stats['submitted_points'] == 3
+    assert stats['written_batches'] == 2 and stats['write_errors'] == 0
+
+
+def test_backpressure_is_counted(server):
+    server.delay = 0.05
+    writer = LineProtocolWriter(server.url, 'token', 'org', 'bucket', queue_size=1)
+    for i in range(5):
+        writer.submit(f'm value={i}i {i}\n'.encode('utf-8'), 1)
+    writer.close()
+    assert writer.stats['blocked_submits'] > 0
+    assert writer.stats['blocked_time'] > 0
+    assert writer.stats['written_points'] == server.points == 5
+
+
+def test_write_errors(server, caplog):
+    server.status = 400
+    writer = LineProtocolWriter(server.url, 'token', 'org', 'bucket', gzip=True, queue_size=1)
+    with caplog.at_level(logging.CRITICAL):
+        writer.submit(b'm value=1i 1\n', 1)
+        writer.flush()
+        server.status = 204
+        # not bytes: fails outside of the HTTP request, the writer keeps going
+        for _ in range(3):
+            writer.submit('m value=2i 2\n', 1)
+        writer.submit(b'm value=3i 3\n', 1)
+        writer.close()
+    assert writer.stats['write_errors'] == 4
+    assert writer.stats['written_points'] == 1
+    assert server.lines == ['m value=3i 3']
@@ -0,0 +1,18 @@
+import pytest
+
+from cna_sim.benchmarks.lifecycle import check
+from cna_sim.core import Context
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_terminated_instances_are_released(engine):
+    # a light load keeps a thousand cycles to about a minute, a leak per terminated instance adds up regardless
+    rows, failures = check(1000, blocks=5, rps=10, engine=engine)
+    first = rows[0]
+    for row in rows:
+        assert row['components'] <= first['components']
+        assert row['rngs'] <= first['rngs']
+        assert row['events_per_second'] <= first['events_per_second'] * 1.1
+        assert row['memory'] <= first['memory'] + (1 << 14) + 32 * (row['cycles'] - first['cycles'])
+    assert not failures, failures
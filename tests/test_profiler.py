@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+from cna_sim.benchmarks.topologies import single
+from cna_sim.core import Context, RequestContext
+from cna_sim.profiler import _owner_of_code, owner_of_generator
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_profile(engine):
+    init = RequestContext.__init__
+    context = single(100, engine=engine)
+    other = single(100, engine=engine)
+    start = context.scheduled_events()
+    profiler = context.start_profiling()
+    other.simulate(1)  # not profiled, runs while the constructors are wrapped
+    context.simulate(1)
+    profiler.stop()
+    assert RequestContext.__init__ is init
+    assert 'step' not in vars(context.env)
+
+    j = profiler.to_json()
+    assert sum(x['scheduled_events'] for x in j['owners'].values()) == context.scheduled_events() - start
+    assert sum(x['handled_events'] for x in j['owners'].values()) == sum(j['events'].values())
+    assert 'SyncServer' in j['owners']
+    # the requests of `other` are not attributed to `context`
+    created = sum(x['created'] for x in j['objects']['RequestContext'].values())
+    assert context.data_collector.ended <= created <= context.data_collector.ended + 5
+    assert 'Events:' in profiler.report()
+    context.close()
+    other.close()
+
+
+def test_close_stops_profiling():
+    init = RequestContext.__init__
+    context = single(100)
+    context.start_profiling()
+    context.simulate(1)
+    context.close()
+    assert not context.profiler.running
+    assert RequestContext.__init__ is init
+
+
+def test_owner_of_code():
+    context = Context(seed=0)
+
+    def gen():
+        yield context.timeout(1)
+
+    assert owner_of_generator(context.run(gen(), 1)._generator) == 'Context.run'
+    # before Python 3.11 codes have no `co_qualname`
+    assert _owner_of_code(SimpleNamespace(co_name='gen'), {}) == 'gen'
+    assert _owner_of_code(SimpleNamespace(co_name='gen'), {'cls': Context}) == 'Context'
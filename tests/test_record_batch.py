@@ -0,0 +1,60 @@
+import datetime
+
+import numpy as np
+from cna_sim.benchmarks.influx import StandInInfluxServer
+from cna_sim.components.data_collectors import (ColumnarDataCollector, HistogramDataCollector,
+                                                InfluxLineDataCollector)
+from cna_sim.core import Context
+
+
+SOURCE_A = {'host_name': 'a', 'instance_name': 'a-1'}
+SOURCE_B = {'host_name': 'b'}
+RECORDS = [
+    ('cpu', SOURCE_A, {'value': 0.5}),
+    ('cpu', SOURCE_B, {'value': 2}),
+    ('status', SOURCE_A, {'value': 'ACTIVE'}),
+    ('cpu', SOURCE_A, {'value': None}),
+    ('status', SOURCE_B, {'value': 'TERMINATING'}),
+]
+
+
+def record_ticks(collector, batched, records=RECORDS):
+    # the same ticks recorded with `record` or with `record_batch`
+    for time in [1.0, 2.5, 12.0]:
+        if batched:
+            collector.record_batch(records, time)
+        else:
+            for measurement, tags, fields in records:
+                collector.record(measurement, tags, fields, time)
+    return collector
+
+
+def test_columnar():
+    single, batched = [record_ticks(ColumnarDataCollector(Context(seed=0), capacity=2), x) for x in [False, True]]
+    for measurement in ['cpu', 'status']:
+        expected, got = single.arrays(measurement), batched.arrays(measurement)
+        assert expected.keys() == got.keys()
+        for k in expected:
+            np.testing.assert_array_equal(expected[k], got[k], err_msg=k)
+    assert single.categories == batched.categories
+
+
+def test_histogram():
+    records = [x for x in RECORDS if x[0] == 'cpu']
+    single, batched = [record_ticks(HistogramDataCollector(Context(seed=0), window=10, tags=['host_name']), x, records)
+                       for x in [False, True]]
+    assert single.to_json() == batched.to_json()
+
+
+def test_influx_line():
+    offset = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    lines = []
+    for batched in [False, True]:
+        with StandInInfluxServer() as server:
+            server.keep_lines = True
+            collector = InfluxLineDataCollector(Context(seed=0), server.url, 'token', 'org', 'bucket', offset,
+                                                batch_size=3)
+            record_ticks(collector, batched).close()
+            lines.append(server.lines)
+    assert lines[0] == lines[1]
+    assert len(lines[0]) == 4 * 3
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from cna_sim.components.instances.sync_server import ThreadPool
+from cna_sim.core import Context
+
+
+def reference(changes, t):
+    # integral of the piecewise constant level given as (time, level) changes, 0 before the first
+    total, last, level = 0.0, 0.0, 0
+    for at, new_level in changes:
+        if at >= t:
+            break
+        total += level * (at - last)
+        last, level = at, new_level
+    return total + level * (t - last)
+
+
+@pytest.mark.parametrize('engine', Context.ENGINES)
+def test_integral_is_exact_since_the_last_boundary(engine):
+    context = Context(seed=0, engine=engine)
+    pool = ThreadPool(context, 8, cpu_quota=2, resolution=1, horizon=10)
+    rng = np.random.default_rng(0)
+    changes = []
+    checked = []
+
+    def drive():
+        active = 0
+        for gap in rng.exponential(0.05, 400):
+            yield context.timeout(gap)
+            if active and (active == 8 or rng.random() < 0.5):
+                active -= 1
+                pool.compute_ended()
+            else:
+                active += 1
+                pool.compute_started()
+            changes.append((context.now(), min(active, 2)))
+            if rng.random() < 0.2:
+                now = context.now()
+                last_boundary = now // pool.resolution * pool.resolution
+                for t in rng.uniform(last_boundary, now + 0.5, 5).tolist() + [last_boundary]:
+                    checked.append((pool.integral(t), reference(changes, t)))
+                # boundaries of the horizon are exact as well
+                for t in np.arange(max(0, last_boundary - 9), last_boundary):
+                    checked.append((pool.integral(t), reference(changes, t)))
+    context.run(drive())
+    context.simulate(30)
+    assert len(checked) > 100
+    np.testing.assert_allclose(*zip(*checked), rtol=1e-9, atol=1e-9)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from cna_sim.benchmarks.traces import run, write_traces
+from cna_sim.components.load_generators.trace_replay_load_generator import (
+    _loadtxt_chunks, _pandas_chunks, read_csv_header, read_trace_chunks)
+
+
+CSV = '''timestamp, host,endpoint,size
+1.5,a,"/x,y#z",10
+
+2.0,b,/y,
+3.25,a,/z,7
+'''
+
+
+def csv_readers():
+    readers = [_loadtxt_chunks]
+    try:
+        import pandas
+        readers.append(lambda file, chunk_size, header: _pandas_chunks(pandas, file, chunk_size, header))
+    except ImportError:
+        pass
+    return readers
+
+
+@pytest.mark.parametrize('reader', csv_readers())
+def test_csv_chunks(tmp_path, reader):
+    file = tmp_path / 'trace.csv'
+    file.write_text(CSV, encoding='utf-8')
+    chunks = list(reader(str(file), 2, read_csv_header(str(file))))
+    timestamps, hosts, endpoints, sizes = [np.concatenate(x) for x in zip(*chunks)]
+    assert all(len(x[0]) <= 2 for x in chunks)
+    assert timestamps.tolist() == [1.5, 2.0, 3.25]
+    assert hosts.tolist() == ['a', 'b', 'a']
+    assert endpoints.tolist() == ['/x,y#z', '/y', '/z']
+    assert sizes.tolist() == [10, 0, 7]
+
+
+def test_csv_without_column(tmp_path):
+    file = tmp_path / 'trace.csv'
+    file.write_text('timestamp,endpoint\n1,/x\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='host'):
+        read_trace_chunks(str(file), 10)
+
+
+def test_csv_and_npy_agree(tmp_path):
+    files = write_traces(str(tmp_path), 1000)
+    csv, npy = [[np.concatenate(x) for x in zip(*read_trace_chunks(files[f], 300))] for f in ('csv', 'npy')]
+    np.testing.assert_allclose(csv[0], npy[0], atol=1e-6)  # written with 6 decimals
+    for a, b in zip(csv[1:], npy[1:]):
+        assert a.tolist() == b.tolist()
+
+
+@pytest.mark.parametrize('format', ['csv', 'npy'])
+def test_throughput(tmp_path, format):
+    file = write_traces(str(tmp_path), 200000)[format]
+    run(file)  # imports pandas and warms the caches
+    x = run(file)
+    assert x['arrivals'] == 200000
+    assert x['arrivals_per_second'] >= 100000